@@ -0,0 +1,34 @@
+"""
+Backfill the audit_log_counts summary table from audit_logs.
+
+New audit events update the summary as they are written; this seeds it for
+databases (or restored snapshots) that have audit rows but no summary yet.
+Safe to run repeatedly: it only runs while the summary table is empty.
+"""
+from sqlalchemy import inspect
+
+import models
+from database import engine
+
+
+def migrate(bind=engine) -> int:
+    models.AuditLogCount.__table__.create(bind=bind, checkfirst=True)
+    if "audit_logs" not in inspect(bind).get_table_names():
+        return 0
+
+    with bind.begin() as conn:
+        if conn.exec_driver_sql("SELECT 1 FROM audit_log_counts LIMIT 1").first():
+            return 0
+        result = conn.exec_driver_sql(
+            "INSERT INTO audit_log_counts (day, action, resource_type, username, count) "
+            "SELECT date(timestamp), action, resource_type, coalesce(username, ''), count(*) "
+            "FROM audit_logs WHERE timestamp IS NOT NULL "
+            "GROUP BY date(timestamp), action, resource_type, coalesce(username, '')"
+        )
+        return result.rowcount
+
+
+if __name__ == "__main__":
+    rows = migrate()
+    print(f"Backfilled {rows} audit summary row(s)." if rows else "Audit summary already populated.")
+    print("Migration complete.")
@@ -0,0 +1,59 @@
+"""
+Create the change_journal table and the triggers that append to it.
+
+Every insert, update and delete on engineers, projects, allocations,
+resourcing_requirements and project_devices appends (table_name, row_id) to
+change_journal in the writing transaction. Changes to the project_staffing
+rollup journal the project too, since staffing metrics are part of a project's
+response. /api/sync (sync.py) turns the entries after a client's version into
+upserts and tombstones from the rows' current state.
+
+HORIZON is a table_versions row holding the highest seq that compaction has
+dropped by age; clients holding an older version must reload in full.
+
+Safe to run repeatedly: the horizon is seeded once and triggers recreated.
+"""
+import models
+from database import engine
+
+JOURNALED_TABLES = ["engineers", "projects", "allocations", "resourcing_requirements", "project_devices"]
+HORIZON = "__journal_horizon__"
+
+_APPEND = "INSERT INTO change_journal (table_name, row_id) VALUES ('{table}', {row_id});"
+
+
+def _triggers():
+    for table in JOURNALED_TABLES:
+        yield f"trg_change_journal_{table}_insert", \
+            f"AFTER INSERT ON {table} BEGIN {_APPEND.format(table=table, row_id='NEW.id')} END"
+        yield f"trg_change_journal_{table}_delete", \
+            f"AFTER DELETE ON {table} BEGIN {_APPEND.format(table=table, row_id='OLD.id')} END"
+        # A changed primary key is a delete of the old id plus an upsert of the new one
+        yield f"trg_change_journal_{table}_update", \
+            f"AFTER UPDATE ON {table} BEGIN {_APPEND.format(table=table, row_id='NEW.id')} " \
+            f"INSERT INTO change_journal (table_name, row_id) SELECT '{table}', OLD.id WHERE OLD.id IS NOT NEW.id; END"
+
+    for event, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+        yield f"trg_change_journal_project_staffing_{event}", \
+            f"AFTER {event.upper()} ON project_staffing " \
+            f"BEGIN {_APPEND.format(table='projects', row_id=f'{row}.project_id')} END"
+
+
+def install_triggers(conn):
+    for name, body in _triggers():
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        conn.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+
+
+def migrate(bind=engine):
+    models.ChangeJournal.__table__.create(bind=bind, checkfirst=True)
+    with bind.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (HORIZON,)
+        )
+        install_triggers(conn)
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Migration complete.")
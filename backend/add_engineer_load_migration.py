@@ -0,0 +1,137 @@
+"""
+Create and backfill the engineer_load summary table and the triggers that
+maintain it.
+
+engineer_load holds allocated hours per (engineer, day, category). SQLite
+triggers on allocations (insert / update / delete) and on projects (workflow
+status change / delete) apply each change as a delta in the same transaction,
+so every write path - API endpoints, CSV imports, ORM cascades - keeps it
+exact. Capacity is read from engineers directly, so engineer edits need no
+upkeep here.
+
+Safe to run repeatedly: triggers are recreated and the table is only
+backfilled while empty. For recovery:
+    python add_engineer_load_migration.py --check     # report drift
+    python add_engineer_load_migration.py --rebuild   # recompute from allocations
+"""
+import sys
+
+from sqlalchemy import inspect
+
+import models
+from database import engine
+
+_INACTIVE = ", ".join(f"'{s.name}'" for s in (models.WorkflowStatusEnum.COMPLETE, models.WorkflowStatusEnum.CANCELLED))
+
+def _active(project_id: str) -> str:
+    """SQL: 1 if the project exists and still consumes capacity (see analytics.active_project), else 0."""
+    return (
+        f"coalesce((SELECT workflow_status IS NULL OR workflow_status NOT IN ({_INACTIVE}) "
+        f"FROM projects WHERE id = {project_id}), 0)"
+    )
+
+_ADD = """
+    INSERT INTO engineer_load (engineer_id, day, category, hours, active_hours, allocation_count)
+    VALUES (NEW.engineer_id, NEW.day, NEW.category, NEW.hours, NEW.hours * {active}, 1)
+    ON CONFLICT (engineer_id, day, category) DO UPDATE SET
+        hours = hours + excluded.hours,
+        active_hours = active_hours + excluded.active_hours,
+        allocation_count = allocation_count + 1;
+""".format(active=_active("NEW.project_id"))
+
+_REMOVE = """
+    UPDATE engineer_load SET
+        hours = hours - OLD.hours,
+        active_hours = active_hours - OLD.hours * {active},
+        allocation_count = allocation_count - 1
+    WHERE engineer_id = OLD.engineer_id AND day = OLD.day AND category = OLD.category;
+    DELETE FROM engineer_load
+    WHERE engineer_id = OLD.engineer_id AND day = OLD.day AND category = OLD.category AND allocation_count <= 0;
+""".format(active=_active("OLD.project_id"))
+
+# Shift a project's allocations into (+1) or out of (-1) active_hours
+_SHIFT_PROJECT = """
+    UPDATE engineer_load SET active_hours = active_hours + {sign} * (
+        SELECT coalesce(sum(a.hours), 0) FROM allocations a
+        WHERE a.project_id = OLD.id AND a.engineer_id = engineer_load.engineer_id
+          AND a.day = engineer_load.day AND a.category = engineer_load.category
+    )
+    WHERE engineer_id IN (SELECT engineer_id FROM allocations WHERE project_id = OLD.id);
+"""
+
+_OLD_ACTIVE = f"(OLD.workflow_status IS NULL OR OLD.workflow_status NOT IN ({_INACTIVE}))"
+_NEW_ACTIVE = f"(NEW.workflow_status IS NULL OR NEW.workflow_status NOT IN ({_INACTIVE}))"
+
+TRIGGERS = {
+    "trg_engineer_load_allocation_insert":
+        f"AFTER INSERT ON allocations BEGIN {_ADD} END",
+    "trg_engineer_load_allocation_delete":
+        f"AFTER DELETE ON allocations BEGIN {_REMOVE} END",
+    "trg_engineer_load_allocation_update":
+        f"AFTER UPDATE OF engineer_id, project_id, day, category, hours ON allocations BEGIN {_REMOVE} {_ADD} END",
+    "trg_engineer_load_project_status":
+        f"AFTER UPDATE OF workflow_status ON projects WHEN {_OLD_ACTIVE} != {_NEW_ACTIVE} "
+        f"BEGIN {_SHIFT_PROJECT.format(sign=f'(CASE WHEN {_NEW_ACTIVE} THEN 1 ELSE -1 END)')} END",
+    "trg_engineer_load_project_delete":
+        f"AFTER DELETE ON projects WHEN {_OLD_ACTIVE} BEGIN {_SHIFT_PROJECT.format(sign='-1')} END",
+}
+
+# engineer_load recomputed from scratch
+LOAD_QUERY = f"""
+    SELECT a.engineer_id, a.day, a.category, sum(a.hours),
+           sum(CASE WHEN p.id IS NOT NULL AND (p.workflow_status IS NULL OR p.workflow_status NOT IN ({_INACTIVE}))
+                    THEN a.hours ELSE 0 END),
+           count(*)
+    FROM allocations a LEFT JOIN projects p ON p.id = a.project_id
+    GROUP BY a.engineer_id, a.day, a.category
+"""
+COLUMNS = "engineer_id, day, category, hours, active_hours, allocation_count"
+
+
+def install_triggers(conn):
+    for name, body in TRIGGERS.items():
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        conn.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+
+
+def rebuild(bind=engine) -> int:
+    """Recompute engineer_load from allocations. Returns the number of rows."""
+    with bind.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM engineer_load")
+        return conn.exec_driver_sql(f"INSERT INTO engineer_load ({COLUMNS}) {LOAD_QUERY}").rowcount
+
+
+def check(bind=engine) -> int:
+    """Number of engineer_load rows that differ from a full recompute (0 = consistent)."""
+    with bind.connect() as conn:
+        stored = f"SELECT {COLUMNS} FROM engineer_load"
+        return conn.exec_driver_sql(
+            f"SELECT (SELECT count(*) FROM ({stored} EXCEPT {LOAD_QUERY})) "
+            f"+ (SELECT count(*) FROM ({LOAD_QUERY} EXCEPT {stored}))"
+        ).scalar()
+
+
+def migrate(bind=engine) -> int:
+    models.EngineerLoad.__table__.create(bind=bind, checkfirst=True)
+    tables = set(inspect(bind).get_table_names())
+    if not {"allocations", "projects"} <= tables:
+        return 0
+
+    with bind.begin() as conn:
+        install_triggers(conn)
+        if conn.exec_driver_sql("SELECT 1 FROM engineer_load LIMIT 1").first():
+            return 0
+        return conn.exec_driver_sql(f"INSERT INTO engineer_load ({COLUMNS}) {LOAD_QUERY}").rowcount
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        drift = check()
+        print(f"engineer_load: {drift} row(s) out of date." if drift else "engineer_load is consistent.")
+        sys.exit(1 if drift else 0)
+    if "--rebuild" in sys.argv:
+        print(f"Rebuilt engineer_load: {rebuild()} row(s).")
+    else:
+        rows = migrate()
+        print(f"Backfilled {rows} engineer_load row(s)." if rows else "engineer_load already populated.")
+    print("Migration complete.")
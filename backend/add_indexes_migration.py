@@ -0,0 +1,42 @@
+"""
+Create the secondary indexes declared in models.py on an existing database.
+
+New databases get them from Base.metadata.create_all(); this brings older
+resource_manager.db files up to date. Safe to run repeatedly.
+"""
+from sqlalchemy import inspect
+
+import models
+from database import engine
+
+
+def migrate(bind=engine):
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table in models.Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue  # create_all() will build the table with its indexes
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            index.create(bind=bind, checkfirst=True)
+            created.append(index.name)
+
+    if created:
+        with bind.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+    return created
+
+
+if __name__ == "__main__":
+    created = migrate()
+    if created:
+        for name in created:
+            print(f"Created index {name}")
+    else:
+        print("All indexes already exist.")
+    print("Migration complete.")
@@ -0,0 +1,186 @@
+"""
+Create and backfill the project_staffing rollup table and the triggers that
+maintain it.
+
+project_staffing holds required hours (from resourcing requirements) and
+allocated Project Work hours (from allocations, by the engineer's role) per
+(project, role). SQLite triggers apply every change as a delta in the same
+transaction:
+- resourcing_requirements: insert / update / delete
+- allocations: insert / update / delete
+- engineers: role change, delete and insert (their allocations change role)
+
+Safe to run repeatedly: triggers are recreated and the table is only
+backfilled while empty. For recovery:
+    python add_project_staffing_migration.py --check     # compare with staffing.compute_staffing
+    python add_project_staffing_migration.py --rebuild   # recompute from scratch
+"""
+import sys
+from typing import List
+
+from sqlalchemy import inspect
+
+import models
+from database import engine, SessionLocal
+from staffing import compute_staffing, stored_staffing
+
+_PROJECT_WORK = f"'{models.CategoryEnum.PROJECT_WORK.name}'"
+
+
+def _role_value(column: str) -> str:
+    """SQL: an engineers.role value (stored as the enum name) as the role string requirements use."""
+    whens = " ".join(f"WHEN '{r.name}' THEN '{r.value}'" for r in models.RoleEnum)
+    return f"(CASE {column} {whens} ELSE '' END)"
+
+
+def _engineer_role(engineer_id: str) -> str:
+    return f"coalesce((SELECT {_role_value('role')} FROM engineers WHERE id = {engineer_id}), '')"
+
+
+def _upsert(select: str, on_conflict: str) -> str:
+    return f"""
+        INSERT INTO project_staffing (project_id, role, required_hours, requirement_count, allocated_hours, allocation_count)
+        {select}
+        ON CONFLICT (project_id, role) DO UPDATE SET {on_conflict};
+    """
+
+
+_ADD_REQUIRED = "required_hours = required_hours + excluded.required_hours, requirement_count = requirement_count + excluded.requirement_count"
+_ADD_ALLOCATED = "allocated_hours = allocated_hours + excluded.allocated_hours, allocation_count = allocation_count + excluded.allocation_count"
+_CLEANUP = "DELETE FROM project_staffing WHERE project_id = {project} AND requirement_count <= 0 AND allocation_count <= 0;"
+
+_REQUIREMENT_ADD = _upsert("SELECT NEW.project_id, NEW.role, NEW.hours_per_week, 1, 0, 0 WHERE true", _ADD_REQUIRED)
+_REQUIREMENT_REMOVE = """
+    UPDATE project_staffing SET
+        required_hours = required_hours - OLD.hours_per_week,
+        requirement_count = requirement_count - 1
+    WHERE project_id = OLD.project_id AND role = OLD.role;
+""" + _CLEANUP.format(project="OLD.project_id")
+
+_ALLOCATION_ADD = _upsert(
+    f"SELECT NEW.project_id, {_engineer_role('NEW.engineer_id')}, 0, 0, NEW.hours, 1 WHERE NEW.category = {_PROJECT_WORK}",
+    _ADD_ALLOCATED
+)
+_ALLOCATION_REMOVE = f"""
+    UPDATE project_staffing SET
+        allocated_hours = allocated_hours - OLD.hours,
+        allocation_count = allocation_count - 1
+    WHERE OLD.category = {_PROJECT_WORK} AND project_id = OLD.project_id AND role = {_engineer_role('OLD.engineer_id')};
+""" + _CLEANUP.format(project="OLD.project_id")
+
+
+def _move_engineer(engineer_id: str, from_role: str, to_role: str) -> str:
+    """SQL: move an engineer's Project Work allocations from one role to another."""
+    allocations = f"allocations a WHERE a.engineer_id = {engineer_id} AND a.category = {_PROJECT_WORK}"
+    per_project = f"{allocations} AND a.project_id = project_staffing.project_id"
+    return f"""
+        UPDATE project_staffing SET
+            allocated_hours = allocated_hours - (SELECT coalesce(sum(a.hours), 0) FROM {per_project}),
+            allocation_count = allocation_count - (SELECT count(*) FROM {per_project})
+        WHERE role = {from_role} AND project_id IN (SELECT a.project_id FROM {allocations});
+    """ + _upsert(
+        f"SELECT a.project_id, {to_role}, 0, 0, sum(a.hours), count(*) FROM {allocations} GROUP BY a.project_id",
+        _ADD_ALLOCATED
+    ) + f"""
+        DELETE FROM project_staffing
+        WHERE requirement_count <= 0 AND allocation_count <= 0
+          AND project_id IN (SELECT a.project_id FROM {allocations});
+    """
+
+
+_NO_ROLE = "''"
+
+TRIGGERS = {
+    "trg_project_staffing_requirement_insert":
+        f"AFTER INSERT ON resourcing_requirements BEGIN {_REQUIREMENT_ADD} END",
+    "trg_project_staffing_requirement_delete":
+        f"AFTER DELETE ON resourcing_requirements BEGIN {_REQUIREMENT_REMOVE} END",
+    "trg_project_staffing_requirement_update":
+        f"AFTER UPDATE OF project_id, role, hours_per_week ON resourcing_requirements "
+        f"BEGIN {_REQUIREMENT_REMOVE} {_REQUIREMENT_ADD} END",
+    "trg_project_staffing_allocation_insert":
+        f"AFTER INSERT ON allocations BEGIN {_ALLOCATION_ADD} END",
+    "trg_project_staffing_allocation_delete":
+        f"AFTER DELETE ON allocations BEGIN {_ALLOCATION_REMOVE} END",
+    "trg_project_staffing_allocation_update":
+        f"AFTER UPDATE OF engineer_id, project_id, category, hours ON allocations "
+        f"BEGIN {_ALLOCATION_REMOVE} {_ALLOCATION_ADD} END",
+    "trg_project_staffing_engineer_role":
+        f"AFTER UPDATE OF role ON engineers WHEN OLD.role IS NOT NEW.role "
+        f"BEGIN {_move_engineer('NEW.id', _role_value('OLD.role'), _role_value('NEW.role'))} END",
+    "trg_project_staffing_engineer_delete":
+        f"AFTER DELETE ON engineers BEGIN {_move_engineer('OLD.id', _role_value('OLD.role'), _NO_ROLE)} END",
+    "trg_project_staffing_engineer_insert":
+        f"AFTER INSERT ON engineers BEGIN {_move_engineer('NEW.id', _NO_ROLE, _role_value('NEW.role'))} END",
+}
+
+# project_staffing recomputed from scratch
+LOAD_QUERY = f"""
+    SELECT project_id, role, sum(required_hours), sum(requirement_count), sum(allocated_hours), sum(allocation_count)
+    FROM (
+        SELECT project_id, role, hours_per_week AS required_hours, 1 AS requirement_count,
+               0 AS allocated_hours, 0 AS allocation_count
+        FROM resourcing_requirements
+        UNION ALL
+        SELECT a.project_id, coalesce({_role_value('e.role')}, ''), 0, 0, a.hours, 1
+        FROM allocations a LEFT JOIN engineers e ON e.id = a.engineer_id
+        WHERE a.category = {_PROJECT_WORK}
+    )
+    GROUP BY project_id, role
+"""
+COLUMNS = "project_id, role, required_hours, requirement_count, allocated_hours, allocation_count"
+
+
+def install_triggers(conn):
+    for name, body in TRIGGERS.items():
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        conn.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+
+
+def rebuild(bind=engine) -> int:
+    """Recompute project_staffing from requirements and allocations. Returns the number of rows."""
+    with bind.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM project_staffing")
+        return conn.exec_driver_sql(f"INSERT INTO project_staffing ({COLUMNS}) {LOAD_QUERY}").rowcount
+
+
+def check() -> List[str]:
+    """Projects whose rollup differs from staffing.compute_staffing() (empty = consistent)."""
+    db = SessionLocal()
+    try:
+        expected = compute_staffing(db)
+        stored = stored_staffing(db)
+        return sorted(
+            project_id for project_id in set(expected) | set(stored)
+            if expected[project_id] != stored[project_id]
+        )
+    finally:
+        db.close()
+
+
+def migrate(bind=engine) -> int:
+    models.ProjectStaffing.__table__.create(bind=bind, checkfirst=True)
+    tables = set(inspect(bind).get_table_names())
+    if not {"resourcing_requirements", "allocations", "engineers"} <= tables:
+        return 0
+
+    with bind.begin() as conn:
+        install_triggers(conn)
+        if conn.exec_driver_sql("SELECT 1 FROM project_staffing LIMIT 1").first():
+            return 0
+        return conn.exec_driver_sql(f"INSERT INTO project_staffing ({COLUMNS}) {LOAD_QUERY}").rowcount
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        drift = check()
+        for project_id in drift:
+            print(f"Out of date: project {project_id}")
+        print(f"project_staffing: {len(drift)} project(s) out of date." if drift else "project_staffing is consistent.")
+        sys.exit(1 if drift else 0)
+    if "--rebuild" in sys.argv:
+        print(f"Rebuilt project_staffing: {rebuild()} row(s).")
+    else:
+        rows = migrate()
+        print(f"Backfilled {rows} project_staffing row(s)." if rows else "project_staffing already populated.")
+    print("Migration complete.")
@@ -0,0 +1,55 @@
+"""
+Create the table_versions counters and the triggers that bump them.
+
+table_versions holds one monotonically increasing version per planning table
+(engineers, projects, allocations, resourcing_requirements, project_devices).
+AFTER INSERT / UPDATE / DELETE triggers bump the counter inside the writing
+transaction, so a version can never be visible without the write it counts.
+List endpoints derive their ETag from these versions (see etags.py).
+
+The EPOCH row changes whenever a snapshot is restored: a restored database may
+carry versions a client has already seen with different data.
+
+Safe to run repeatedly: missing counters are seeded and triggers recreated.
+"""
+import uuid
+
+import models
+from database import engine
+
+VERSIONED_TABLES = ["engineers", "projects", "allocations", "resourcing_requirements", "project_devices"]
+EPOCH = "__epoch__"
+
+
+def install_triggers(conn):
+    for table in VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            name = f"trg_table_versions_{table}_{event.lower()}"
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {name} AFTER {event} ON {table} BEGIN "
+                f"UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}'; END"
+            )
+
+
+def new_epoch(bind=engine):
+    """Invalidate every ETag handed out so far (call after replacing the database)."""
+    with bind.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE table_versions SET version = ? WHERE table_name = ?", (uuid.uuid4().int >> 96, EPOCH)
+        )
+
+
+def migrate(bind=engine):
+    models.TableVersion.__table__.create(bind=bind, checkfirst=True)
+    with bind.begin() as conn:
+        for table in VERSIONED_TABLES + [EPOCH]:
+            conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,)
+            )
+        install_triggers(conn)
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Migration complete.")
@@ -0,0 +1,187 @@
+"""
+Batched allocation changes for goodenough.to | Planning
+
+POST /api/allocations/batch applies a re-plan from the allocation board - any
+mix of create / update / delete operations - in one round trip and one
+transaction:
+
+1. everything the batch touches (allocations, engineers, projects and the
+   engineers' current active hours from engineer_load) is loaded up front,
+2. the operations are replayed in memory to find every engineer whose load the
+   batch raised over effective capacity. CAPACITY_POLICY (see load_index.py)
+   decides what happens then: reject -> 409 and nothing is written; warn ->
+   the batch is applied and those engineers are listed in `warnings` and the
+   X-Capacity-Warning header,
+3. the rows are written with a single commit and one ImpactLog entry per
+   project summarising its changes.
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models, schemas
+from analytics import active_project, effective_capacity
+from database import get_db
+from events import broker
+from load_index import CAPACITY_POLICY
+
+# =============================================================================
+# Batch
+# =============================================================================
+
+def _missing(kind: str, wanted: set, found: Dict[str, object]):
+    missing = sorted(wanted - found.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": f"{kind} not found", "ids": missing})
+
+
+def apply_batch(
+    db: Session,
+    operations: List[schemas.AllocationBatchOperation],
+    response: Response,
+    policy: str = CAPACITY_POLICY
+) -> schemas.AllocationBatchResult:
+    """Validate and apply `operations` in order; commits once or raises without writing."""
+    allocation_ids = {str(op.id) for op in operations if op.op != "create"}
+    allocations = {
+        a.id: a for a in db.query(models.Allocation).filter(models.Allocation.id.in_(allocation_ids))
+    } if allocation_ids else {}
+    _missing("Allocation", allocation_ids, allocations)
+
+    engineer_ids = {a.engineer_id for a in allocations.values()} | \
+        {str(op.engineer_id) for op in operations if getattr(op, "engineer_id", None)}
+    project_ids = {a.project_id for a in allocations.values()} | \
+        {str(op.project_id) for op in operations if getattr(op, "project_id", None)}
+
+    engineers = {
+        row.id: row for row in db.query(models.Engineer.id, models.Engineer.name, effective_capacity.label("capacity"))
+        .filter(models.Engineer.id.in_(engineer_ids))
+    }
+    _missing("Engineer", engineer_ids, engineers)
+    active = dict(db.query(models.Project.id, active_project).filter(models.Project.id.in_(project_ids)).all())
+    _missing("Project", project_ids, active)
+
+    before = defaultdict(int, db.query(models.EngineerLoad.engineer_id, func.sum(models.EngineerLoad.active_hours))
+        .filter(models.EngineerLoad.engineer_id.in_(engineer_ids))
+        .group_by(models.EngineerLoad.engineer_id)
+        .all())
+    load = defaultdict(int, before)
+
+    def book(allocation, sign: int):
+        if allocation.engineer_id and active[allocation.project_id]:
+            load[allocation.engineer_id] += sign * allocation.hours
+
+    def name(engineer_id) -> str:
+        return engineers[engineer_id].name if engineer_id in engineers else "Unassigned"
+
+    changes = defaultdict(list)
+    created, updated, deleted = [], {}, set()
+    for index, op in enumerate(operations):
+        if op.op == "create":
+            allocation = models.Allocation(
+                project_id=str(op.project_id),
+                engineer_id=str(op.engineer_id),
+                hours=op.hours_per_week,
+                category=models.CategoryEnum.PROJECT_WORK,
+                day=models.DayEnum.MON
+            )
+            db.add(allocation)
+            book(allocation, 1)
+            created.append(allocation)
+            changes[allocation.project_id].append(f"Added {name(allocation.engineer_id)} ({op.role}, {op.hours_per_week}h)")
+            continue
+
+        allocation = allocations[str(op.id)]
+        if allocation.id in deleted:
+            raise HTTPException(status_code=409, detail=f"Operation {index}: allocation {allocation.id} already deleted in this batch")
+
+        book(allocation, -1)
+        if op.op == "delete":
+            db.delete(allocation)
+            deleted.add(allocation.id)
+            changes[allocation.project_id].append(f"Removed {name(allocation.engineer_id)} ({allocation.hours}h)")
+            continue
+
+        old_engineer, old_project, old_hours = allocation.engineer_id, allocation.project_id, allocation.hours
+        if op.engineer_id:
+            allocation.engineer_id = str(op.engineer_id)
+        if op.project_id:
+            allocation.project_id = str(op.project_id)
+        if op.hours_per_week is not None:
+            allocation.hours = op.hours_per_week
+        book(allocation, 1)
+        updated[allocation.id] = allocation
+
+        if allocation.project_id != old_project:
+            changes[old_project].append(f"Moved out {name(old_engineer)} ({old_hours}h)")
+            changes[allocation.project_id].append(f"Moved in {name(allocation.engineer_id)} ({allocation.hours}h)")
+            continue
+        if allocation.engineer_id != old_engineer:
+            changes[old_project].append(f"Reassigned {name(old_engineer)} → {name(allocation.engineer_id)}")
+        if allocation.hours != old_hours:
+            changes[old_project].append(f"{name(allocation.engineer_id)}: {old_hours}h → {allocation.hours}h")
+
+    # Only engineers this batch made busier: moving work off an overloaded engineer is always allowed
+    over = [
+        schemas.CapacityWarning(
+            engineer_id=engineer_id,
+            name=engineers[engineer_id].name,
+            effective_capacity=engineers[engineer_id].capacity,
+            allocated_hours=hours,
+            remaining_capacity=engineers[engineer_id].capacity - hours
+        )
+        for engineer_id, hours in load.items()
+        if hours > before[engineer_id] and hours > engineers[engineer_id].capacity
+    ]
+    if over and policy == "reject":
+        raise HTTPException(status_code=409, detail={
+            "message": "Batch would put engineers over capacity",
+            "engineers": [w.model_dump(mode="json") for w in over]
+        })
+    if over:
+        response.headers["X-Capacity-Warning"] = "; ".join(
+            f"{w.name} over capacity by {-w.remaining_capacity}h" for w in over
+        )
+
+    for project_id, lines in changes.items():
+        db.add(models.ImpactLog(
+            project_id=project_id,
+            event=f"Allocations Re-planned: {len(lines)} change{'s' if len(lines) != 1 else ''}",
+            reason="; ".join(lines)
+        ))
+
+    # Serialize before the commit expires every row
+    updated = [a for a in updated.values() if a.id not in deleted]
+    db.flush()
+    result = schemas.AllocationBatchResult(
+        created=[schemas.Allocation.model_validate(a) for a in created],
+        updated=[schemas.Allocation.model_validate(a) for a in updated],
+        deleted=sorted(deleted),
+        warnings=over
+    )
+    db.commit()
+    return result
+
+# =============================================================================
+# Router
+# =============================================================================
+
+batch_router = APIRouter(prefix="/api/allocations", tags=["Allocations"])
+
+@batch_router.post("/batch", response_model=schemas.AllocationBatchResult)
+def batch_allocations(batch: schemas.AllocationBatch, response: Response, db: Session = Depends(get_db)):
+    """
+    Apply create / update / delete operations in order, all or nothing.
+    404 names unknown allocations, engineers or projects; 409 means an operation
+    conflicts or, under the reject policy, the batch would put engineers over
+    capacity. Under the warn policy those engineers come back in `warnings`.
+    """
+    result = apply_batch(db, batch.operations, response)
+    broker.publish("allocation.batch", {
+        "created": len(result.created), "updated": len(result.updated), "deleted": len(result.deleted)
+    })
+    return result
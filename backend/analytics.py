@@ -0,0 +1,376 @@
+"""
+Analytics module for goodenough.to | Planning
+Dashboard KPIs computed server-side
+
+This module provides aggregate-only endpoints so the dashboard does not have
+to download every engineer, project, allocation and device to render its
+KPI cards:
+- Team and per-engineer capacity, utilization and burnout risk
+- Deep Work (Tue/Thu no-meetings) compliance and meeting load, team-wide
+  and per engineer
+- Project lifecycle counts, unassigned demand, device totals, fiscal impact
+  and fiscal year refresh progress
+
+Per-engineer hours come from the trigger-maintained engineer_load table
+(add_engineer_load_migration.py), so these reads scale with the number of
+engineers, not allocations.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, or_
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+import models
+from database import get_db
+
+# =============================================================================
+# Schemas
+# =============================================================================
+
+class TeamSummary(BaseModel):
+    engineer_count: int
+    effective_capacity: int
+    allocated_hours: int
+    utilization_pct: int
+    over_capacity_engineers: int
+
+class EngineerCapacity(BaseModel):
+    engineer_id: str
+    name: str
+    role: models.RoleEnum
+    effective_capacity: int
+    allocated_hours: int
+    utilization_pct: int
+    over_capacity: bool
+
+class DeepWorkSummary(BaseModel):
+    checked_engineers: int
+    compliant_engineers: int
+    compliance_pct: int
+
+class EngineerDeepWork(BaseModel):
+    engineer_id: str
+    name: str
+    role: models.RoleEnum
+    allocated_hours: int
+    meeting_hours: int
+    protected_day_meeting_hours: int
+    protected_day_meetings: int
+    meeting_load_pct: int
+    compliant: bool
+
+class DeepWorkReport(BaseModel):
+    team: DeepWorkSummary
+    allocated_hours: int
+    meeting_hours: int
+    meeting_load_pct: int
+    engineers: List[EngineerDeepWork]
+
+class DeviceSummary(BaseModel):
+    current_qty: int
+    proposed_qty: int
+    net_change: int
+
+class DemandSummary(BaseModel):
+    required_hours: int
+    allocated_hours: int
+    unassigned_hours: int
+    demand_met_pct: int
+
+class RefreshProgress(BaseModel):
+    planned: int
+    completed: int
+
+class DashboardSummary(BaseModel):
+    team: TeamSummary
+    deep_work: DeepWorkSummary
+    lifecycle: Dict[str, int]
+    demand: DemandSummary
+    devices: DeviceSummary
+    fiscal_impact: Dict[str, int]
+    # Fiscal year -> device type -> proposed devices (planned) and those on Complete projects
+    fiscal_refresh: Dict[str, Dict[str, RefreshProgress]]
+
+# =============================================================================
+# Shared Expressions
+# =============================================================================
+
+# Team filters used by the dashboard ("All Teams" applies no filter)
+TEAM_ROLES = {
+    "Network": [models.RoleEnum.NETWORK_ENGINEER],
+    "Wireless": [models.RoleEnum.WIRELESS_ENGINEER],
+    "Cloud": [],
+}
+
+# Roles subject to the Deep Work Guardian (no Meetings on Tue/Thu)
+DEEP_WORK_ROLES = [models.RoleEnum.NETWORK_ENGINEER, models.RoleEnum.WIRELESS_ENGINEER]
+DEEP_WORK_DAYS = [models.DayEnum.TUE, models.DayEnum.THU]
+
+# Mirrors the frontend: unset capacity means 40h, unset KTLO means 0h
+effective_capacity = func.coalesce(models.Engineer.total_capacity, 40) - func.coalesce(models.Engineer.ktlo_tax, 0)
+
+# Projects whose requirements count as open demand
+DEMAND_STATUSES = [models.WorkflowStatusEnum.ACTIVE, models.WorkflowStatusEnum.APPROVED]
+
+# Projects that still consume capacity (not Complete / Cancelled)
+active_project = or_(
+    models.Project.workflow_status.is_(None),
+    models.Project.workflow_status.notin_([models.WorkflowStatusEnum.COMPLETE, models.WorkflowStatusEnum.CANCELLED])
+)
+
+
+def percent(part: int, whole: int, default: int = 0) -> int:
+    return round(part * 100 / whole) if whole else default
+
+# =============================================================================
+# Aggregates
+# =============================================================================
+
+def active_hours_by_engineer(db: Session):
+    """Subquery: hours on active projects per engineer, from engineer_load."""
+    return db.query(
+        models.EngineerLoad.engineer_id.label("engineer_id"),
+        func.sum(models.EngineerLoad.active_hours).label("hours")
+    ).group_by(models.EngineerLoad.engineer_id).subquery()
+
+
+def team_summary(db: Session, roles: Optional[List[models.RoleEnum]] = None) -> TeamSummary:
+    """Capacity, utilization and burnout count in a single grouped query."""
+    allocated = active_hours_by_engineer(db)
+    hours = func.coalesce(allocated.c.hours, 0)
+    query = db.query(
+        func.count(models.Engineer.id),
+        func.coalesce(func.sum(effective_capacity), 0),
+        func.coalesce(func.sum(hours), 0),
+        func.coalesce(func.sum(case((hours > effective_capacity, 1), else_=0)), 0)
+    ).outerjoin(allocated, allocated.c.engineer_id == models.Engineer.id)
+    if roles is not None:
+        query = query.filter(models.Engineer.role.in_(roles))
+
+    count, capacity, allocated_hours, over_capacity = query.one()
+    return TeamSummary(
+        engineer_count=count,
+        effective_capacity=capacity,
+        allocated_hours=allocated_hours,
+        utilization_pct=percent(allocated_hours, capacity),
+        over_capacity_engineers=over_capacity
+    )
+
+
+def engineer_capacity(db: Session, roles: Optional[List[models.RoleEnum]] = None) -> List[EngineerCapacity]:
+    """Effective capacity and active-project hours for each engineer."""
+    allocated = active_hours_by_engineer(db)
+    query = db.query(
+        models.Engineer.id,
+        models.Engineer.name,
+        models.Engineer.role,
+        effective_capacity,
+        func.coalesce(allocated.c.hours, 0)
+    ).outerjoin(allocated, allocated.c.engineer_id == models.Engineer.id)
+    if roles is not None:
+        query = query.filter(models.Engineer.role.in_(roles))
+
+    return [
+        EngineerCapacity(
+            engineer_id=engineer_id,
+            name=name,
+            role=role,
+            effective_capacity=capacity,
+            allocated_hours=hours,
+            utilization_pct=percent(hours, capacity),
+            over_capacity=hours > capacity
+        )
+        for engineer_id, name, role, capacity, hours in query.order_by(models.Engineer.name)
+    ]
+
+
+def deep_work_summary(db: Session) -> DeepWorkSummary:
+    """Share of field engineers with no Meetings booked on Tue/Thu."""
+    violators = db.query(models.EngineerLoad.engineer_id)\
+        .filter(models.EngineerLoad.category == models.CategoryEnum.MEETINGS)\
+        .filter(models.EngineerLoad.day.in_(DEEP_WORK_DAYS))\
+        .distinct()\
+        .subquery()
+
+    checked, violating = db.query(
+        func.count(models.Engineer.id),
+        func.count(violators.c.engineer_id)
+    ).outerjoin(violators, violators.c.engineer_id == models.Engineer.id)\
+     .filter(models.Engineer.role.in_(DEEP_WORK_ROLES))\
+     .one()
+
+    compliant = checked - violating
+    return DeepWorkSummary(
+        checked_engineers=checked,
+        compliant_engineers=compliant,
+        compliance_pct=percent(compliant, checked, default=100)
+    )
+
+
+def deep_work_report(db: Session, roles: Optional[List[models.RoleEnum]] = None) -> DeepWorkReport:
+    """
+    Deep Work compliance and meeting load for every engineer in `roles`
+    (default: the Deep Work roles), from one grouped query over engineer_load.
+    """
+    load = models.EngineerLoad
+    is_meeting = load.category == models.CategoryEnum.MEETINGS
+    on_protected_day = is_meeting & load.day.in_(DEEP_WORK_DAYS)
+    rows = db.query(
+        models.Engineer.id,
+        models.Engineer.name,
+        models.Engineer.role,
+        func.coalesce(func.sum(load.hours), 0),
+        func.coalesce(func.sum(case((is_meeting, load.hours), else_=0)), 0),
+        func.coalesce(func.sum(case((on_protected_day, load.hours), else_=0)), 0),
+        func.coalesce(func.sum(case((on_protected_day, load.allocation_count), else_=0)), 0)
+    ).outerjoin(load, load.engineer_id == models.Engineer.id)\
+     .filter(models.Engineer.role.in_(roles or DEEP_WORK_ROLES))\
+     .group_by(models.Engineer.id)\
+     .order_by(models.Engineer.name)\
+     .all()
+
+    engineers = [
+        EngineerDeepWork(
+            engineer_id=engineer_id,
+            name=name,
+            role=role,
+            allocated_hours=allocated,
+            meeting_hours=meetings,
+            protected_day_meeting_hours=protected_hours,
+            protected_day_meetings=protected_count,
+            meeting_load_pct=percent(meetings, allocated),
+            compliant=protected_count == 0
+        )
+        for engineer_id, name, role, allocated, meetings, protected_hours, protected_count in rows
+    ]
+    compliant = sum(e.compliant for e in engineers)
+    allocated = sum(e.allocated_hours for e in engineers)
+    meetings = sum(e.meeting_hours for e in engineers)
+    return DeepWorkReport(
+        team=DeepWorkSummary(
+            checked_engineers=len(engineers),
+            compliant_engineers=compliant,
+            compliance_pct=percent(compliant, len(engineers), default=100)
+        ),
+        allocated_hours=allocated,
+        meeting_hours=meetings,
+        meeting_load_pct=percent(meetings, allocated),
+        engineers=engineers
+    )
+
+
+def lifecycle_counts(db: Session) -> Dict[str, int]:
+    counts = {status.value: 0 for status in models.WorkflowStatusEnum}
+    rows = db.query(models.Project.workflow_status, func.count(models.Project.id))\
+        .group_by(models.Project.workflow_status)
+    for status, count in rows:
+        key = status.value if status else models.WorkflowStatusEnum.DRAFT.value
+        counts[key] += count
+    return counts
+
+
+def demand_summary(db: Session) -> DemandSummary:
+    """Required vs allocated weekly hours on Active / Approved projects."""
+    open_projects = db.query(models.Project.id).filter(models.Project.workflow_status.in_(DEMAND_STATUSES))
+    required = db.query(func.coalesce(func.sum(models.ResourcingRequirement.hours_per_week), 0))\
+        .filter(models.ResourcingRequirement.project_id.in_(open_projects)).scalar()
+    allocated = db.query(func.coalesce(func.sum(models.Allocation.hours), 0))\
+        .filter(models.Allocation.project_id.in_(open_projects)).scalar()
+    return DemandSummary(
+        required_hours=required,
+        allocated_hours=allocated,
+        unassigned_hours=max(0, required - allocated),
+        demand_met_pct=percent(allocated, required, default=100)
+    )
+
+
+def device_summary(db: Session) -> DeviceSummary:
+    current, proposed = db.query(
+        func.coalesce(func.sum(models.ProjectDevice.current_qty), 0),
+        func.coalesce(func.sum(models.ProjectDevice.proposed_qty), 0)
+    ).one()
+    return DeviceSummary(current_qty=current, proposed_qty=proposed, net_change=proposed - current)
+
+
+def fiscal_impact(db: Session) -> Dict[str, int]:
+    """Device counts per fiscal year for Active/Complete projects (Phase 4 KPI)."""
+    rows = db.query(models.Project.fiscal_year, func.coalesce(func.sum(models.Project.device_count), 0))\
+        .filter(models.Project.fiscal_year.isnot(None))\
+        .filter(models.Project.workflow_status.in_([models.WorkflowStatusEnum.ACTIVE, models.WorkflowStatusEnum.COMPLETE]))\
+        .group_by(models.Project.fiscal_year)\
+        .order_by(models.Project.fiscal_year)
+    return {fy: total for fy, total in rows if fy}
+
+
+def fiscal_refresh(db: Session) -> Dict[str, Dict[str, RefreshProgress]]:
+    """Planned and completed device refreshes per fiscal year and device type."""
+    proposed = func.coalesce(models.ProjectDevice.proposed_qty, 0)
+    rows = db.query(
+        models.Project.fiscal_year,
+        models.ProjectDevice.device_type,
+        func.sum(proposed),
+        func.sum(case((models.Project.workflow_status == models.WorkflowStatusEnum.COMPLETE, proposed), else_=0))
+    ).join(models.Project, models.Project.id == models.ProjectDevice.project_id)\
+     .filter(models.Project.fiscal_year.isnot(None))\
+     .group_by(models.Project.fiscal_year, models.ProjectDevice.device_type)
+    progress: Dict[str, Dict[str, RefreshProgress]] = {}
+    for fy, device_type, planned, completed in rows:
+        progress.setdefault(fy, {})[device_type] = RefreshProgress(planned=planned, completed=completed)
+    return progress
+
+
+def dashboard_summary(db: Session, team: Optional[str] = None) -> DashboardSummary:
+    return DashboardSummary(
+        team=team_summary(db, TEAM_ROLES.get(team)),
+        deep_work=deep_work_summary(db),
+        lifecycle=lifecycle_counts(db),
+        demand=demand_summary(db),
+        devices=device_summary(db),
+        fiscal_impact=fiscal_impact(db),
+        fiscal_refresh=fiscal_refresh(db)
+    )
+
+# =============================================================================
+# Router
+# =============================================================================
+
+dashboard_router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
+
+@dashboard_router.get("/summary", response_model=DashboardSummary)
+def get_dashboard_summary(team: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Dashboard KPI cards in one small payload.
+    Optional team filter for the capacity figures: "Network", "Wireless" or
+    "Cloud" (default: All Teams).
+    """
+    return dashboard_summary(db, team)
+
+
+analytics_router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+@analytics_router.get("/capacity", response_model=List[EngineerCapacity])
+def get_engineer_capacity(
+    role: Optional[List[models.RoleEnum]] = Query(None, description="Roles to include (repeatable); default all"),
+    team: Optional[str] = Query(None, description='Dashboard team filter: "Network" or "Wireless"'),
+    db: Session = Depends(get_db)
+):
+    """Per-engineer effective capacity, hours on active projects and burnout flag."""
+    return engineer_capacity(db, role or TEAM_ROLES.get(team))
+
+@analytics_router.get("/deep-work", response_model=DeepWorkReport)
+def get_deep_work(
+    role: Optional[List[models.RoleEnum]] = Query(None, description="Roles to check (repeatable); default Network and Wireless Engineers"),
+    team: Optional[str] = Query(None, description='Dashboard team filter: "Network" or "Wireless"'),
+    per_engineer: bool = Query(True, description="Include the per-engineer breakdown"),
+    db: Session = Depends(get_db)
+):
+    """
+    Deep Work Guardian: engineers with no Meetings on Tue/Thu, plus meeting load,
+    for the team and (unless per_engineer=false) per engineer.
+    """
+    report = deep_work_report(db, role or TEAM_ROLES.get(team))
+    if not per_engineer:
+        report.engineers = []
+    return report
@@ -0,0 +1,134 @@
+"""
+Async read routes for goodenough.to | Planning
+
+Enabled with DB_MODE=async (see database.py). These `async def` routes serve the
+read-heavy endpoints on the aiosqlite engine so a burst of dashboard loads does
+not exhaust the threadpool. They reuse the sync query functions through
+AsyncSession.run_sync, so filters, pagination and staffing metrics stay identical.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+
+import models, schemas
+import queries
+from analytics import (
+    DashboardSummary, DeepWorkReport, EngineerCapacity, TEAM_ROLES,
+    dashboard_summary, deep_work_report, engineer_capacity
+)
+from database import get_async_db
+from pagination import PageParams, parse_fields, page_response
+from etags import async_etag_for
+
+# =============================================================================
+# Router
+# =============================================================================
+
+async_read_router = APIRouter(tags=["Async Reads"])
+
+@async_read_router.get("/api/requirements", response_model=List[schemas.ResourcingRequirement], dependencies=[Depends(async_etag_for("resourcing_requirements"))])
+async def get_all_requirements(
+    request: Request,
+    response: Response,
+    project_id: Optional[UUID] = None,
+    role: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    fields = parse_fields(page.fields, schemas.ResourcingRequirement)
+    rows, next_cursor = await db.run_sync(queries.list_requirements, page, project_id, role)
+    return page_response(rows, next_cursor, schemas.ResourcingRequirement, fields, request, response)
+
+@async_read_router.get("/api/engineers", response_model=List[schemas.Engineer], dependencies=[Depends(async_etag_for("engineers"))])
+async def get_engineers(
+    request: Request,
+    response: Response,
+    role: Optional[models.RoleEnum] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    fields = parse_fields(page.fields, schemas.Engineer)
+    rows, next_cursor = await db.run_sync(queries.list_engineers, page, role)
+    return page_response(rows, next_cursor, schemas.Engineer, fields, request, response)
+
+@async_read_router.get("/api/engineers/{engineer_id}", response_model=schemas.Engineer)
+async def get_engineer(engineer_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    db_engineer = await db.scalar(select(models.Engineer).where(models.Engineer.id == str(engineer_id)))
+    if not db_engineer:
+        raise HTTPException(status_code=404, detail="Engineer not found")
+    return db_engineer
+
+@async_read_router.get("/api/projects", response_model=List[schemas.Project], dependencies=[Depends(async_etag_for(*queries.PROJECT_TABLES))])
+async def get_projects(
+    request: Request,
+    response: Response,
+    fiscal_year: Optional[str] = None,
+    workflow_status: Optional[models.WorkflowStatusEnum] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    fields = parse_fields(page.fields, schemas.Project)
+    db_projects, next_cursor = await db.run_sync(queries.list_projects, page, fields, fiscal_year, workflow_status)
+    return page_response(db_projects, next_cursor, schemas.Project, fields, request, response)
+
+@async_read_router.get("/api/projects/{project_id}", response_model=schemas.Project)
+async def get_project(project_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    db_project = await db.scalar(select(models.Project).where(models.Project.id == str(project_id)))
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return db_project
+
+@async_read_router.get("/api/allocations", response_model=List[schemas.Allocation], dependencies=[Depends(async_etag_for("allocations"))])
+async def get_all_allocations(
+    request: Request,
+    response: Response,
+    engineer_id: Optional[UUID] = None,
+    project_id: Optional[UUID] = None,
+    category: Optional[models.CategoryEnum] = None,
+    day: Optional[models.DayEnum] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    fields = parse_fields(page.fields, schemas.Allocation)
+    rows, next_cursor = await db.run_sync(queries.list_allocations, page, engineer_id, project_id, category, day)
+    return page_response(rows, next_cursor, schemas.Allocation, fields, request, response)
+
+@async_read_router.get("/api/devices", response_model=List[schemas.ProjectDevice], dependencies=[Depends(async_etag_for("project_devices"))])
+async def get_all_devices(
+    request: Request,
+    response: Response,
+    project_id: Optional[UUID] = None,
+    device_type: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    fields = parse_fields(page.fields, schemas.ProjectDevice)
+    rows, next_cursor = await db.run_sync(queries.list_devices, page, project_id, device_type)
+    return page_response(rows, next_cursor, schemas.ProjectDevice, fields, request, response)
+
+@async_read_router.get("/api/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(team: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(dashboard_summary, team)
+
+@async_read_router.get("/api/analytics/capacity", response_model=List[EngineerCapacity])
+async def get_engineer_capacity(
+    role: Optional[List[models.RoleEnum]] = Query(None),
+    team: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(engineer_capacity, role or TEAM_ROLES.get(team))
+
+@async_read_router.get("/api/analytics/deep-work", response_model=DeepWorkReport)
+async def get_deep_work(
+    role: Optional[List[models.RoleEnum]] = Query(None),
+    team: Optional[str] = None,
+    per_engineer: bool = True,
+    db: AsyncSession = Depends(get_async_db)
+):
+    report = await db.run_sync(deep_work_report, role or TEAM_ROLES.get(team))
+    if not per_engineer:
+        report.engineers = []
+    return report
@@ -0,0 +1,168 @@
+"""
+Audit log archival for goodenough.to | Planning
+
+Audit rows older than AUDIT_RETENTION_DAYS are moved out of the hot database
+into one gzip-compressed JSONL file per month (audit_YYYY-MM.jsonl.gz under
+AUDIT_ARCHIVE_DIR). Each run appends a new gzip member, which gzip readers
+concatenate transparently. Rows are written and fsynced before they are
+deleted from audit_logs, so a crash in between can only duplicate rows (reads
+skip the copies), never lose them.
+
+The per-day audit_log_counts summary is left untouched, so counts keep
+including archived events. query() lets audit_log.py page through archived
+rows with the same filters and (timestamp, id) ordering as the live table, and
+count() counts them for filters the summary does not cover.
+"""
+
+import gzip
+import json
+import os
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete
+
+import models
+from database import engine, DATA_DIR
+from scheduler import PeriodicTask
+
+AUDIT_RETENTION_DAYS = int(os.environ.get("AUDIT_RETENTION_DAYS", "90"))
+AUDIT_ARCHIVE_DIR = os.environ.get("AUDIT_ARCHIVE_DIR", os.path.join(DATA_DIR, "audit_archive"))
+AUDIT_ARCHIVE_INTERVAL_HOURS = float(os.environ.get("AUDIT_ARCHIVE_INTERVAL_HOURS", "24"))
+AUDIT_ARCHIVE_BATCH_SIZE = 5000
+
+# =============================================================================
+# Writing
+# =============================================================================
+
+def archive_path(month: str) -> str:
+    return os.path.join(AUDIT_ARCHIVE_DIR, f"audit_{month}.jsonl.gz")
+
+
+def _append(month: str, rows: List[dict]):
+    os.makedirs(AUDIT_ARCHIVE_DIR, exist_ok=True)
+    data = "".join(json.dumps(row, default=str) + "\n" for row in rows).encode()
+    with open(archive_path(month), "ab") as f:
+        f.write(gzip.compress(data, compresslevel=6))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def archive_audit_logs(older_than_days: int = AUDIT_RETENTION_DAYS) -> Dict[str, int]:
+    """
+    Move audit rows older than the cutoff into the monthly archives.
+    Returns {month: rows archived}.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    table = models.AuditLog.__table__
+    archived: Dict[str, int] = {}
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                table.select()
+                .where(table.c.timestamp < cutoff)
+                .order_by(table.c.timestamp, table.c.id)
+                .limit(AUDIT_ARCHIVE_BATCH_SIZE)
+            ).mappings().all()
+            if not rows:
+                break
+
+            by_month: Dict[str, List[dict]] = {}
+            for row in rows:
+                by_month.setdefault(row["timestamp"].strftime("%Y-%m"), []).append(dict(row))
+            for month, month_rows in by_month.items():
+                _append(month, month_rows)
+                archived[month] = archived.get(month, 0) + len(month_rows)
+
+            conn.execute(delete(table).where(table.c.id.in_([row["id"] for row in rows])))
+    return archived
+
+# =============================================================================
+# Reading
+# =============================================================================
+
+def archived_months() -> List[str]:
+    """Months with an archive file, newest first."""
+    if not os.path.isdir(AUDIT_ARCHIVE_DIR):
+        return []
+    months = [f[len("audit_"):-len(".jsonl.gz")] for f in os.listdir(AUDIT_ARCHIVE_DIR)
+              if f.startswith("audit_") and f.endswith(".jsonl.gz")]
+    return sorted(months, reverse=True)
+
+
+def _scan(month: str, stop: Optional[Tuple[datetime, str]] = None) -> Iterator[dict]:
+    """
+    Stream one month's rows oldest first, up to the (timestamp, id) position `stop`.
+    Runs archive the oldest rows first, so a file is in (timestamp, id) order; a
+    row that is not newer than the last one is a copy from an interrupted run.
+    """
+    last = None
+    with gzip.open(archive_path(month), "rt") as f:
+        for line in f:
+            row = json.loads(line)
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+            key = (row["timestamp"], row["id"])
+            if last is not None and key <= last:
+                continue
+            if stop and key >= stop:
+                return
+            last = key
+            yield row
+
+
+def _matching(month: str, before, since, until, filters) -> Iterator[dict]:
+    """Rows of one month strictly before `before`, in [since, until) and matching `filters`, oldest first."""
+    stops = [position for position in (before, (until, "") if until else None) if position]
+    stop = min(stops) if stops else None
+    for row in _scan(month, stop):
+        if since and row["timestamp"] < since:
+            continue
+        if all(row.get(column) == value for column, value in filters.items()):
+            yield row
+
+
+def query(
+    limit: int,
+    before: Optional[Tuple[datetime, str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    **filters
+) -> List[dict]:
+    """
+    Archived rows newest first, strictly before the (timestamp, id) position
+    `before`, matching the equality `filters` (column=value) and [since, until).
+    Months are streamed, keeping only the newest rows that still fit on the page.
+    """
+    result: List[dict] = []
+    for month in _months(since, until, before):
+        newest = deque(_matching(month, before, since, until, filters), maxlen=limit - len(result))
+        result.extend(reversed(newest))
+        if len(result) == limit:
+            break
+    return result
+
+
+def count(since: Optional[datetime] = None, until: Optional[datetime] = None, **filters) -> int:
+    """Number of archived rows matching the equality `filters` and [since, until)."""
+    return sum(1 for month in _months(since, until) for _ in _matching(month, None, since, until, filters))
+
+
+def _months(since, until, before=None) -> Iterator[str]:
+    """Archived months that can hold rows in [since, until) before `before`, newest first."""
+    for month in archived_months():
+        month_start = datetime.strptime(month, "%Y-%m")
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        if since and month_end <= since:
+            return  # this and every older month ends before `since`
+        if (until and month_start >= until) or (before and month_start > before[0]):
+            continue
+        yield month
+
+# =============================================================================
+# Scheduler
+# =============================================================================
+
+# Runs every AUDIT_ARCHIVE_INTERVAL_HOURS while the app is up (see main.py)
+audit_archiver = PeriodicTask("audit-archiver", AUDIT_ARCHIVE_INTERVAL_HOURS, archive_audit_logs)
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import func, tuple_
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Optional, Tuple
+from datetime import date, datetime, time
+import base64
+import binascii
 import json
 
 import models
 from database import get_db
 from auth import get_current_user
+from pagination import page_response
+import audit_archive
 
 # =============================================================================
 # Schemas
@@ -26,6 +31,32 @@ class AuditLogEntry(BaseModel):
     class Config:
         from_attributes = True
 
+class AuditLogCount(BaseModel):
+    count: int
+
+class AuditArchiveResult(BaseModel):
+    archived: int
+    months: dict
+
+# =============================================================================
+# Keyset Cursor
+# =============================================================================
+
+AUDIT_ROLES = ["admin", "resource_manager"]
+MAX_AUDIT_PAGE_SIZE = 1000
+
+def encode_cursor(entry: models.AuditLog) -> str:
+    """Opaque cursor for the (timestamp, id) position of the last row on a page."""
+    raw = f"{entry.timestamp.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        timestamp, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(timestamp), entry_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 # =============================================================================
 # Router
 # =============================================================================
@@ -34,19 +65,130 @@ audit_router = APIRouter(prefix="/api/audit", tags=["Audit"])
 
 @audit_router.get("/logs", response_model=List[AuditLogEntry])
 def get_audit_logs(
-    limit: int = 100,
-    offset: int = 0,
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_AUDIT_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
     resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    username: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    """ Get recent audit logs (Admin/Resource Manager only) """
-    if current_user.role not in ["admin", "resource_manager"]:
+    """
+    Get recent audit logs, newest first (Admin/Resource Manager only).
+    Keyset-paginated on (timestamp, id): follow the X-Next-Cursor header.
+    Optional filters: resource_type, resource_id, username, action, since/until (timestamps).
+    Once the live table is exhausted, paging continues into the monthly archives.
+    """
+    if current_user is None or current_user.role not in AUDIT_ROLES:
         return []
         
     query = db.query(models.AuditLog)
     
     if resource_type:
         query = query.filter(models.AuditLog.resource_type == resource_type)
-        
-    return query.order_by(models.AuditLog.timestamp.desc()).limit(limit).offset(offset).all()
+    if resource_id:
+        query = query.filter(models.AuditLog.resource_id == resource_id)
+    if username:
+        query = query.filter(models.AuditLog.username == username)
+    if action:
+        query = query.filter(models.AuditLog.action == action)
+    if since:
+        query = query.filter(models.AuditLog.timestamp >= since)
+    if until:
+        query = query.filter(models.AuditLog.timestamp < until)
+    before = decode_cursor(cursor) if cursor else None
+    if before:
+        query = query.filter(tuple_(models.AuditLog.timestamp, models.AuditLog.id) < before)
+
+    rows = query.order_by(models.AuditLog.timestamp.desc(), models.AuditLog.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        # Archived rows are all older than live ones: continue from the last position
+        filters = {
+            column: value for column, value in [
+                ("resource_type", resource_type), ("resource_id", resource_id),
+                ("username", username), ("action", action)
+            ] if value
+        }
+        if rows:
+            before = (rows[-1].timestamp, rows[-1].id)
+        archived = audit_archive.query(limit + 1 - len(rows), before, since, until, **filters)
+        rows += [AuditLogEntry(**row) for row in archived]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    return page_response(rows, next_cursor, AuditLogEntry, None, request, response)
+
+@audit_router.get("/logs/count", response_model=AuditLogCount)
+def count_audit_logs(
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    username: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Number of audit events matching the filters (Admin/Resource Manager only).
+    Served from the per-day audit_log_counts summary, so since/until are whole
+    days (until is exclusive). The summary has no resource_id: with that filter
+    the live table and the archives are counted instead.
+    """
+    if current_user is None or current_user.role not in AUDIT_ROLES:
+        raise HTTPException(status_code=403, detail=f"Requires one of: {', '.join(AUDIT_ROLES)}")
+
+    if resource_id:
+        return AuditLogCount(count=_count_resource(db, resource_id, resource_type, username, action, since, until))
+
+    query = db.query(func.coalesce(func.sum(models.AuditLogCount.count), 0))
+    if resource_type:
+        query = query.filter(models.AuditLogCount.resource_type == resource_type)
+    if username:
+        query = query.filter(models.AuditLogCount.username == username)
+    if action:
+        query = query.filter(models.AuditLogCount.action == action)
+    if since:
+        query = query.filter(models.AuditLogCount.day >= since)
+    if until:
+        query = query.filter(models.AuditLogCount.day < until)
+    return AuditLogCount(count=query.scalar())
+
+def _count_resource(db: Session, resource_id: str, resource_type, username, action, since, until) -> int:
+    """Live count for one resource (ix_audit_logs_resource_id_timestamp) plus its archived rows."""
+    since = datetime.combine(since, time.min) if since else None
+    until = datetime.combine(until, time.min) if until else None
+    filters = {
+        column: value for column, value in [
+            ("resource_type", resource_type), ("resource_id", resource_id),
+            ("username", username), ("action", action)
+        ] if value
+    }
+    query = db.query(func.count(models.AuditLog.id))
+    for column, value in filters.items():
+        query = query.filter(getattr(models.AuditLog, column) == value)
+    if since:
+        query = query.filter(models.AuditLog.timestamp >= since)
+    if until:
+        query = query.filter(models.AuditLog.timestamp < until)
+    return query.scalar() + audit_archive.count(since, until, **filters)
+
+@audit_router.post("/archive", response_model=AuditArchiveResult)
+def archive_audit_logs(
+    older_than_days: int = Query(audit_archive.AUDIT_RETENTION_DAYS, ge=1),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Move audit events older than `older_than_days` into the monthly archives (Admin only).
+    Runs automatically every AUDIT_ARCHIVE_INTERVAL_HOURS as well.
+    """
+    if current_user is None or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Requires admin")
+    months = audit_archive.archive_audit_logs(older_than_days)
+    return AuditArchiveResult(archived=sum(months.values()), months=months)
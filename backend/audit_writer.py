@@ -0,0 +1,152 @@
+"""
+Batched audit log writer for goodenough.to | Planning
+
+record_audit() hands events to this writer instead of committing each one on
+the request's session. A background thread inserts them in batches, when
+AUDIT_BATCH_SIZE events are waiting or AUDIT_FLUSH_INTERVAL seconds have passed,
+so an audited request pays for one commit (its own) instead of two.
+
+The writer is started and stopped with the app (see main.py); stop() drains the
+queue before returning, so a clean shutdown loses nothing. While the writer is
+not running (scripts, one-off tools) record_audit writes synchronously.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+import models
+from database import engine
+
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "0.5"))
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_WRITE_RETRIES = 3
+
+_STOP = object()
+
+
+def insert_audit_rows(conn, rows: List[dict]):
+    """
+    Insert audit_logs rows and add them to the per-day audit_log_counts summary,
+    on the caller's connection (same transaction).
+    """
+    conn.execute(insert(models.AuditLog), rows)
+
+    counts = Counter((row["timestamp"].date(), row["action"], row["resource_type"], row["username"] or "") for row in rows)
+    upsert = sqlite_insert(models.AuditLogCount)
+    conn.execute(
+        upsert.on_conflict_do_update(
+            index_elements=["day", "action", "resource_type", "username"],
+            set_={"count": models.AuditLogCount.count + upsert.excluded["count"]}
+        ),
+        [
+            {"day": day, "action": action, "resource_type": resource_type, "username": username, "count": n}
+            for (day, action, resource_type, username), n in counts.items()
+        ]
+    )
+
+
+class AuditWriter:
+    def __init__(self, batch_size: int = AUDIT_BATCH_SIZE, interval: float = AUDIT_FLUSH_INTERVAL,
+                 max_queue: int = AUDIT_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Write everything still queued, then stop the worker."""
+        if self.running:
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._thread = None
+
+    def submit(self, row: dict) -> bool:
+        """Queue one audit_logs row. Returns False if the writer cannot take it (caller writes it)."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every event queued so far has been written."""
+        if self.running:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait(timeout)
+
+    def _run(self):
+        batch: List[dict] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, dict):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.interval
+                if len(batch) < self.batch_size:
+                    continue
+
+            # Size reached, interval elapsed, flush() barrier or stop
+            if batch:
+                self._write(batch)
+                batch = []
+            deadline = None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                return
+
+    def _write(self, rows: List[dict]):
+        for attempt in range(1, AUDIT_WRITE_RETRIES + 1):
+            try:
+                with engine.begin() as conn:
+                    insert_audit_rows(conn, rows)
+                self.written += len(rows)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == AUDIT_WRITE_RETRIES:
+                    self.failed += len(rows)
+                    print(f"FAILED TO RECORD AUDIT: {len(rows)} event(s) dropped: {e}")
+                    return
+                time.sleep(0.1 * attempt)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed
+        }
+
+
+audit_writer = AuditWriter()
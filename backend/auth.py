@@ -7,6 +7,9 @@ This module provides:
 - JWT token generation and validation
 - Login/Register/Me endpoints
 - Role-based access control (RBAC)
+- Password hashing on a small dedicated pool with backpressure
+- An in-process cache of verified tokens, so authenticated requests skip the
+  signature check and user lookup for tokens seen recently
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
@@ -16,9 +19,13 @@ from sqlalchemy import Column, String, DateTime
 from pydantic import BaseModel
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import jwt
 import uuid
 import os
+import threading
+import time
 
 from database import get_db
 from models import Base, User  # Import User from models.py
@@ -32,12 +39,25 @@ SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "dev-secret-key-change-in-producti
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Existing hashes keep verifying when the work factor changes and
+# are upgraded on the user's next login.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt runs on its own pool so a login storm cannot take every request thread and CPU.
+# Beyond workers + queue, logins are turned away with 429 instead of piling up.
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", "16"))
+PASSWORD_HASH_RETRY_AFTER = 1
 
 # JWT Bearer token scheme
 security = HTTPBearer(auto_error=False)
 
+# Verified-token cache. Each process has its own cache: a role change made through
+# another worker is picked up once the entry expires, so keep the TTL short.
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_CACHE_TTL_SECONDS", "60"))
+
 
 # =============================================================================
 # Pydantic Schemas
@@ -66,20 +86,56 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     user: UserResponse
 
+# =============================================================================
+# Password Hashing Pool
+# =============================================================================
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt on `workers` dedicated threads (bcrypt releases the GIL), with at
+    most `queue_size` further calls waiting. Calls beyond that fail fast with 429.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_size: int = PASSWORD_HASH_QUEUE):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self.completed = 0
+        self.rejected = 0
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many sign-in requests, please retry",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)}
+            )
+        try:
+            result = self._executor.submit(fn, *args).result()
+            self.completed += 1
+            return result
+        finally:
+            self._slots.release()
+
+
+password_pool = PasswordHasherPool()
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt. Truncates to 72 bytes (bcrypt limit)."""
+def _truncate(password: str) -> str:
     # bcrypt has a 72-byte limit - truncate to avoid errors
     password_bytes = password.encode('utf-8')[:72]
-    return pwd_context.hash(password_bytes.decode('utf-8', errors='ignore'))
+    return password_bytes.decode('utf-8', errors='ignore')
+
+def hash_password(password: str) -> str:
+    """Hash a password using bcrypt. Truncates to 72 bytes (bcrypt limit)."""
+    return password_pool.run(pwd_context.hash, _truncate(password))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash. Truncates to 72 bytes (bcrypt limit)."""
-    password_bytes = plain_password.encode('utf-8')[:72]
-    return pwd_context.verify(password_bytes.decode('utf-8', errors='ignore'), hashed_password)
+    return password_pool.run(pwd_context.verify, _truncate(plain_password), hashed_password)
 
 def create_access_token(user_id: str, username: str, role: str) -> str:
     """Create a JWT access token."""
@@ -102,6 +158,79 @@ def decode_token(token: str) -> dict:
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+# =============================================================================
+# Token Verification Cache
+# =============================================================================
+
+CACHED_USER_FIELDS = ("id", "username", "role", "created_at")
+
+class TokenCache:
+    """
+    Bounded LRU of token -> user fields, each entry living at most ttl seconds
+    (and never past the token's own expiry). Hits return a fresh detached User.
+    """
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return User(**entry[1])
+
+    def put(self, token: str, user: User, token_exp: float):
+        if self.maxsize <= 0:
+            return
+        # Never outlive the token itself (exp is a wall-clock timestamp)
+        ttl = min(self.ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        fields = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+        with self._lock:
+            self._entries[token] = (time.monotonic() + ttl, fields)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str):
+        with self._lock:
+            for token in [t for t, (_, fields) in self._entries.items() if fields["id"] == user_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0
+            }
+
+
+token_cache = TokenCache()
+
 # =============================================================================
 # Dependency: Get Current User
 # =============================================================================
@@ -118,12 +247,17 @@ def get_current_user(
         return None
     
     token = credentials.credentials
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     payload = decode_token(token)
     
     user = db.query(User).filter(User.id == payload["sub"]).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     
+    token_cache.put(token, user, payload["exp"])
     return user
 
 def require_role(*allowed_roles: str):
@@ -214,6 +348,11 @@ def login(credentials: UserLogin, request: Request, db: Session = Depends(get_db
     
     if not user or not verify_password(credentials.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    # Re-hash with the current work factor (BCRYPT_ROUNDS) if it has changed
+    if pwd_context.needs_update(user.password_hash):
+        user.password_hash = hash_password(credentials.password)
+        db.commit()
     
     token = create_access_token(user.id, user.username, user.role)
     
@@ -245,6 +384,13 @@ def get_users(
     users = db.query(User).all()
     return [UserResponse.model_validate(u) for u in users]
 
+@auth_router.get("/cache-stats")
+def get_token_cache_stats(current_user: User = Depends(require_role("admin"))):
+    """
+    Token verification cache counters (Admin only).
+    """
+    return token_cache.stats()
+
 class UserRoleUpdate(BaseModel):
     role: str
 
@@ -271,6 +417,8 @@ def update_user_role(
     user.role = role_update.role
     db.commit()
     db.refresh(user)
+    # Tokens already verified for this user must not keep the old role
+    token_cache.invalidate_user(user.id)
     
     # Record Audit
     record_audit(db, "UPDATE_ROLE", "User", user.id, {"username": user.username, "old_role": old_role, "new_role": user.role}, current_user, request)
@@ -1,15 +1,103 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 import os
 
 # Use /app/data in Docker (volume mount) or local path for development
 DATA_DIR = os.environ.get("DATA_DIR", "./")
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(DATA_DIR, 'resource_manager.db')}"
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# DB_MODE=async serves the read-heavy endpoints from async routes on an aiosqlite
+# engine instead of tying up a threadpool worker per request. Writes stay sync.
+DB_MODE = os.environ.get("DB_MODE", "sync").lower()
+ASYNC_DB_ENABLED = DB_MODE == "async"
+
+# SQLite tuning, applied to every new connection. Override via environment.
+# WAL lets readers run alongside a writer; NORMAL only fsyncs at checkpoints in WAL mode.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -int(os.environ.get("SQLITE_CACHE_SIZE_KB", "65536")),  # negative = KiB
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# Connection pool for file-backed SQLite. Overflow is unbounded by default (-1): get_db()
+# closes its session in the threadpool, so a capped pool can deadlock under bursts when every
+# worker thread is waiting for a connection held by a request that is waiting for a thread.
+SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "20"))
+SQLITE_MAX_OVERFLOW = int(os.environ.get("SQLITE_MAX_OVERFLOW", "-1"))
+
+
+def _is_memory_url(url: str) -> bool:
+    return url.split("://", 1)[1] in ("", "/:memory:")
+
+
+def _listen_for_pragmas(sync_engine, pragmas: dict, in_memory: bool):
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if in_memory and name in ("journal_mode", "mmap_size"):
+                    continue
+                if name == "journal_mode":
+                    # Persistent per file; switching needs a lock, so only do it once
+                    cursor.execute("PRAGMA journal_mode")
+                    if cursor.fetchone()[0].lower() == str(value).lower():
+                        continue
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_sqlite_engine(url: str = SQLALCHEMY_DATABASE_URL, **pragma_overrides):
+    """
+    Create a SQLite engine with the production pragmas applied on connect.
+    In-memory databases share a single connection (StaticPool); file databases
+    get a QueuePool so connections (and their page cache) are reused across requests.
+    """
+    pragmas = {**SQLITE_PRAGMAS, **pragma_overrides}
+    in_memory = _is_memory_url(url)
+
+    pool_args = {"poolclass": StaticPool} if in_memory else {
+        "poolclass": QueuePool,
+        "pool_size": SQLITE_POOL_SIZE,
+        "max_overflow": SQLITE_MAX_OVERFLOW,
+    }
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": pragmas["busy_timeout"] / 1000},
+        **pool_args
+    )
+    _listen_for_pragmas(new_engine, pragmas, in_memory)
+    return new_engine
+
+
+def create_async_sqlite_engine(url: str = ASYNC_DATABASE_URL, **pragma_overrides):
+    """Async (aiosqlite) counterpart of create_sqlite_engine() with the same pragmas."""
+    pragmas = {**SQLITE_PRAGMAS, **pragma_overrides}
+    in_memory = _is_memory_url(url)
+
+    pool_args = {"poolclass": StaticPool} if in_memory else {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": SQLITE_POOL_SIZE,
+        "max_overflow": SQLITE_MAX_OVERFLOW,
+    }
+    new_engine = create_async_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": pragmas["busy_timeout"] / 1000},
+        **pool_args
+    )
+    _listen_for_pragmas(new_engine.sync_engine, pragmas, in_memory)
+    return new_engine
+
+
+engine = create_sqlite_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -18,3 +106,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async engine is only built in async mode so the sync deployment does not need aiosqlite
+async_engine = create_async_sqlite_engine() if ASYNC_DB_ENABLED else None
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False) if async_engine else None
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,63 @@
+"""
+Conditional GET for goodenough.to | Planning list endpoints
+
+A list response only changes when one of the tables it reads is written, so
+its strong ETag is derived from those tables' write versions (table_versions,
+bumped by triggers in the writing transaction) plus the request path and
+query string. Add the dependency to a route:
+
+    @app.get("/api/engineers", dependencies=[Depends(etag_for("engineers"))])
+
+A request whose If-None-Match matches gets 304 straight from the dependency,
+before the route reads anything else. Responses carry `Cache-Control: no-cache`
+so browsers revalidate with If-None-Match on every fetch() by themselves.
+"""
+
+import hashlib
+from typing import Dict, Iterable
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from add_table_versions_migration import EPOCH
+from database import get_db, get_async_db
+
+CACHE_CONTROL = "no-cache"
+
+_VERSIONS = text("SELECT table_name, version FROM table_versions")
+
+
+def compute_etag(request: Request, versions: Dict[str, int], tables: Iterable[str]) -> str:
+    key = ",".join(f"{table}={versions.get(table, 0)}" for table in (EPOCH, *tables))
+    digest = hashlib.sha1(f"{key}|{request.url.path}?{request.url.query}".encode()).hexdigest()
+    return f'"{digest[:24]}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/"x" matches "x"."""
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _conditional(request: Request, versions: Dict[str, int], tables: Iterable[str]):
+    etag = compute_etag(request, versions, tables)
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    # page_response() adds these to the 200 response
+    request.state.etag = etag
+
+
+def etag_for(*tables: str):
+    """Route dependency: ETag / 304 handling for a response built from `tables`."""
+    def dependency(request: Request, db: Session = Depends(get_db)):
+        _conditional(request, dict(db.execute(_VERSIONS).all()), tables)
+    return dependency
+
+
+def async_etag_for(*tables: str):
+    """etag_for() for the DB_MODE=async routes."""
+    async def dependency(request: Request, db: AsyncSession = Depends(get_async_db)):
+        _conditional(request, dict((await db.execute(_VERSIONS)).all()), tables)
+    return dependency
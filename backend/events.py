@@ -0,0 +1,207 @@
+"""
+Live change events for goodenough.to | Planning
+
+GET /api/events is a Server-Sent Events stream. Routes publish a compact event
+after their commit succeeds:
+
+    event: allocation.updated
+    data: {"id": "...", "project_id": "...", "engineer_id": "...", "hours": 8}
+
+POST /api/allocations/batch publishes a single allocation.batch event with
+counts. Clients treat events as hints and pull the rows through /api/sync.
+
+The broker is in-process, with no external message broker: each worker fans
+out to its own subscribers. Every subscriber gets a bounded queue of
+EVENTS_QUEUE_SIZE messages. If a client falls that far behind, it is evicted:
+it gets a final `evicted` event and the stream closes, so it reconnects and
+resyncs instead of holding memory. A snapshot restore ends every stream with a
+`reconnect` event for the same reason. Idle streams get a keepalive comment
+every EVENTS_HEARTBEAT_SECONDS. Nothing here touches the database, so the
+stream is exempt from the maintenance gate.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import threading
+from typing import Dict, NamedTuple, Optional, Set
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get("EVENTS_MAX_SUBSCRIBERS", "1000"))
+# Client reconnect delay sent with the stream, in milliseconds
+EVENTS_RETRY_MS = 3000
+
+
+class _Close(NamedTuple):
+    """Queued last: end the stream after sending `message` (if any)."""
+    message: Optional[str] = None
+
+
+_EVICTED = _Close("event: evicted\ndata: {}\n\n")
+
+
+class Subscriber:
+    def __init__(self, max_queue: int):
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+
+
+class EventBroker:
+    """Fan-out of published events to subscribers on any event loop, from any thread."""
+
+    def __init__(self, max_queue: int = EVENTS_QUEUE_SIZE, max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        # Grouped by loop so a publish wakes each loop once, not once per subscriber
+        self._subscribers: Dict[asyncio.AbstractEventLoop, Set[Subscriber]] = {}
+        self.published = 0
+        self.evicted = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self) -> Optional[Subscriber]:
+        """Register a subscriber on the running loop; None when the worker is full."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if sum(len(subs) for subs in self._subscribers.values()) >= self.max_subscribers:
+                return None
+            subscriber = Subscriber(self.max_queue)
+            self._subscribers.setdefault(loop, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            for loop, subs in list(self._subscribers.items()):
+                subs.discard(subscriber)
+                if not subs:
+                    del self._subscribers[loop]
+
+    def publish(self, event: str, data: dict):
+        """Queue an event for every subscriber. Safe to call from sync routes' worker threads."""
+        message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        self._broadcast(message)
+        self.published += 1
+
+    def close(self, event: Optional[str] = None):
+        """End every open stream, after sending `event` if given (restore, app shutdown)."""
+        self._broadcast(_Close(f"event: {event}\ndata: {{}}\n\n" if event else None))
+
+    def _broadcast(self, message):
+        with self._lock:
+            targets = [(loop, list(subs)) for loop, subs in self._subscribers.items()]
+        for loop, subs in targets:
+            try:
+                loop.call_soon_threadsafe(self._deliver, subs, message)
+            except RuntimeError:
+                # Loop already closed: its streams are gone
+                pass
+
+    def _deliver(self, subs, message):
+        """Runs on the subscribers' loop."""
+        for subscriber in subs:
+            if subscriber.closed:
+                continue
+            if isinstance(message, _Close):
+                self.unsubscribe(subscriber)
+                self._replace_queue(subscriber, message)
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.unsubscribe(subscriber)
+                self._replace_queue(subscriber, _EVICTED)
+                self.evicted += 1
+
+    @staticmethod
+    def _replace_queue(subscriber: Subscriber, final: _Close):
+        """Drop whatever is queued and leave only `final` for the stream to read."""
+        subscriber.closed = True
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(final)
+
+
+broker = EventBroker()
+
+
+def close_streams_on_exit():
+    """
+    Uvicorn runs the app's shutdown hooks only once every connection has closed,
+    and event streams never close by themselves. Call from a startup hook: it
+    chains broker.close() in front of the server's SIGINT / SIGTERM handlers so
+    streams end as soon as shutdown begins.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            # close() takes the broker lock, which the interrupted code may hold
+            threading.Thread(target=broker.close, daemon=True).start()
+            previous(signum, frame)
+        signal.signal(sig, handler)
+
+
+def publish_allocation(event: str, allocation):
+    """Publish an allocation.* event; call after the commit that made the change."""
+    broker.publish(event, {
+        "id": allocation.id,
+        "project_id": allocation.project_id,
+        "engineer_id": allocation.engineer_id,
+        "hours": allocation.hours,
+    })
+
+# =============================================================================
+# Router
+# =============================================================================
+
+events_router = APIRouter(prefix="/api/events", tags=["Events"])
+
+async def _stream(request: Request, subscriber: Subscriber):
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            # Send whatever else is already queued in the same write
+            messages = [message]
+            while not subscriber.queue.empty():
+                messages.append(subscriber.queue.get_nowait())
+            final = messages.pop() if isinstance(messages[-1], _Close) else None
+            if final and final.message:
+                messages.append(final.message)
+            if messages:
+                yield "".join(messages)
+            if final:
+                return
+    finally:
+        broker.unsubscribe(subscriber)
+
+@events_router.get("")
+async def stream_events(request: Request):
+    """Server-Sent Events stream of allocation changes (see module docstring)."""
+    subscriber = broker.subscribe()
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many event subscribers", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        _stream(request, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
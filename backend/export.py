@@ -6,17 +6,82 @@ This module provides CSV export endpoints for:
 - Engineers
 - Projects
 - Allocations
+
+Exports are streamed: rows are pulled from the database in batches (yield_per)
+and written out as CSV chunks as they are produced, so memory stays flat no
+matter how many rows are exported. Pass `?compress=true` to get a gzip
+Content-Encoding when the client accepts it.
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from datetime import date
+from typing import Callable, Iterable, Iterator, List
 import csv
 import io
+import zlib
 
 import models
-from database import get_db
+from database import SessionLocal
+
+# Rows fetched per database round-trip, and bytes buffered before a chunk is sent
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# =============================================================================
+# Streaming Helpers
+# =============================================================================
+
+def enum_value(value):
+    return value.value if value else ""
+
+
+def csv_stream(header: List[str], statement, to_row: Callable) -> Iterator[str]:
+    """
+    Yield CSV text chunks for `statement`, fetched EXPORT_BATCH_SIZE rows at a time.
+    Opens its own session so it is independent of the request-scoped one.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result:
+            writer.writerow(to_row(row))
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+    finally:
+        db.close()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Compress a text stream into a single gzip member, chunk by chunk."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_response(request: Request, name: str, chunks: Iterator[str], compress: bool) -> StreamingResponse:
+    filename = f"{name}_{date.today().isoformat()}.csv"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+
+    if compress and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+        return StreamingResponse(gzip_stream(chunks), media_type="text/csv", headers=headers)
+
+    return StreamingResponse(chunks, media_type="text/csv", headers=headers)
 
 # =============================================================================
 # Export Router
@@ -24,122 +89,108 @@ from database import get_db
 
 export_router = APIRouter(prefix="/api/export", tags=["Export"])
 
+ENGINEER_HEADER = ["id", "name", "role", "total_capacity", "ktlo_tax"]
+
+def engineer_rows() -> Iterator[str]:
+    statement = select(
+        models.Engineer.id,
+        models.Engineer.name,
+        models.Engineer.role,
+        models.Engineer.total_capacity,
+        models.Engineer.ktlo_tax
+    )
+    return csv_stream(ENGINEER_HEADER, statement, lambda e: [
+        e.id,
+        e.name,
+        enum_value(e.role),
+        e.total_capacity,
+        e.ktlo_tax
+    ])
+
 
 @export_router.get("/engineers")
-def export_engineers(db: Session = Depends(get_db)):
+def export_engineers(request: Request, compress: bool = False):
     """
     Export all engineers to CSV.
     Columns: id, name, role, total_capacity, ktlo_tax
     """
-    engineers = db.query(models.Engineer).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header row
-    writer.writerow(["id", "name", "role", "total_capacity", "ktlo_tax"])
-    
-    # Data rows
-    for e in engineers:
-        writer.writerow([
-            e.id,
-            e.name,
-            e.role.value if e.role else "",
-            e.total_capacity,
-            e.ktlo_tax
-        ])
-    
-    output.seek(0)
-    filename = f"engineers_{date.today().isoformat()}.csv"
-    
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    return csv_response(request, "engineers", engineer_rows(), compress)
+
+
+PROJECT_HEADER = [
+    "id", "name", "project_number", "priority", "workflow_status",
+    "status", "start_date", "target_end_date", "business_justification"
+]
+
+def project_rows() -> Iterator[str]:
+    statement = select(
+        models.Project.id,
+        models.Project.name,
+        models.Project.project_number,
+        models.Project.priority,
+        models.Project.workflow_status,
+        models.Project.status,
+        models.Project.start_date,
+        models.Project.target_end_date,
+        models.Project.business_justification
     )
+    return csv_stream(PROJECT_HEADER, statement, lambda p: [
+        p.id,
+        p.name,
+        p.project_number or "",
+        enum_value(p.priority),
+        enum_value(p.workflow_status),
+        enum_value(p.status),
+        p.start_date.isoformat() if p.start_date else "",
+        p.target_end_date.isoformat() if p.target_end_date else "",
+        (p.business_justification or "").replace("\n", " ")[:200]  # Truncate for CSV
+    ])
 
 
 @export_router.get("/projects")
-def export_projects(db: Session = Depends(get_db)):
+def export_projects(request: Request, compress: bool = False):
     """
     Export all projects to CSV.
-    Columns: id, name, project_number, priority, workflow_status, status, 
-             start_date, target_end_date, owner_name
+    Columns: id, name, project_number, priority, workflow_status, status,
+             start_date, target_end_date, business_justification
     """
-    projects = db.query(models.Project).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header row
-    writer.writerow([
-        "id", "name", "project_number", "priority", "workflow_status", 
-        "status", "start_date", "target_end_date", "business_justification"
+    return csv_response(request, "projects", project_rows(), compress)
+
+
+ALLOCATION_HEADER = [
+    "id", "engineer_id", "engineer_name", "project_id", "project_name",
+    "day", "hours", "category"
+]
+
+def allocation_rows() -> Iterator[str]:
+    # Names are joined in SQL instead of loading every engineer/project into a lookup dict
+    statement = select(
+        models.Allocation.id,
+        models.Allocation.engineer_id,
+        models.Engineer.name.label("engineer_name"),
+        models.Allocation.project_id,
+        models.Project.name.label("project_name"),
+        models.Allocation.day,
+        models.Allocation.hours,
+        models.Allocation.category
+    ).outerjoin(models.Engineer, models.Allocation.engineer_id == models.Engineer.id)\
+     .outerjoin(models.Project, models.Allocation.project_id == models.Project.id)
+    return csv_stream(ALLOCATION_HEADER, statement, lambda a: [
+        a.id,
+        a.engineer_id,
+        a.engineer_name or "Unknown",
+        a.project_id,
+        a.project_name or "Unknown",
+        enum_value(a.day),
+        a.hours,
+        enum_value(a.category)
     ])
-    
-    # Data rows
-    for p in projects:
-        writer.writerow([
-            p.id,
-            p.name,
-            p.project_number or "",
-            p.priority.value if p.priority else "",
-            p.workflow_status.value if p.workflow_status else "",
-            p.status.value if p.status else "",
-            p.start_date.isoformat() if p.start_date else "",
-            p.target_end_date.isoformat() if p.target_end_date else "",
-            (p.business_justification or "").replace("\n", " ")[:200]  # Truncate for CSV
-        ])
-    
-    output.seek(0)
-    filename = f"projects_{date.today().isoformat()}.csv"
-    
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
 
 
 @export_router.get("/allocations")
-def export_allocations(db: Session = Depends(get_db)):
+def export_allocations(request: Request, compress: bool = False):
     """
     Export all allocations to CSV.
-    Columns: id, engineer_name, project_name, week_start, hours, category
+    Columns: id, engineer_id, engineer_name, project_id, project_name, day, hours, category
     """
-    allocations = db.query(models.Allocation).all()
-    
-    # Build lookup dictionaries for names
-    engineers = {e.id: e.name for e in db.query(models.Engineer).all()}
-    projects = {p.id: p.name for p in db.query(models.Project).all()}
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header row
-    writer.writerow([
-        "id", "engineer_id", "engineer_name", "project_id", "project_name",
-        "week_start", "hours", "category"
-    ])
-    
-    # Data rows
-    for a in allocations:
-        writer.writerow([
-            a.id,
-            a.engineer_id,
-            engineers.get(a.engineer_id, "Unknown"),
-            a.project_id,
-            projects.get(a.project_id, "Unknown"),
-            a.week_start.isoformat() if a.week_start else "",
-            a.hours,
-            a.category.value if a.category else ""
-        ])
-    
-    output.seek(0)
-    filename = f"allocations_{date.today().isoformat()}.csv"
-    
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return csv_response(request, "allocations", allocation_rows(), compress)
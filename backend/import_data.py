@@ -5,6 +5,8 @@ US-0.4: Bulk CSV Import
 This module provides CSV import endpoints for:
 - Engineers
 - Projects
+- Allocations (engineer/project resolved by name)
+- Device volumes (project resolved by name)
 
 Admin only.
 """
@@ -12,13 +14,22 @@ Admin only.
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List
+from datetime import datetime
+from itertools import islice
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import csv
 import io
+import os
+import time
 
 import models
 from database import get_db
 
+# Rows parsed, duplicate-checked and inserted per round-trip (kept under SQLite's bound-parameter limit)
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+MAX_REPORTED_ERRORS = 20
+
 # =============================================================================
 # Schemas
 # =============================================================================
@@ -27,171 +38,314 @@ class ImportResult(BaseModel):
     imported: int
     skipped: int
     errors: List[str]
+    duration_ms: int = 0
+    rows_per_second: float = 0
 
 
 # =============================================================================
-# Import Router
+# Bulk Import Pipeline
 # =============================================================================
 
-import_router = APIRouter(prefix="/api/import", tags=["Import"])
+def csv_rows(file: UploadFile) -> Iterator[Tuple[int, dict]]:
+    """Stream (row number, row) pairs from the upload without reading it into memory."""
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="File must be a CSV")
+    text = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
+    return enumerate(csv.DictReader(text), start=2)  # Row 2 = first data row (after header)
 
 
-@import_router.post("/engineers", response_model=ImportResult)
-async def import_engineers(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def batched(rows: Iterator, size: int = IMPORT_BATCH_SIZE) -> Iterator[list]:
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_import(db: Session, model, rows: Iterator[Tuple[int, dict]], to_mapping: Callable[[dict, str], dict]) -> ImportResult:
     """
-    Import engineers from CSV.
-    Expected columns: name, role, total_capacity, ktlo_tax
-    
-    Duplicates (by name) are skipped.
+    Import named rows in batches: one `name IN (...)` lookup per batch for duplicates,
+    one executemany insert per batch, and a single commit at the end.
+    Duplicates (by name, against the database or earlier rows in the file) are skipped.
     """
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
-    
-    content = await file.read()
-    text = content.decode('utf-8')
-    
-    reader = csv.DictReader(io.StringIO(text))
-    
+    started = time.perf_counter()
     imported = 0
     skipped = 0
     errors = []
-    
-    valid_roles = ["Network Engineer", "Wireless Engineer", "Project Manager", "Architect"]
-    
-    for i, row in enumerate(reader, start=2):  # Row 2 = first data row (after header)
-        try:
-            name = row.get('name', '').strip()
+    seen = set()
+
+    for batch in batched(rows):
+        names = {(row.get('name') or '').strip() for _, row in batch}
+        existing = {name for (name,) in db.query(model.name).filter(model.name.in_(names))}
+
+        mappings = []
+        for i, row in batch:
+            name = (row.get('name') or '').strip()
             if not name:
                 errors.append(f"Row {i}: Missing name (skipped)")
                 skipped += 1
                 continue
-            
-            # Check for duplicate
-            existing = db.query(models.Engineer).filter(models.Engineer.name == name).first()
-            if existing:
+            if name in existing or name in seen:
                 errors.append(f"Row {i}: '{name}' already exists (skipped)")
                 skipped += 1
                 continue
-            
-            # Parse role
-            role_str = row.get('role', 'Network Engineer').strip()
-            if role_str not in valid_roles:
-                role_str = "Network Engineer"  # Default
-            
-            # Parse capacity
             try:
-                total_capacity = int(row.get('total_capacity', 40))
-            except ValueError:
-                total_capacity = 40
-            
-            # Parse KTLO tax
+                mappings.append(to_mapping(row, name))
+                seen.add(name)
+            except Exception as e:
+                errors.append(f"Row {i}: {str(e)}")
+                skipped += 1
+
+        if mappings:
+            db.bulk_insert_mappings(model, mappings)
+            imported += len(mappings)
+
+    db.commit()
+    return import_result(started, imported, skipped, errors)
+
+
+def bulk_import_linked(
+    db: Session,
+    model,
+    rows: Iterator[Tuple[int, dict]],
+    to_mapping: Callable[[dict], dict],
+    summarize: Callable[[str, List[dict]], dict]
+) -> ImportResult:
+    """
+    Import rows that belong to a project (allocations, devices).
+    `to_mapping` validates a row and raises ValueError to skip it; valid rows are
+    inserted per batch. Instead of one ImpactLog per row, `summarize` builds one
+    ImpactLog mapping per affected project. Everything commits once.
+    """
+    started = time.perf_counter()
+    imported = 0
+    skipped = 0
+    errors = []
+    by_project: Dict[str, List[dict]] = defaultdict(list)
+
+    for batch in batched(rows):
+        mappings = []
+        for i, row in batch:
             try:
-                ktlo_tax = int(row.get('ktlo_tax', 0))
-            except ValueError:
-                ktlo_tax = 0
-            
-            # Create engineer
-            engineer = models.Engineer(
-                name=name,
-                role=models.RoleEnum(role_str),
-                total_capacity=total_capacity,
-                ktlo_tax=ktlo_tax
-            )
-            db.add(engineer)
-            imported += 1
-            
-        except Exception as e:
-            errors.append(f"Row {i}: {str(e)}")
-            skipped += 1
-    
+                mappings.append(to_mapping(row))
+            except ValueError as e:
+                errors.append(f"Row {i}: {str(e)} (skipped)")
+                skipped += 1
+
+        if mappings:
+            db.bulk_insert_mappings(model, mappings)
+            imported += len(mappings)
+            for mapping in mappings:
+                by_project[mapping["project_id"]].append(mapping)
+
+    if by_project:
+        db.bulk_insert_mappings(models.ImpactLog, [
+            summarize(project_id, project_rows) for project_id, project_rows in by_project.items()
+        ])
     db.commit()
+    return import_result(started, imported, skipped, errors)
+
+
+def import_result(started: float, imported: int, skipped: int, errors: List[str]) -> ImportResult:
+    elapsed = time.perf_counter() - started
+    return ImportResult(
+        imported=imported,
+        skipped=skipped,
+        errors=errors[:MAX_REPORTED_ERRORS],
+        duration_ms=round(elapsed * 1000),
+        rows_per_second=round((imported + skipped) / elapsed, 1) if elapsed else 0
+    )
+
+
+def name_map(db: Session, model) -> Dict[str, Optional[str]]:
+    """name -> id for every row of `model`; names shared by several rows map to None."""
+    ids: Dict[str, Optional[str]] = {}
+    for id_, name in db.query(model.id, model.name):
+        ids[name] = None if name in ids else id_
+    return ids
+
+
+def resolve(ids: Dict[str, Optional[str]], name: str, label: str) -> str:
+    if not name:
+        raise ValueError(f"Missing {label}")
+    if name not in ids:
+        raise ValueError(f"Unknown {label} '{name}'")
+    if ids[name] is None:
+        raise ValueError(f"Ambiguous {label} '{name}' (name is not unique)")
+    return ids[name]
+
+
+def parse_quantity(value: Optional[str], label: str, default: Optional[int] = None) -> int:
+    value = (value or '').strip()
+    if not value and default is not None:
+        return default
+    try:
+        quantity = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {label} '{value}'")
+    if quantity < 0:
+        raise ValueError(f"Invalid {label} '{value}'")
+    return quantity
+
+
+def parse_int(value: Optional[str], default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_date(value: Optional[str]):
+    value = (value or '').strip()
+    if value:
+        try:
+            return datetime.fromisoformat(value).date()
+        except ValueError:
+            pass
+    return None
+
+
+# =============================================================================
+# Import Router
+# =============================================================================
+
+import_router = APIRouter(prefix="/api/import", tags=["Import"])
+
+VALID_ROLES = {role.value for role in models.RoleEnum}
+
+def engineer_mapping(row: dict, name: str) -> dict:
+    role_str = (row.get('role') or 'Network Engineer').strip()
+    if role_str not in VALID_ROLES:
+        role_str = "Network Engineer"  # Default
+    return {
+        "name": name,
+        "role": models.RoleEnum(role_str),
+        "total_capacity": parse_int(row.get('total_capacity', 40), 40),
+        "ktlo_tax": parse_int(row.get('ktlo_tax', 0), 0)
+    }
+
+
+@import_router.post("/engineers", response_model=ImportResult)
+def import_engineers(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Import engineers from CSV.
+    Expected columns: name, role, total_capacity, ktlo_tax
     
-    return ImportResult(imported=imported, skipped=skipped, errors=errors[:20])  # Limit errors
+    Duplicates (by name) are skipped.
+    """
+    return bulk_import(db, models.Engineer, csv_rows(file), engineer_mapping)
+
+
+VALID_PRIORITIES = {priority.value for priority in models.PriorityEnum}
+VALID_WORKFLOW_STATUSES = {status.value for status in models.WorkflowStatusEnum}
+
+def project_mapping(row: dict, name: str) -> dict:
+    priority_str = (row.get('priority') or 'P2-Strategic').strip()
+    if priority_str not in VALID_PRIORITIES:
+        priority_str = "P2-Strategic"
+
+    status_str = (row.get('workflow_status') or 'Draft').strip()
+    if status_str not in VALID_WORKFLOW_STATUSES:
+        status_str = "Draft"
+
+    return {
+        "name": name,
+        "priority": models.PriorityEnum(priority_str),
+        "workflow_status": models.WorkflowStatusEnum(status_str),
+        "start_date": parse_date(row.get('start_date')),
+        "target_end_date": parse_date(row.get('target_end_date')),
+        "business_justification": (row.get('business_justification') or '')[:500]
+    }
 
 
 @import_router.post("/projects", response_model=ImportResult)
-async def import_projects(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def import_projects(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """
     Import projects from CSV.
     Expected columns: name, priority, start_date, target_end_date, workflow_status, business_justification
     
     Duplicates (by name) are skipped.
     """
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
-    
-    content = await file.read()
-    text = content.decode('utf-8')
-    
-    reader = csv.DictReader(io.StringIO(text))
-    
-    imported = 0
-    skipped = 0
-    errors = []
-    
-    valid_priorities = ["P1-Critical", "P2-Strategic", "P3-Standard", "P4-Low"]
-    valid_statuses = ["Draft", "Pending Approval", "Approved", "Active", "On Hold", "Complete", "Cancelled"]
-    
-    for i, row in enumerate(reader, start=2):
-        try:
-            name = row.get('name', '').strip()
-            if not name:
-                errors.append(f"Row {i}: Missing name (skipped)")
-                skipped += 1
-                continue
-            
-            # Check for duplicate
-            existing = db.query(models.Project).filter(models.Project.name == name).first()
-            if existing:
-                errors.append(f"Row {i}: '{name}' already exists (skipped)")
-                skipped += 1
-                continue
-            
-            # Parse priority
-            priority_str = row.get('priority', 'P2-Strategic').strip()
-            if priority_str not in valid_priorities:
-                priority_str = "P2-Strategic"
-            
-            # Parse workflow status
-            status_str = row.get('workflow_status', 'Draft').strip()
-            if status_str not in valid_statuses:
-                status_str = "Draft"
-            
-            # Parse dates
-            from datetime import datetime
-            start_date = None
-            target_end_date = None
-            
-            start_str = row.get('start_date', '').strip()
-            if start_str:
-                try:
-                    start_date = datetime.fromisoformat(start_str).date()
-                except ValueError:
-                    pass
-            
-            end_str = row.get('target_end_date', '').strip()
-            if end_str:
-                try:
-                    target_end_date = datetime.fromisoformat(end_str).date()
-                except ValueError:
-                    pass
-            
-            # Create project
-            project = models.Project(
-                name=name,
-                priority=models.PriorityEnum(priority_str),
-                workflow_status=models.WorkflowStatusEnum(status_str),
-                start_date=start_date,
-                target_end_date=target_end_date,
-                business_justification=row.get('business_justification', '')[:500]
-            )
-            db.add(project)
-            imported += 1
-            
-        except Exception as e:
-            errors.append(f"Row {i}: {str(e)}")
-            skipped += 1
+    return bulk_import(db, models.Project, csv_rows(file), project_mapping)
+
+
+VALID_CATEGORIES = {category.value for category in models.CategoryEnum}
+VALID_DAYS = {day.value for day in models.DayEnum}
+
+@import_router.post("/allocations", response_model=ImportResult)
+def import_allocations(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Import allocations from CSV.
+    Expected columns: engineer, project, hours, category, day
     
-    db.commit()
+    Engineer and project are matched by name; category defaults to Project Work and
+    day to Mon. Rows with unknown names or invalid values are skipped.
+    One Impact Log entry is written per affected project.
+    """
+    rows = csv_rows(file)
+    engineers = name_map(db, models.Engineer)
+    projects = name_map(db, models.Project)
+
+    def to_mapping(row: dict) -> dict:
+        category = (row.get('category') or models.CategoryEnum.PROJECT_WORK.value).strip()
+        if category not in VALID_CATEGORIES:
+            raise ValueError(f"Invalid category '{category}'")
+        day = (row.get('day') or models.DayEnum.MON.value).strip()
+        if day not in VALID_DAYS:
+            raise ValueError(f"Invalid day '{day}'")
+        hours = parse_quantity(row.get('hours'), "hours")
+        if hours == 0:
+            raise ValueError("Invalid hours '0'")
+        return {
+            "engineer_id": resolve(engineers, (row.get('engineer') or '').strip(), "engineer"),
+            "project_id": resolve(projects, (row.get('project') or '').strip(), "project"),
+            "category": models.CategoryEnum(category),
+            "day": models.DayEnum(day),
+            "hours": hours
+        }
+
+    def summarize(project_id: str, allocations: List[dict]) -> dict:
+        engineer_count = len({a["engineer_id"] for a in allocations})
+        return {
+            "project_id": project_id,
+            "event": f"Allocations Imported: {len(allocations)}",
+            "reason": f"CSV import: {sum(a['hours'] for a in allocations)}h across {engineer_count} engineer(s)"
+        }
+
+    return bulk_import_linked(db, models.Allocation, rows, to_mapping, summarize)
+
+
+@import_router.post("/devices", response_model=ImportResult)
+def import_devices(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Import device volume entries from CSV.
+    Expected columns: project, device_type, current_qty, proposed_qty
     
-    return ImportResult(imported=imported, skipped=skipped, errors=errors[:20])
+    Project is matched by name. Rows with unknown projects or invalid quantities
+    are skipped. One Impact Log entry is written per affected project.
+    """
+    rows = csv_rows(file)
+    projects = name_map(db, models.Project)
+
+    def to_mapping(row: dict) -> dict:
+        device_type = (row.get('device_type') or '').strip()
+        if not device_type:
+            raise ValueError("Missing device_type")
+        return {
+            "project_id": resolve(projects, (row.get('project') or '').strip(), "project"),
+            "device_type": device_type,
+            "current_qty": parse_quantity(row.get('current_qty'), "current_qty", default=0),
+            "proposed_qty": parse_quantity(row.get('proposed_qty'), "proposed_qty")
+        }
+
+    def summarize(project_id: str, devices: List[dict]) -> dict:
+        current = sum(d["current_qty"] for d in devices)
+        proposed = sum(d["proposed_qty"] for d in devices)
+        net_change = proposed - current
+        return {
+            "project_id": project_id,
+            "event": f"Devices Imported: {len(devices)} entries",
+            "reason": f"Current: {current}, Proposed: {proposed}, Net: {'+' if net_change >= 0 else ''}{net_change}"
+        }
+
+    return bulk_import_linked(db, models.ProjectDevice, rows, to_mapping, summarize)
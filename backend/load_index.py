@@ -0,0 +1,143 @@
+"""
+In-memory engineer load index for goodenough.to | Planning
+
+create_project_allocation and update_allocation check the engineer's
+effective capacity (total_capacity - ktlo_tax) against their hours on active
+projects. Both numbers come from an in-process index, so a check is a dict
+lookup plus the write's own delta.
+
+The index is keyed to the table_versions counters for allocations, engineers
+and projects. A route flushes its write first, then checks. If the counters
+show that only that write happened since the index was built, the index is
+current. Otherwise something else changed the data: an import, a batch, a
+project status change, an engineer edit or a restore. In that case the index
+is rebuilt from engineer_load in the same transaction. The route applies the
+result to the index only after its commit succeeds.
+
+CAPACITY_POLICY decides what an over-capacity write does:
+    reject  -> 409, nothing is written
+    warn    -> written, with an X-Capacity-Warning header (default)
+Either way the response carries X-Engineer-Remaining-Capacity. Writes that
+lower an engineer's load are never rejected.
+"""
+
+import os
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import func, not_, text
+from sqlalchemy.orm import Session
+
+import models
+from add_table_versions_migration import EPOCH
+from analytics import active_project, effective_capacity
+
+CAPACITY_POLICY = os.environ.get("CAPACITY_POLICY", "warn").lower()
+
+_TABLES = (EPOCH, "allocations", "engineers", "projects")
+_VERSIONS = text("SELECT table_name, version FROM table_versions WHERE table_name IN ({})".format(
+    ", ".join(f"'{table}'" for table in _TABLES)
+))
+
+Versions = Tuple[Tuple[str, int], ...]
+
+
+class CapacityCheck(NamedTuple):
+    engineer_id: str
+    effective_capacity: int
+    allocated_hours: int
+    delta: int
+    # Versions including the checked write; None for read-only lookups
+    versions: Optional[Versions] = None
+
+    @property
+    def remaining(self) -> int:
+        return self.effective_capacity - self.allocated_hours
+
+    @property
+    def over_capacity(self) -> bool:
+        """Over capacity because of this write (never true for writes that lower the load)."""
+        return self.delta > 0 and self.remaining < 0
+
+
+def _without_write(versions: Versions, writes: int) -> Versions:
+    return tuple((table, version - writes if table == "allocations" else version) for table, version in versions)
+
+
+class EngineerLoadIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[Versions] = None
+        self._capacity: Dict[str, int] = {}
+        self._load: Dict[str, int] = {}
+        self._inactive_projects = set()
+        self.rebuilds = 0
+
+    def _rebuild(self, db: Session, version: Versions):
+        self._capacity = dict(db.query(models.Engineer.id, effective_capacity).all())
+        self._load = dict(
+            db.query(models.EngineerLoad.engineer_id, func.sum(models.EngineerLoad.active_hours))
+            .group_by(models.EngineerLoad.engineer_id)
+            .all()
+        )
+        self._inactive_projects = {pid for (pid,) in db.query(models.Project.id).filter(not_(active_project))}
+        self._version = version
+        self.rebuilds += 1
+
+    def _check(self, db: Session, engineer_id: str, project_id: Optional[str], hours: int, writes: int) -> CapacityCheck:
+        versions = tuple(sorted(db.execute(_VERSIONS).all()))
+        before = _without_write(versions, writes)
+        with self._lock:
+            stale = self._version != before
+            if stale:
+                self._rebuild(db, before)
+            delta = hours if project_id is not None and project_id not in self._inactive_projects else 0
+            if stale:
+                # The rebuild read our own flushed write: take it back out of the committed state
+                self._load[engineer_id] = self._load.get(engineer_id, 0) - delta
+            return CapacityCheck(
+                engineer_id=engineer_id,
+                effective_capacity=self._capacity.get(engineer_id, 0),
+                allocated_hours=self._load.get(engineer_id, 0) + delta,
+                delta=delta,
+                versions=versions if writes else None
+            )
+
+    def check_write(self, db: Session, allocation: models.Allocation, old_hours: int = 0) -> CapacityCheck:
+        """Check one flushed (not yet committed) allocation insert or hours change."""
+        return self._check(db, allocation.engineer_id, allocation.project_id, allocation.hours - old_hours, writes=1)
+
+    def check_delete(self, db: Session, allocation: models.Allocation) -> CapacityCheck:
+        """Track a flushed allocation delete, so deletes don't force a rebuild."""
+        return self._check(db, allocation.engineer_id, allocation.project_id, -allocation.hours, writes=1)
+
+    def lookup(self, db: Session, engineer_id: str) -> CapacityCheck:
+        return self._check(db, engineer_id, None, 0, writes=0)
+
+    def commit(self, check: CapacityCheck):
+        """Record a checked write once its transaction has committed."""
+        if check.versions is None:
+            return
+        with self._lock:
+            if self._version == _without_write(check.versions, 1):
+                self._load[check.engineer_id] = check.allocated_hours
+                self._version = check.versions
+
+
+load_index = EngineerLoadIndex()
+
+
+def enforce_capacity(check: CapacityCheck, response: Response, policy: str = CAPACITY_POLICY):
+    """Apply CAPACITY_POLICY to a check: raise 409 (reject) or set the capacity headers."""
+    if check.over_capacity and policy == "reject":
+        raise HTTPException(status_code=409, detail={
+            "message": "Allocation would put the engineer over capacity",
+            "engineer_id": check.engineer_id,
+            "effective_capacity": check.effective_capacity,
+            "allocated_hours": check.allocated_hours,
+            "remaining_capacity": check.remaining,
+        })
+    response.headers["X-Engineer-Remaining-Capacity"] = str(check.remaining)
+    if check.over_capacity:
+        response.headers["X-Capacity-Warning"] = f"Engineer over capacity by {-check.remaining}h"
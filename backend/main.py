@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
@@ -10,16 +10,46 @@ import uuid
 import enum
 import os
 import models, schemas, database
+import add_indexes_migration
+import add_audit_summary_migration
+import add_engineer_load_migration
+import add_project_staffing_migration
+import add_table_versions_migration
+import add_change_journal_migration
 from database import engine, get_db
 from auth import auth_router, User, get_current_user
 from export import export_router
 from import_data import import_router
 from audit_log import audit_router
 from utils import record_audit
+from audit_writer import audit_writer
+from audit_archive import audit_archiver
+from sync import sync_router, journal_compactor
+from events import events_router, broker, publish_allocation, close_streams_on_exit
+from allocation_batch import batch_router
+from load_index import load_index, enforce_capacity
 from snapshots import snapshot_router
+from maintenance import MaintenanceMiddleware
+from analytics import dashboard_router, analytics_router
+from pagination import PageParams, parse_fields, page_response
+from etags import etag_for
+from async_routes import async_read_router
+import queries
 
 # Create the database tables (including User table from auth)
 models.Base.metadata.create_all(bind=engine)
+# Add any secondary indexes missing from databases created by older versions
+add_indexes_migration.migrate(engine)
+# Seed the audit count summary for databases created before it existed
+add_audit_summary_migration.migrate(engine)
+# Install the engineer_load triggers and seed the table
+add_engineer_load_migration.migrate(engine)
+# Install the project_staffing triggers and seed the rollup
+add_project_staffing_migration.migrate(engine)
+# Install the write-version triggers behind list ETags
+add_table_versions_migration.migrate(engine)
+# Install the change journal triggers behind /api/sync
+add_change_journal_migration.migrate(engine)
 
 app = FastAPI(title="goodenough.to | Planning API", version="0.3.0")
 
@@ -33,6 +63,18 @@ app.include_router(import_router)
 app.include_router(audit_router)
 # Include snapshot router
 app.include_router(snapshot_router)
+# DB_MODE=async: async read routes are registered first so they shadow the sync ones below
+if database.ASYNC_DB_ENABLED:
+    app.include_router(async_read_router)
+# Include dashboard router
+app.include_router(dashboard_router)
+app.include_router(analytics_router)
+# Include delta sync router
+app.include_router(sync_router)
+# Include live events (SSE) router
+app.include_router(events_router)
+# Include allocation batch router
+app.include_router(batch_router)
 
 
 # CORS Configuration - reads from environment variable or uses defaults
@@ -40,12 +82,17 @@ app.include_router(snapshot_router)
 default_origins = "http://localhost:5173,http://127.0.0.1:5173,http://0.0.0.0:5173"
 allowed_origins = os.getenv("ALLOWED_ORIGINS", default_origins).split(",")
 
+# Turns API requests away with 503 + Retry-After while a snapshot restore swaps the database.
+# The events stream is exempt: it never touches the database and stays open indefinitely.
+app.add_middleware(MaintenanceMiddleware, exempt=("/api/snapshots/restore", "/api/events"))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "Retry-After", "ETag", "X-Engineer-Remaining-Capacity", "X-Capacity-Warning"],
 )
 
 # Serve static files for the frontend
@@ -67,6 +114,21 @@ def debug_db_tables(db: Session = Depends(get_db)):
     tables = inspector.get_table_names()
     return {"tables": tables, "users_exists": "users" in tables}
 
+@app.on_event("startup")
+def start_audit_writer():
+    audit_writer.start()
+    audit_archiver.start()
+    journal_compactor.start()
+    close_streams_on_exit()
+
+@app.on_event("shutdown")
+def stop_audit_writer():
+    """Flush queued audit events before the process exits."""
+    broker.close()
+    journal_compactor.stop()
+    audit_archiver.stop()
+    audit_writer.stop()
+
 @app.on_event("startup")
 def create_default_admin():
     """Create a default admin user if no users exist (bootstrap mode)."""
@@ -101,18 +163,35 @@ def create_default_admin():
 # Global Queries (for frontend aggregation)
 # =============================================================================
 
-@app.get("/api/requirements", response_model=List[schemas.ResourcingRequirement])
-def get_all_requirements(db: Session = Depends(get_db)):
-    """Get all resourcing requirements across all projects (for staffing calculations)"""
-    return db.query(models.ResourcingRequirement).all()
+@app.get("/api/requirements", response_model=List[schemas.ResourcingRequirement], dependencies=[Depends(etag_for("resourcing_requirements"))])
+def get_all_requirements(
+    request: Request,
+    response: Response,
+    project_id: Optional[UUID] = None,
+    role: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db)
+):
+    """Get resourcing requirements across all projects (for staffing calculations), cursor-paginated"""
+    fields = parse_fields(page.fields, schemas.ResourcingRequirement)
+    rows, next_cursor = queries.list_requirements(db, page, project_id, role)
+    return page_response(rows, next_cursor, schemas.ResourcingRequirement, fields, request, response)
 
 # =============================================================================
 # Engineer Endpoints
 # =============================================================================
 
-@app.get("/api/engineers", response_model=List[schemas.Engineer])
-def get_engineers(db: Session = Depends(get_db)):
-    return db.query(models.Engineer).all()
+@app.get("/api/engineers", response_model=List[schemas.Engineer], dependencies=[Depends(etag_for("engineers"))])
+def get_engineers(
+    request: Request,
+    response: Response,
+    role: Optional[models.RoleEnum] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db)
+):
+    fields = parse_fields(page.fields, schemas.Engineer)
+    rows, next_cursor = queries.list_engineers(db, page, role)
+    return page_response(rows, next_cursor, schemas.Engineer, fields, request, response)
 
 @app.post("/api/engineers", response_model=schemas.Engineer)
 def create_engineer(engineer: schemas.EngineerCreate, request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -183,47 +262,18 @@ def delete_engineer(engineer_id: UUID, db: Session = Depends(get_db)):
 # Project Endpoints
 # =============================================================================
 
-@app.get("/api/projects", response_model=List[schemas.Project])
-def get_projects(db: Session = Depends(get_db)):
-    db_projects = db.query(models.Project).all()
-    
-    # Enrich projects with staffing metrics for EPIC-002
-    for p in db_projects:
-        # 1. Total requirements
-        reqs = p.resourcing_requirements
-        total_required = sum(r.hours_per_week for r in reqs)
-        
-        # 2. Total allocations (only PROJECT_WORK category)
-        allocs = [a for a in p.allocations if a.category == models.CategoryEnum.PROJECT_WORK]
-        total_allocated = sum(a.hours for a in allocs)
-        
-        # 3. Role-based breakdown
-        role_stats = []
-        # Get unique roles from requirements
-        roles_needed = {r.role for r in reqs}
-        for role in roles_needed:
-            role_required = sum(r.hours_per_week for r in reqs if r.role == role)
-            # Find allocations for this role. Note: Engineer role is what we check.
-            role_allocated = sum(a.hours for a in allocs if a.engineer and a.engineer.role == role)
-            
-            role_stats.append(schemas.RoleStaffingStatus(
-                role=role,
-                required=role_required,
-                allocated=role_allocated,
-                is_complete=role_allocated >= role_required
-            ))
-            
-        p.total_hours_required = total_required
-        p.total_hours_allocated = total_allocated
-        p.is_fully_staffed = total_allocated >= total_required if total_required > 0 else (len(reqs) == 0 and len(allocs) > 0)
-        # Re-check is_fully_staffed: if 0 reqs and 0 allocs, it's draft/placeholder, but technically not "unstaffed" in a bad way.
-        # But if it has reqs, it must meet them all.
-        if total_required > 0:
-             p.is_fully_staffed = all(s.is_complete for s in role_stats)
-        
-        p.role_staffing = role_stats
-        
-    return db_projects
+@app.get("/api/projects", response_model=List[schemas.Project], dependencies=[Depends(etag_for(*queries.PROJECT_TABLES))])
+def get_projects(
+    request: Request,
+    response: Response,
+    fiscal_year: Optional[str] = None,
+    workflow_status: Optional[models.WorkflowStatusEnum] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db)
+):
+    fields = parse_fields(page.fields, schemas.Project)
+    db_projects, next_cursor = queries.list_projects(db, page, fields, fiscal_year, workflow_status)
+    return page_response(db_projects, next_cursor, schemas.Project, fields, request, response)
 
 @app.post("/api/projects", response_model=schemas.Project)
 def create_project(project: schemas.ProjectCreate, request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
@@ -418,10 +468,21 @@ def delete_rid_log(rid_id: UUID, db: Session = Depends(get_db)):
 # Project Allocation Endpoints (US-11.8, US-11.9, US-11.10)
 # =============================================================================
 
-@app.get("/api/allocations", response_model=List[schemas.Allocation])
-def get_all_allocations(db: Session = Depends(get_db)):
-    """Get all allocations system-wide for capacity calculations"""
-    return db.query(models.Allocation).all()
+@app.get("/api/allocations", response_model=List[schemas.Allocation], dependencies=[Depends(etag_for("allocations"))])
+def get_all_allocations(
+    request: Request,
+    response: Response,
+    engineer_id: Optional[UUID] = None,
+    project_id: Optional[UUID] = None,
+    category: Optional[models.CategoryEnum] = None,
+    day: Optional[models.DayEnum] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db)
+):
+    """Get allocations system-wide for capacity calculations, cursor-paginated"""
+    fields = parse_fields(page.fields, schemas.Allocation)
+    rows, next_cursor = queries.list_allocations(db, page, engineer_id, project_id, category, day)
+    return page_response(rows, next_cursor, schemas.Allocation, fields, request, response)
 
 @app.get("/api/projects/{project_id}/allocations", response_model=List[schemas.Allocation])
 def get_project_allocations(project_id: UUID, db: Session = Depends(get_db)):
@@ -436,8 +497,8 @@ def get_project_allocations(project_id: UUID, db: Session = Depends(get_db)):
         .all()
 
 @app.post("/api/projects/{project_id}/allocations", response_model=schemas.Allocation)
-def create_project_allocation(project_id: UUID, allocation: schemas.ProjectAllocationCreate, db: Session = Depends(get_db)):
-    """Add a new resource allocation to a project (US-11.8)"""
+def create_project_allocation(project_id: UUID, allocation: schemas.ProjectAllocationCreate, response: Response, db: Session = Depends(get_db)):
+    """Add a new resource allocation to a project (US-11.8), checked against the engineer's capacity"""
     pid_str = str(project_id)
     db_project = db.query(models.Project).filter(models.Project.id == pid_str).first()
     if not db_project:
@@ -458,6 +519,9 @@ def create_project_allocation(project_id: UUID, allocation: schemas.ProjectAlloc
         day=models.DayEnum.MON
     )
     db.add(db_allocation)
+    db.flush()
+    capacity = load_index.check_write(db, db_allocation)
+    enforce_capacity(capacity, response)
     
     # Log to impact log
     impact_log = models.ImpactLog(
@@ -468,16 +532,19 @@ def create_project_allocation(project_id: UUID, allocation: schemas.ProjectAlloc
     db.add(impact_log)
     
     db.commit()
+    load_index.commit(capacity)
     db.refresh(db_allocation)
+    publish_allocation("allocation.created", db_allocation)
     return db_allocation
 
 @app.patch("/api/allocations/{allocation_id}", response_model=schemas.Allocation)
 def update_allocation(
     allocation_id: UUID, 
     allocation_update: schemas.ProjectAllocationUpdate, 
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    """Update allocation hours (US-11.10)"""
+    """Update allocation hours (US-11.10), checked against the engineer's capacity"""
     db_allocation = db.query(models.Allocation).filter(models.Allocation.id == str(allocation_id)).first()
     if not db_allocation:
         raise HTTPException(status_code=404, detail="Allocation not found")
@@ -485,8 +552,11 @@ def update_allocation(
     old_hours = db_allocation.hours
     update_data = allocation_update.model_dump(exclude_unset=True)
     
-    if 'hours_per_week' in update_data:
+    if update_data.get('hours_per_week') not in (None, old_hours):
         db_allocation.hours = update_data['hours_per_week']
+        db.flush()
+        capacity = load_index.check_write(db, db_allocation, old_hours)
+        enforce_capacity(capacity, response)
         
         # Log change to impact log
         engineer_name = db_allocation.engineer.name if db_allocation.engineer else "Unassigned"
@@ -496,13 +566,18 @@ def update_allocation(
             reason=f"Hours changed: {old_hours}h → {update_data['hours_per_week']}h"
         )
         db.add(impact_log)
+    else:
+        capacity = load_index.lookup(db, db_allocation.engineer_id)
+        enforce_capacity(capacity, response)
     
     db.commit()
+    load_index.commit(capacity)
     db.refresh(db_allocation)
+    publish_allocation("allocation.updated", db_allocation)
     return db_allocation
 
 @app.delete("/api/allocations/{allocation_id}")
-def delete_allocation(allocation_id: UUID, db: Session = Depends(get_db)):
+def delete_allocation(allocation_id: UUID, response: Response, db: Session = Depends(get_db)):
     """Remove an allocation from a project (US-11.9)"""
     db_allocation = db.query(models.Allocation).filter(models.Allocation.id == str(allocation_id)).first()
     if not db_allocation:
@@ -518,7 +593,12 @@ def delete_allocation(allocation_id: UUID, db: Session = Depends(get_db)):
     db.add(impact_log)
     
     db.delete(db_allocation)
+    db.flush()
+    capacity = load_index.check_delete(db, db_allocation)
+    enforce_capacity(capacity, response)
     db.commit()
+    load_index.commit(capacity)
+    publish_allocation("allocation.deleted", db_allocation)
     return {"message": "Allocation removed"}
 
 # =============================================================================
@@ -621,10 +701,19 @@ def clone_scenario(request: ScenarioCloneRequest):
 # Project Device Endpoints (US-13.4, US-13.5)
 # =============================================================================
 
-@app.get("/api/devices", response_model=List[schemas.ProjectDevice])
-def get_all_devices(db: Session = Depends(get_db)):
-    """Get all project devices system-wide for reporting (US-13.6)"""
-    return db.query(models.ProjectDevice).all()
+@app.get("/api/devices", response_model=List[schemas.ProjectDevice], dependencies=[Depends(etag_for("project_devices"))])
+def get_all_devices(
+    request: Request,
+    response: Response,
+    project_id: Optional[UUID] = None,
+    device_type: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db)
+):
+    """Get project devices system-wide for reporting (US-13.6), cursor-paginated"""
+    fields = parse_fields(page.fields, schemas.ProjectDevice)
+    rows, next_cursor = queries.list_devices(db, page, project_id, device_type)
+    return page_response(rows, next_cursor, schemas.ProjectDevice, fields, request, response)
 
 @app.get("/api/projects/{project_id}/devices", response_model=List[schemas.ProjectDevice])
 def get_project_devices(project_id: UUID, db: Session = Depends(get_db)):
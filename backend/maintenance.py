@@ -0,0 +1,108 @@
+"""
+Maintenance gate for goodenough.to | Planning
+
+ASGI middleware that tracks in-flight API requests and can be closed for
+operations that swap the database underneath the engine (snapshot restore).
+While closed, new API requests get 503 with a Retry-After header so clients
+retry instead of reading a half-restored database.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds clients are told to wait, and how long a drain waits for in-flight requests
+MAINTENANCE_RETRY_AFTER = int(os.environ.get("MAINTENANCE_RETRY_AFTER", "2"))
+MAINTENANCE_DRAIN_TIMEOUT = float(os.environ.get("MAINTENANCE_DRAIN_TIMEOUT", "10"))
+
+
+class DrainTimeout(Exception):
+    pass
+
+
+class MaintenanceGate:
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._in_flight = 0
+        self._closed = False
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def enter(self) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            self._in_flight += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._lock.notify_all()
+
+    @contextmanager
+    def drained(self, timeout: float = MAINTENANCE_DRAIN_TIMEOUT):
+        """
+        Close the gate and wait for in-flight requests to finish; reopens on exit.
+        Raises DrainTimeout (with the gate reopened) if they do not finish in time.
+        """
+        with self._lock:
+            if self._closed:
+                raise DrainTimeout("Maintenance already in progress")
+            self._closed = True
+            deadline = time.monotonic() + timeout
+            while self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._closed = False
+                    raise DrainTimeout(f"{self._in_flight} request(s) still running after {timeout:g}s")
+                self._lock.wait(remaining)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._closed = False
+
+
+gate = MaintenanceGate()
+
+
+class MaintenanceMiddleware:
+    """
+    Counts in-flight /api requests (including streamed response bodies) and turns
+    requests away with 503 while the gate is closed. Paths in `exempt` (the
+    maintenance endpoints themselves) are neither counted nor blocked.
+    """
+
+    def __init__(self, app, exempt: tuple = ()):
+        self.app = app
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith("/api") or path.startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+
+        if not gate.enter():
+            body = json.dumps({"detail": "Database maintenance in progress, please retry"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(MAINTENANCE_RETRY_AFTER).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.leave()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, UUID, ForeignKey, DateTime, Float, Date, Text
+from sqlalchemy import Column, Integer, String, Enum, UUID, ForeignKey, DateTime, Float, Date, Text, Index, func
 from sqlalchemy.orm import declarative_base, relationship
 import uuid
 from datetime import datetime, date
@@ -91,8 +91,8 @@ class Engineer(Base):
     __tablename__ = "engineers"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    name = Column(String, nullable=False)
-    role = Column(Enum(RoleEnum), nullable=False)
+    name = Column(String, nullable=False, index=True)  # Import duplicate checks
+    role = Column(Enum(RoleEnum), nullable=False, index=True)
     total_capacity = Column(Integer, default=40)
     ktlo_tax = Column(Integer, default=0)
     
@@ -102,7 +102,7 @@ class Project(Base):
     __tablename__ = "projects"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)  # Import duplicate checks
     project_number = Column(String, nullable=True)  # User-defined project identifier
     project_site = Column(String, nullable=True)    # URL link to project site
     priority = Column(Enum(PriorityEnum), nullable=False)
@@ -110,22 +110,22 @@ class Project(Base):
     status = Column(Enum(ProjectStatusEnum), default=ProjectStatusEnum.HEALTHY)
     
     # Epic 11 fields
-    owner_id = Column(String, ForeignKey("engineers.id"), nullable=True)
-    manager_id = Column(String, ForeignKey("engineers.id"), nullable=True)
+    owner_id = Column(String, ForeignKey("engineers.id"), nullable=True, index=True)
+    manager_id = Column(String, ForeignKey("engineers.id"), nullable=True, index=True)
     rag_status = Column(Enum(RagStatusEnum), default=RagStatusEnum.GREEN)
     rag_reason = Column(String, nullable=True)  # Required when Red or Issue
     percent_complete = Column(Integer, default=0)
     business_justification = Column(Text, nullable=True)
     start_date = Column(Date, nullable=True)
     target_end_date = Column(Date, nullable=True)
-    workflow_status = Column(Enum(WorkflowStatusEnum), default=WorkflowStatusEnum.DRAFT)
+    workflow_status = Column(Enum(WorkflowStatusEnum), default=WorkflowStatusEnum.DRAFT, index=True)
     project_type = Column(String, nullable=True)
     size = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Epic 13 fields (Fiscal Planning)
-    fiscal_year = Column(String, nullable=True)
+    fiscal_year = Column(String, nullable=True, index=True)
     device_count = Column(Integer, default=0)
     device_type = Column(String, nullable=True)
 
@@ -145,6 +145,10 @@ class Project(Base):
 class ProjectRidLog(Base):
     """Risk, Issue, Decision log entries for projects (US-11.6, US-11.7)"""
     __tablename__ = "project_rid_logs"
+    __table_args__ = (
+        # RID log tab: WHERE project_id = ? ORDER BY created_at DESC
+        Index("ix_project_rid_logs_project_created", "project_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String, ForeignKey("projects.id"), nullable=False)
@@ -161,6 +165,12 @@ class ProjectRidLog(Base):
 
 class Allocation(Base):
     __tablename__ = "allocations"
+    __table_args__ = (
+        # Per-engineer load / Deep Work checks: engineer_id [, day [, category]]
+        Index("ix_allocations_engineer_day_category", "engineer_id", "day", "category"),
+        # Per-project lists and staffing rollups: project_id [, category]
+        Index("ix_allocations_project_category", "project_id", "category"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     engineer_id = Column(String, ForeignKey("engineers.id"), nullable=False) # Changed nullable to False
@@ -173,8 +183,27 @@ class Allocation(Base):
     engineer = relationship("Engineer", back_populates="allocations")
     project = relationship("Project", back_populates="allocations")
 
+class EngineerLoad(Base):
+    """
+    Allocated hours per engineer, day and category, kept in step with allocations
+    by SQLite triggers (see add_engineer_load_migration.py). active_hours only
+    counts allocations on projects that are not Complete / Cancelled.
+    """
+    __tablename__ = "engineer_load"
+
+    engineer_id = Column(String, primary_key=True)
+    day = Column(Enum(DayEnum), primary_key=True)
+    category = Column(Enum(CategoryEnum), primary_key=True)
+    hours = Column(Integer, nullable=False, default=0)
+    active_hours = Column(Integer, nullable=False, default=0)
+    allocation_count = Column(Integer, nullable=False, default=0)
+
 class ImpactLog(Base):
     __tablename__ = "impact_logs"
+    __table_args__ = (
+        # Impact log tab: WHERE project_id = ? ORDER BY date DESC
+        Index("ix_impact_logs_project_date", "project_id", "date"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String, ForeignKey("projects.id"), nullable=False)
@@ -189,7 +218,7 @@ class ResourcingRequirement(Base):
     __tablename__ = "resourcing_requirements"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False, index=True)
     role = Column(String, nullable=False)  # e.g., "Network Engineer"
     hours_per_week = Column(Integer, nullable=False)
     duration_weeks = Column(Integer, nullable=True)  # Optional
@@ -197,12 +226,28 @@ class ResourcingRequirement(Base):
 
     project = relationship("Project", back_populates="resourcing_requirements")
 
+class ProjectStaffing(Base):
+    """
+    Required and allocated (Project Work) hours per project and role, kept in
+    step with requirements, allocations and engineer roles by SQLite triggers
+    (see add_project_staffing_migration.py). role is "" for allocations whose
+    engineer no longer exists.
+    """
+    __tablename__ = "project_staffing"
+
+    project_id = Column(String, primary_key=True)
+    role = Column(String, primary_key=True)
+    required_hours = Column(Integer, nullable=False, default=0)
+    requirement_count = Column(Integer, nullable=False, default=0)
+    allocated_hours = Column(Integer, nullable=False, default=0)
+    allocation_count = Column(Integer, nullable=False, default=0)
+
 class ProjectDevice(Base):
     """Stores multiple device volume entries per project (US-13.4, US-13.5)"""
     __tablename__ = "project_devices"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False, index=True)
     device_type = Column(String, nullable=False)  # e.g., "Access Points"
     current_qty = Column(Integer, default=0)       # Devices being replaced/refreshed
     proposed_qty = Column(Integer, nullable=False) # Devices to deploy
@@ -213,6 +258,14 @@ class ProjectDevice(Base):
 class AuditLog(Base):
     """Stores all manual user actions for audit trail (US-0.3)"""
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Activity log: ORDER BY timestamp DESC, id DESC [WHERE <filter> = ?]
+        Index("ix_audit_logs_timestamp", "timestamp"),
+        Index("ix_audit_logs_resource_type_timestamp", "resource_type", "timestamp"),
+        Index("ix_audit_logs_username_timestamp", "username", "timestamp"),
+        Index("ix_audit_logs_action_timestamp", "action", "timestamp"),
+        Index("ix_audit_logs_resource_id_timestamp", "resource_id", "timestamp"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -224,3 +277,37 @@ class AuditLog(Base):
     details = Column(Text, nullable=True)     # JSON or string details of change
     ip_address = Column(String, nullable=True)
 
+class TableVersion(Base):
+    """Write counter per planning table, bumped by triggers (backs list ETags, see add_table_versions_migration.py)"""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class ChangeJournal(Base):
+    """
+    One row per write to a planning table, appended by triggers (backs /api/sync,
+    see add_change_journal_migration.py). seq is AUTOINCREMENT so it is never
+    reused after compaction.
+    """
+    __tablename__ = "change_journal"
+    __table_args__ = (
+        # Compaction: latest entry per row
+        Index("ix_change_journal_table_row", "table_name", "row_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(String, nullable=False)
+    changed_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+class AuditLogCount(Base):
+    """Audit event counts per day, maintained with each audit write (backs the audit count endpoint)"""
+    __tablename__ = "audit_log_counts"
+
+    day = Column(Date, primary_key=True)
+    action = Column(String, primary_key=True)
+    resource_type = Column(String, primary_key=True)
+    username = Column(String, primary_key=True)  # "" when the event has no username
+    count = Column(Integer, nullable=False, default=0)
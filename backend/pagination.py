@@ -0,0 +1,99 @@
+"""
+Pagination helpers for goodenough.to | Planning list endpoints
+
+- Keyset (cursor) pagination on the SQLite rowid: `?limit=&cursor=`
+- Field projection: `?fields=id,name,role`
+
+The next page cursor is returned in the `X-Next-Cursor` header (plus an RFC 8288
+`Link: <...>; rel="next"` header) so list responses keep their plain JSON array shape.
+"""
+
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import literal_column
+from typing import Iterable, List, Optional, Set, Type
+import os
+
+# Page size when the client does not ask for one, and the hard upper bound
+DEFAULT_PAGE_SIZE = int(os.environ.get("API_DEFAULT_PAGE_SIZE", "1000"))
+MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", "5000"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Common query parameters for paginated list endpoints (use with Depends())."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Set[str]]:
+    """Validate a `fields=` projection against a response schema. Always keeps `id`."""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    allowed = set(schema.model_fields) | set(schema.model_computed_fields)
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return requested | {"id"}
+
+
+def paginate(query, model, page: PageParams) -> tuple:
+    """
+    Apply keyset pagination on the table's rowid to a SQLAlchemy query.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+
+    Ids are random uuid4s, so paging on them would shuffle the lists. The rowid
+    keeps insertion order, which is what the unpaginated endpoints returned.
+    """
+    rowid = literal_column(f"{model.__tablename__}.rowid")
+    if page.cursor:
+        try:
+            after = int(page.cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(rowid > after)
+    rows = query.add_columns(rowid).order_by(rowid).limit(page.limit + 1).all()
+    next_cursor = str(rows[page.limit - 1][1]) if len(rows) > page.limit else None
+    return [row[0] for row in rows[:page.limit]], next_cursor
+
+
+def page_response(
+    rows: List,
+    next_cursor: Optional[str],
+    schema: Type[BaseModel],
+    fields: Optional[Iterable[str]],
+    request: Request,
+    response: Response,
+):
+    """
+    Return the page for a list endpoint, setting pagination headers.
+    Without a projection the ORM rows are returned as-is for the route's response_model.
+    """
+    headers = {}
+    etag = getattr(request.state, "etag", None)
+    if etag:
+        # Set by etags.etag_for() on conditional-GET routes
+        headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    if fields is None:
+        response.headers.update(headers)
+        return rows
+
+    include = set(fields)
+    content = [schema.model_validate(r).model_dump(mode="json", include=include) for r in rows]
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
@@ -0,0 +1,86 @@
+"""
+Read queries for the list endpoints.
+
+Plain functions over a sync Session so the same code serves the sync routes in
+main.py and the async routes in async_routes.py (via AsyncSession.run_sync).
+Each returns (rows, next_cursor) as produced by pagination.paginate().
+"""
+
+from typing import Optional, Set
+from uuid import UUID
+from sqlalchemy.orm import Session
+
+import models
+from pagination import PageParams, paginate
+from staffing import attach_staffing
+
+STAFFING_FIELDS = {"total_hours_required", "total_hours_allocated", "is_fully_staffed", "role_staffing"}
+# Tables a project list response is built from (projects plus its staffing metrics), for its ETag
+PROJECT_TABLES = ("projects", "resourcing_requirements", "allocations", "engineers")
+
+
+def list_requirements(db: Session, page: PageParams, project_id: Optional[UUID] = None, role: Optional[str] = None):
+    query = db.query(models.ResourcingRequirement)
+    if project_id:
+        query = query.filter(models.ResourcingRequirement.project_id == str(project_id))
+    if role:
+        query = query.filter(models.ResourcingRequirement.role == role)
+    return paginate(query, models.ResourcingRequirement, page)
+
+
+def list_engineers(db: Session, page: PageParams, role: Optional[models.RoleEnum] = None):
+    query = db.query(models.Engineer)
+    if role:
+        query = query.filter(models.Engineer.role == role)
+    return paginate(query, models.Engineer, page)
+
+
+def list_projects(
+    db: Session,
+    page: PageParams,
+    fields: Optional[Set[str]] = None,
+    fiscal_year: Optional[str] = None,
+    workflow_status: Optional[models.WorkflowStatusEnum] = None
+):
+    query = db.query(models.Project)
+    if fiscal_year:
+        query = query.filter(models.Project.fiscal_year == fiscal_year)
+    if workflow_status:
+        query = query.filter(models.Project.workflow_status == workflow_status)
+
+    db_projects, next_cursor = paginate(query, models.Project, page)
+
+    # Enrich projects with staffing metrics for EPIC-002 (grouped queries, no per-project lazy loads)
+    if fields is None or fields & STAFFING_FIELDS:
+        attach_staffing(db, db_projects)
+
+    return db_projects, next_cursor
+
+
+def list_allocations(
+    db: Session,
+    page: PageParams,
+    engineer_id: Optional[UUID] = None,
+    project_id: Optional[UUID] = None,
+    category: Optional[models.CategoryEnum] = None,
+    day: Optional[models.DayEnum] = None
+):
+    query = db.query(models.Allocation)
+    if engineer_id:
+        query = query.filter(models.Allocation.engineer_id == str(engineer_id))
+    if project_id:
+        query = query.filter(models.Allocation.project_id == str(project_id))
+    if category:
+        query = query.filter(models.Allocation.category == category)
+    if day:
+        query = query.filter(models.Allocation.day == day)
+    return paginate(query, models.Allocation, page)
+
+
+def list_devices(db: Session, page: PageParams, project_id: Optional[UUID] = None, device_type: Optional[str] = None):
+    query = db.query(models.ProjectDevice)
+    if project_id:
+        query = query.filter(models.ProjectDevice.project_id == str(project_id))
+    if device_type:
+        query = query.filter(models.ProjectDevice.device_type == device_type)
+    return paginate(query, models.ProjectDevice, page)
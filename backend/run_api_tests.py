@@ -2,11 +2,22 @@
 import requests
 import unittest
 import json
+import threading
 import time
+import uuid
 
 import os
 
 BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8001/api")
+ADMIN_USERNAME = os.getenv("API_ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("API_ADMIN_PASSWORD", "changeme")
+# Must match the server's CAPACITY_POLICY; run the suite once per policy
+CAPACITY_POLICY = os.getenv("CAPACITY_POLICY", "warn").lower()
+
+def admin_headers():
+    res = requests.post(f"{BASE_URL}/auth/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    assert res.status_code == 200, f"Admin login failed: {res.text}"
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
 
 class TestResourceManagerAPI(unittest.TestCase):
     def setUp(self):
@@ -141,5 +152,322 @@ class TestResourceManagerAPI(unittest.TestCase):
         self.assertEqual(res.status_code, 200)
         print("Allocation Deleted")
 
+    def test_04_list_order(self):
+        print("\nTesting List Order...")
+        # Lists come back in creation order, as before pagination; App.jsx selects the first project
+        created = []
+        for i in range(5):
+            res = requests.post(f"{BASE_URL}/projects", json={"name": f"Order Proj {i}", "priority": "P3-Standard", "status": "Healthy"})
+            self.assertEqual(res.status_code, 200)
+            created.append(res.json()["id"])
+
+        res = requests.get(f"{BASE_URL}/projects")
+        self.assertEqual(res.status_code, 200)
+        listed = [p["id"] for p in res.json()]
+        self.assertEqual([pid for pid in listed if pid in created], created)
+
+        # Paging through with small pages gives the same order
+        paged, cursor = [], None
+        while True:
+            params = {"limit": 2, "fields": "id", **({"cursor": cursor} if cursor else {})}
+            res = requests.get(f"{BASE_URL}/projects", params=params)
+            self.assertEqual(res.status_code, 200)
+            paged += [p["id"] for p in res.json()]
+            cursor = res.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        self.assertEqual(paged, listed)
+        print("List Order Verified")
+
+    def test_05_conditional_get(self):
+        print("\nTesting Conditional GET...")
+        res = requests.get(f"{BASE_URL}/engineers")
+        self.assertEqual(res.status_code, 200)
+        etag = res.headers["ETag"]
+        self.assertEqual(res.headers["Cache-Control"], "no-cache")
+
+        res = requests.get(f"{BASE_URL}/engineers", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers["ETag"], etag)
+        self.assertEqual(res.content, b"")
+        res = requests.get(f"{BASE_URL}/engineers", headers={"If-None-Match": f"W/{etag}"})
+        self.assertEqual(res.status_code, 304)
+
+        # Another query string is another representation
+        res = requests.get(f"{BASE_URL}/engineers", params={"fields": "id"}, headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+
+        # A write makes the old ETag stale
+        eng = requests.post(f"{BASE_URL}/engineers", json={"name": "ETag Eng", "role": "Architect", "total_capacity": 40})
+        self.assertEqual(eng.status_code, 200)
+        res = requests.get(f"{BASE_URL}/engineers", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+        self.assertIn(eng.json()["id"], [e["id"] for e in res.json()])
+
+        # Projects carry staffing metrics, so an allocation write changes their ETag too
+        proj = requests.post(f"{BASE_URL}/projects", json={"name": "ETag Proj", "priority": "P3-Standard", "status": "Healthy"})
+        etag = requests.get(f"{BASE_URL}/projects").headers["ETag"]
+        requests.post(f"{BASE_URL}/projects/{proj.json()['id']}/allocations", json={"engineer_id": eng.json()["id"], "hours_per_week": 10})
+        res = requests.get(f"{BASE_URL}/projects", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+        print("Conditional GET Verified")
+
+    def test_06_audit_count_by_resource(self):
+        print("\nTesting Audit Count By Resource...")
+        headers = admin_headers()
+        payload = {"name": "Audit Eng", "role": "Architect", "total_capacity": 40}
+        eng_id = requests.post(f"{BASE_URL}/engineers", json=payload).json()["id"]
+        for capacity in (30, 20):
+            requests.put(f"{BASE_URL}/engineers/{eng_id}", json={**payload, "total_capacity": capacity})
+        other_id = requests.post(f"{BASE_URL}/engineers", json=payload).json()["id"]
+
+        # Audit events are written in batches: wait for them to land
+        for _ in range(50):
+            res = requests.get(f"{BASE_URL}/audit/logs/count", params={"resource_id": eng_id}, headers=headers)
+            self.assertEqual(res.status_code, 200, res.text)
+            if res.json()["count"] == 3:
+                break
+            time.sleep(0.1)
+        self.assertEqual(res.json()["count"], 3)
+
+        res = requests.get(f"{BASE_URL}/audit/logs/count", params={"resource_id": eng_id, "action": "UPDATE"}, headers=headers)
+        self.assertEqual(res.json()["count"], 2)
+        res = requests.get(f"{BASE_URL}/audit/logs/count", params={"resource_id": other_id}, headers=headers)
+        self.assertEqual(res.json()["count"], 1)
+        res = requests.get(f"{BASE_URL}/audit/logs/count", params={"resource_id": eng_id, "until": "2000-01-01"}, headers=headers)
+        self.assertEqual(res.json()["count"], 0)
+        print("Audit Count By Resource Verified")
+
+    def test_07_dashboard_summary(self):
+        print("\nTesting Dashboard Summary...")
+        # Other tests share the database: compare against the summary before seeding
+        before = requests.get(f"{BASE_URL}/dashboard/summary").json()
+        before_net = requests.get(f"{BASE_URL}/dashboard/summary", params={"team": "Network"}).json()
+
+        tag = uuid.uuid4().hex[:8]
+        fy = f"FY{tag}"
+        for name, role, capacity, ktlo in (("A", "Network Engineer", 40, 10), ("B", "Network Engineer", 20, 0), ("W", "Wireless Engineer", 40, 0)):
+            res = requests.post(f"{BASE_URL}/engineers", json={"name": f"KPI {name} {tag}", "role": role, "total_capacity": capacity, "ktlo_tax": ktlo})
+            self.assertEqual(res.status_code, 200, res.text)
+        projects = {}
+        for name, status, device_count in (("Active", "Active", 12), ("Done", "Complete", 5)):
+            res = requests.post(f"{BASE_URL}/projects", json={
+                "name": f"KPI {name} {tag}", "priority": "P3-Standard", "status": "Healthy",
+                "workflow_status": status, "fiscal_year": fy, "device_count": device_count
+            })
+            self.assertEqual(res.status_code, 200, res.text)
+            self.assertEqual(res.json()["workflow_status"], status)
+            projects[name] = res.json()["id"]
+
+        # B: 24h against 20h is over capacity and has a Tuesday meeting; W's hours are on a Complete project
+        csv = "engineer,project,hours,category,day\n" + "\n".join(
+            f"KPI {eng} {tag},KPI {proj} {tag},{hours},{category},{day}" for eng, proj, hours, category, day in (
+                ("A", "Active", 20, "Project Work", "Mon"),
+                ("B", "Active", 16, "Project Work", "Mon"),
+                ("B", "Active", 8, "Meetings", "Tue"),
+                ("W", "Done", 30, "Project Work", "Mon"),
+            )
+        )
+        res = requests.post(f"{BASE_URL}/import/allocations", files={"file": ("allocations.csv", csv, "text/csv")})
+        self.assertEqual(res.status_code, 200, res.text)
+        self.assertEqual(res.json()["imported"], 4, res.text)
+        res = requests.post(f"{BASE_URL}/projects/{projects['Active']}/requirements", json={"role": "Network Engineer", "hours_per_week": 40})
+        self.assertEqual(res.status_code, 200, res.text)
+        for project, device_type, current, proposed in (("Active", "AP", 3, 10), ("Done", "AP", 1, 4), ("Done", "Switch", 0, 6)):
+            res = requests.post(f"{BASE_URL}/projects/{projects[project]}/devices",
+                                json={"device_type": device_type, "current_qty": current, "proposed_qty": proposed})
+            self.assertEqual(res.status_code, 200, res.text)
+
+        after = requests.get(f"{BASE_URL}/dashboard/summary").json()
+        team, was = after["team"], before["team"]
+        self.assertEqual(team["engineer_count"] - was["engineer_count"], 3)
+        self.assertEqual(team["effective_capacity"] - was["effective_capacity"], 30 + 20 + 40)
+        self.assertEqual(team["allocated_hours"] - was["allocated_hours"], 44)
+        self.assertEqual(team["utilization_pct"], round(team["allocated_hours"] * 100 / team["effective_capacity"]))
+        self.assertEqual(team["over_capacity_engineers"] - was["over_capacity_engineers"], 1)
+
+        net = requests.get(f"{BASE_URL}/dashboard/summary", params={"team": "Network"}).json()["team"]
+        self.assertEqual(net["effective_capacity"] - before_net["team"]["effective_capacity"], 50)
+        self.assertEqual(net["allocated_hours"] - before_net["team"]["allocated_hours"], 44)
+        self.assertEqual(net["over_capacity_engineers"] - before_net["team"]["over_capacity_engineers"], 1)
+
+        deep_work = after["deep_work"]
+        self.assertEqual(deep_work["checked_engineers"] - before["deep_work"]["checked_engineers"], 3)
+        self.assertEqual(deep_work["compliant_engineers"] - before["deep_work"]["compliant_engineers"], 2)
+        self.assertEqual(deep_work["compliance_pct"], round(deep_work["compliant_engineers"] * 100 / deep_work["checked_engineers"]))
+
+        self.assertEqual(after["lifecycle"]["Active"] - before["lifecycle"]["Active"], 1)
+        self.assertEqual(after["lifecycle"]["Complete"] - before["lifecycle"]["Complete"], 1)
+        self.assertEqual(after["demand"]["required_hours"] - before["demand"]["required_hours"], 40)
+        self.assertEqual(after["demand"]["allocated_hours"] - before["demand"]["allocated_hours"], 44)
+        self.assertEqual(after["devices"]["current_qty"] - before["devices"]["current_qty"], 4)
+        self.assertEqual(after["devices"]["proposed_qty"] - before["devices"]["proposed_qty"], 20)
+        self.assertEqual(after["devices"]["net_change"], after["devices"]["proposed_qty"] - after["devices"]["current_qty"])
+        self.assertEqual(after["fiscal_impact"][fy], 17)
+        self.assertEqual(after["fiscal_refresh"][fy], {"AP": {"planned": 14, "completed": 4}, "Switch": {"planned": 6, "completed": 6}})
+        print("Dashboard Summary Verified")
+
+class TestCapacityPolicy(unittest.TestCase):
+    def setUp(self):
+        # Effective capacity 30h
+        eng = requests.post(f"{BASE_URL}/engineers", json={"name": "Capacity Eng", "role": "Network Engineer", "total_capacity": 40, "ktlo_tax": 10})
+        self.eng_id = eng.json()["id"]
+        proj = requests.post(f"{BASE_URL}/projects", json={"name": "Capacity Proj", "priority": "P3-Standard", "status": "Healthy"})
+        self.proj_id = proj.json()["id"]
+
+    def allocated_hours(self):
+        res = requests.get(f"{BASE_URL}/allocations", params={"engineer_id": self.eng_id})
+        return sum(a["hours"] for a in res.json())
+
+    def test_single_allocation_headers(self):
+        print(f"\nTesting Capacity Headers ({CAPACITY_POLICY})...")
+        res = requests.post(f"{BASE_URL}/projects/{self.proj_id}/allocations", json={"engineer_id": self.eng_id, "role": "Lead", "hours_per_week": 20})
+        self.assertEqual(res.status_code, 200, res.text)
+        self.assertEqual(res.headers["X-Engineer-Remaining-Capacity"], "10")
+        self.assertNotIn("X-Capacity-Warning", res.headers)
+        alloc_id = res.json()["id"]
+
+        res = requests.patch(f"{BASE_URL}/allocations/{alloc_id}", json={"hours_per_week": 35})
+        if CAPACITY_POLICY == "reject":
+            self.assertEqual(res.status_code, 409, res.text)
+            self.assertEqual(res.json()["detail"]["remaining_capacity"], -5)
+            self.assertEqual(self.allocated_hours(), 20)
+        else:
+            self.assertEqual(res.status_code, 200, res.text)
+            self.assertEqual(res.headers["X-Engineer-Remaining-Capacity"], "-5")
+            self.assertIn("5h", res.headers["X-Capacity-Warning"])
+            self.assertEqual(self.allocated_hours(), 35)
+
+        res = requests.delete(f"{BASE_URL}/allocations/{alloc_id}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["X-Engineer-Remaining-Capacity"], "30")
+        self.assertNotIn("X-Capacity-Warning", res.headers)
+        print("Capacity Headers Verified")
+
+    def test_batch_over_capacity(self):
+        print(f"\nTesting Batch Over Capacity ({CAPACITY_POLICY})...")
+        ops = [{"op": "create", "project_id": self.proj_id, "engineer_id": self.eng_id, "role": "Lead", "hours_per_week": 20}] * 2
+        res = requests.post(f"{BASE_URL}/allocations/batch", json={"operations": ops})
+        if CAPACITY_POLICY == "reject":
+            self.assertEqual(res.status_code, 409, res.text)
+            self.assertEqual(res.json()["detail"]["engineers"][0]["engineer_id"], self.eng_id)
+            self.assertEqual(self.allocated_hours(), 0)
+        else:
+            self.assertEqual(res.status_code, 200, res.text)
+            body = res.json()
+            self.assertEqual(len(body["created"]), 2)
+            self.assertEqual([(w["engineer_id"], w["remaining_capacity"]) for w in body["warnings"]], [(self.eng_id, -10)])
+            self.assertIn("Capacity Eng over capacity by 10h", res.headers["X-Capacity-Warning"])
+            self.assertEqual(self.allocated_hours(), 40)
+        print("Batch Over Capacity Verified")
+
+class TestAllocationBatch(unittest.TestCase):
+    def setUp(self):
+        # Effective capacity 30h
+        eng = requests.post(f"{BASE_URL}/engineers", json={"name": "Batch Eng", "role": "Architect", "total_capacity": 30})
+        self.eng_id = eng.json()["id"]
+        proj = requests.post(f"{BASE_URL}/projects", json={"name": "Batch Proj", "priority": "P3-Standard", "status": "Healthy"})
+        self.proj_id = proj.json()["id"]
+        res = requests.post(f"{BASE_URL}/projects/{self.proj_id}/allocations", json={"engineer_id": self.eng_id, "hours_per_week": 25})
+        self.alloc_id = res.json()["id"]
+
+    def batch(self, *operations):
+        return requests.post(f"{BASE_URL}/allocations/batch", json={"operations": list(operations)})
+
+    def create_op(self, hours, project_id=None):
+        return {"op": "create", "project_id": project_id or self.proj_id, "engineer_id": self.eng_id, "hours_per_week": hours}
+
+    def allocations(self):
+        res = requests.get(f"{BASE_URL}/allocations", params={"engineer_id": self.eng_id})
+        return sorted((a["id"], a["hours"]) for a in res.json())
+
+    def test_all_or_nothing(self):
+        print("\nTesting Batch Rollback...")
+        before = self.allocations()
+        # A valid create and update, then a delete of the same allocation twice
+        res = self.batch(
+            self.create_op(2),
+            {"op": "update", "id": self.alloc_id, "hours_per_week": 20},
+            {"op": "delete", "id": self.alloc_id},
+            {"op": "delete", "id": self.alloc_id},
+        )
+        self.assertEqual(res.status_code, 409, res.text)
+        self.assertEqual(self.allocations(), before)
+        print("Batch Rollback Verified")
+
+    def test_missing_rows(self):
+        print("\nTesting Batch Missing Rows...")
+        before = self.allocations()
+        missing = "00000000-0000-4000-8000-000000000000"
+        res = self.batch(self.create_op(2), {"op": "delete", "id": missing})
+        self.assertEqual(res.status_code, 404, res.text)
+        self.assertEqual(res.json()["detail"]["ids"], [missing])
+
+        res = self.batch(self.create_op(2), self.create_op(2, project_id=missing))
+        self.assertEqual(res.status_code, 404, res.text)
+        self.assertEqual(res.json()["detail"]["message"], "Project not found")
+        self.assertEqual(self.allocations(), before)
+        print("Batch Missing Rows Verified")
+
+    def test_operation_limit(self):
+        print("\nTesting Batch Size Limit...")
+        res = self.batch(*[self.create_op(2)] * 501)
+        self.assertEqual(res.status_code, 422, res.text)
+        res = self.batch(*[{"op": "update", "id": self.alloc_id, "hours_per_week": 25}] * 500)
+        self.assertEqual(res.status_code, 200, res.text)
+        print("Batch Size Limit Verified")
+
+    def test_capacity_replayed_in_order(self):
+        print("\nTesting Batch Capacity Replay...")
+        # Freeing the 25h first leaves room for a new 25h allocation: no warning under either policy
+        res = self.batch({"op": "delete", "id": self.alloc_id}, self.create_op(25))
+        self.assertEqual(res.status_code, 200, res.text)
+        body = res.json()
+        self.assertEqual(body["warnings"], [])
+        self.assertNotIn("X-Capacity-Warning", res.headers)
+        self.assertEqual(body["deleted"], [self.alloc_id])
+        self.assertEqual([a[1] for a in self.allocations()], [25])
+
+        # Lowering an engineer who is already over capacity is always allowed
+        new_id = body["created"][0]["id"]
+        requests.put(f"{BASE_URL}/engineers/{self.eng_id}", json={"name": "Batch Eng", "role": "Architect", "total_capacity": 10})
+        res = self.batch({"op": "update", "id": new_id, "hours_per_week": 20})
+        self.assertEqual(res.status_code, 200, res.text)
+        self.assertEqual(res.json()["warnings"], [])
+        print("Batch Capacity Replay Verified")
+
+class TestLiveEvents(unittest.TestCase):
+    def test_restore_with_event_stream_open(self):
+        print("\nTesting Snapshot Restore With an Open Event Stream...")
+        headers = admin_headers()
+        res = requests.post(f"{BASE_URL}/snapshots/create", headers=headers)
+        self.assertEqual(res.status_code, 202, res.text)
+        job = res.json()
+        for _ in range(100):
+            job = requests.get(f"{BASE_URL}/snapshots/status/{job['job_id']}", headers=headers).json()
+            if job["status"] != "running":
+                break
+            time.sleep(0.1)
+        self.assertEqual(job["status"], "complete", job)
+
+        # Read the stream in the background, the way a board left open does
+        lines = []
+        stream = requests.get(f"{BASE_URL}/events", stream=True, timeout=30)
+        self.assertEqual(stream.status_code, 200)
+        reader = threading.Thread(target=lambda: lines.extend(stream.iter_lines(decode_unicode=True)), daemon=True)
+        reader.start()
+        time.sleep(0.5)
+
+        res = requests.post(f"{BASE_URL}/snapshots/restore/{job['filename']}", headers=headers)
+        self.assertEqual(res.status_code, 200, res.text)
+
+        # The server ends the stream with a reconnect event
+        reader.join(10)
+        self.assertFalse(reader.is_alive(), "Event stream still open after restore")
+        self.assertIn("event: reconnect", lines)
+        print("Restore Verified With Open Event Stream")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,654 @@
+"""
+Performance benchmarks for goodenough.to | Planning
+
+Each benchmark builds its own throwaway SQLite database in a temp DATA_DIR,
+so it never touches resource_manager.db.
+
+Usage:
+    python run_benchmarks.py                 # run all benchmarks
+    python run_benchmarks.py projects        # run one benchmark
+
+Requires httpx (used by FastAPI's TestClient and the load benchmark).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+# Point the app modules at a scratch database BEFORE importing them. Always a
+# fresh temp dir: reset_db() drops every table, so an inherited DATA_DIR (e.g.
+# /app/data in the container) must never be used. Load workers get their own
+# temp dir from the parent.
+if not os.environ.get("RM_BENCH_LOAD_WORKER"):
+    os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="rm_bench_")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event, insert, func
+from sqlalchemy.orm import sessionmaker
+
+import models
+import database
+import add_engineer_load_migration
+import add_project_staffing_migration
+import add_table_versions_migration
+import add_change_journal_migration
+
+ROLES = list(models.RoleEnum)
+
+
+def reset_db():
+    """Drop and recreate every table on the benchmark engine."""
+    models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+    add_engineer_load_migration.migrate(database.engine)
+    add_project_staffing_migration.migrate(database.engine)
+    add_table_versions_migration.migrate(database.engine)
+    add_change_journal_migration.migrate(database.engine)
+
+
+def seed(num_projects: int, engineers: int = 50, reqs_per_project: int = 3, allocs_per_project: int = 6):
+    """Insert a synthetic portfolio using executemany (fast, no ORM overhead)."""
+    eng_rows = [
+        {"id": str(uuid.uuid4()), "name": f"Engineer {i}", "role": ROLES[i % len(ROLES)], "total_capacity": 40, "ktlo_tax": 5}
+        for i in range(engineers)
+    ]
+    proj_rows, req_rows, alloc_rows = [], [], []
+    for i in range(num_projects):
+        pid = str(uuid.uuid4())
+        proj_rows.append({"id": pid, "name": f"Project {i}", "priority": models.PriorityEnum.P3})
+        for j in range(reqs_per_project):
+            req_rows.append({"id": str(uuid.uuid4()), "project_id": pid, "role": ROLES[j % len(ROLES)].value, "hours_per_week": 10})
+        for j in range(allocs_per_project):
+            alloc_rows.append({
+                "id": str(uuid.uuid4()), "project_id": pid, "engineer_id": eng_rows[(i + j) % engineers]["id"],
+                "category": models.CategoryEnum.PROJECT_WORK, "day": models.DayEnum.MON, "hours": 4
+            })
+    with database.engine.begin() as conn:
+        for model, rows in ((models.Engineer, eng_rows), (models.Project, proj_rows),
+                            (models.ResourcingRequirement, req_rows), (models.Allocation, alloc_rows)):
+            if rows:  # an empty executemany would run a single all-defaults INSERT
+                conn.execute(insert(model), rows)
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+# =============================================================================
+# Benchmarks
+# =============================================================================
+
+def bench_projects(sizes=(10, 100, 1000)):
+    """GET /api/projects: query count must stay flat as the portfolio grows."""
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    print("\n[projects] GET /api/projects staffing enrichment")
+    print(f"{'projects':>10} {'queries':>8} {'ms':>10}")
+    counts = []
+    for n in sizes:
+        reset_db()
+        seed(n)
+        with QueryCounter(database.engine) as qc:
+            start = time.perf_counter()
+            res = client.get("/api/projects", params={"limit": n})
+            elapsed = (time.perf_counter() - start) * 1000
+        assert res.status_code == 200 and len(res.json()) == n
+        counts.append(qc.count)
+        print(f"{n:>10} {qc.count:>8} {elapsed:>10.1f}")
+    assert len(set(counts)) == 1, f"Query count grows with project count: {counts}"
+    print("OK: query count is constant")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench_sqlite_concurrency(duration: float = 3.0, readers: int = 8):
+    """Readers vs. a record_audit writer: rollback journal vs. WAL tuning."""
+    from utils import record_audit
+
+    modes = {
+        "rollback (DELETE/FULL)": {"journal_mode": "DELETE", "synchronous": "FULL"},
+        "tuned (WAL/NORMAL)": {},
+    }
+    print(f"\n[sqlite] {readers} readers + 1 audit writer for {duration:.0f}s each")
+    print(f"{'mode':<24} {'reads':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'writes/s':>9}")
+    for label, overrides in modes.items():
+        path = os.path.join(tempfile.mkdtemp(prefix="rm_bench_sqlite_"), "bench.db")
+        bench_engine = database.create_sqlite_engine(f"sqlite:///{path}", **overrides)
+        models.Base.metadata.create_all(bind=bench_engine)
+        Session = sessionmaker(bind=bench_engine)
+        with bench_engine.begin() as conn:
+            conn.execute(insert(models.AuditLog), [
+                {"id": str(uuid.uuid4()), "action": "SEED", "resource_type": "Bench"} for _ in range(20000)
+            ])
+
+        stop = threading.Event()
+        latencies, writes = [], [0]
+
+        def writer():
+            db = Session()
+            try:
+                while not stop.is_set():
+                    record_audit(db, "UPDATE", "Bench", str(uuid.uuid4()), {"i": writes[0]})
+                    writes[0] += 1
+            finally:
+                db.close()
+
+        def reader():
+            db = Session()
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    db.query(func.count(models.AuditLog.id)).scalar()
+                    db.rollback()
+                    latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in threads:
+            t.join()
+        bench_engine.dispose()
+
+        print(f"{label:<24} {len(latencies):>8} {statistics.median(latencies):>8.2f} "
+              f"{percentile(latencies, 99):>8.2f} {max(latencies):>8.2f} {writes[0] / duration:>9.0f}")
+
+
+def bench_export(rows: int = 1_000_000):
+    """Streaming CSV export: time-to-first-byte and peak memory at 1M allocations."""
+    import export
+
+    reset_db()
+    seed(1000, allocs_per_project=0)
+    with database.engine.connect() as conn:
+        project_ids = [pid for (pid,) in conn.exec_driver_sql("SELECT id FROM projects")]
+        engineer_ids = [eid for (eid,) in conn.exec_driver_sql("SELECT id FROM engineers")]
+    batch = 50_000
+    with database.engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(insert(models.Allocation), [{
+                "id": str(uuid.uuid4()), "project_id": project_ids[i % len(project_ids)],
+                "engineer_id": engineer_ids[i % len(engineer_ids)],
+                "category": models.CategoryEnum.PROJECT_WORK, "day": models.DayEnum.MON, "hours": 4
+            } for i in range(start, min(start + batch, rows))])
+
+    print(f"\n[export] /api/export/allocations with {rows:,} rows")
+    print(f"{'mode':<10} {'TTFB ms':>9} {'total s':>8} {'MB out':>8} {'peak MB':>8}")
+    for label, compress in (("plain", False), ("gzip", True)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        chunks = export.allocation_rows()
+        if compress:
+            chunks = export.gzip_stream(chunks)
+        first_byte, size = None, 0
+        for chunk in chunks:
+            if first_byte is None:
+                first_byte = (time.perf_counter() - start) * 1000
+            size += len(chunk)
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<10} {first_byte:>9.1f} {total:>8.1f} {size / 1e6:>8.1f} {peak / 1e6:>8.1f}")
+
+
+def bench_import(rows: int = 50_000):
+    """CSV imports: batched duplicate checks / name resolution + bulk insert."""
+    from fastapi.testclient import TestClient
+    import main
+
+    reset_db()
+    seed(0, engineers=1000)
+    client = TestClient(main.app)
+    # Every 10th row collides with an existing engineer
+    lines = ["name,role,total_capacity,ktlo_tax"]
+    lines += [f"{'Engineer' if i % 10 == 0 else 'Import'} {i},Wireless Engineer,40,4" for i in range(rows)]
+    body = "\n".join(lines).encode()
+
+    print(f"\n[import] POST /api/import/engineers with {rows:,} rows")
+    with QueryCounter(database.engine) as qc:
+        res = client.post("/api/import/engineers", files={"file": ("engineers.csv", body, "text/csv")})
+    result = res.json()
+    assert res.status_code == 200, result
+    print(f"imported={result['imported']:,} skipped={result['skipped']:,} queries={qc.count} "
+          f"{result['duration_ms']} ms ({result['rows_per_second']:,.0f} rows/s)")
+    assert result["imported"] + result["skipped"] == rows
+
+    # Quarterly re-plan: allocations resolved by engineer/project name
+    seed(200, engineers=0, reqs_per_project=0, allocs_per_project=0)
+    lines = ["engineer,project,hours,category,day"]
+    names = [f"Import {i}" for i in range(1000) if i % 10]
+    lines += [f"{names[i % len(names)]},Project {i % 200},4,Project Work,Tue" for i in range(rows)]
+    body = "\n".join(lines).encode()
+    print(f"[import] POST /api/import/allocations with {rows:,} rows")
+    with QueryCounter(database.engine) as qc:
+        res = client.post("/api/import/allocations", files={"file": ("allocations.csv", body, "text/csv")})
+    result = res.json()
+    assert res.status_code == 200, result
+    print(f"imported={result['imported']:,} skipped={result['skipped']:,} queries={qc.count} "
+          f"{result['duration_ms']} ms ({result['rows_per_second']:,.0f} rows/s)")
+    assert result["imported"] == rows, result["errors"]
+
+
+def bench_auth_cache(requests_total: int = 20000):
+    """auth.get_current_user: token cache skips JWT verification and the user lookup."""
+    from fastapi.security import HTTPAuthorizationCredentials
+    import auth
+
+    reset_db()
+    Session = sessionmaker(bind=database.engine)
+    db = Session()
+    user = models.User(username="bench", password_hash="x", role="admin")
+    db.add(user)
+    db.commit()
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=auth.create_access_token(user.id, user.username, user.role)
+    )
+
+    # Called directly: through TestClient, per-request overhead would hide the difference
+    print(f"\n[auth-cache] get_current_user x {requests_total:,}")
+    print(f"{'cache':<8} {'queries':>8} {'us/call':>8}")
+    for label, size in (("off", 0), ("on", auth.AUTH_CACHE_SIZE)):
+        auth.token_cache = auth.TokenCache(maxsize=size)
+        with QueryCounter(database.engine) as qc:
+            start = time.perf_counter()
+            for _ in range(requests_total):
+                db.close()  # a fresh request session each time, as get_db provides
+                assert auth.get_current_user(credentials, db).role == "admin"
+            elapsed = time.perf_counter() - start
+        print(f"{label:<8} {qc.count:>8} {elapsed * 1e6 / requests_total:>8.1f}")
+    print(auth.token_cache.stats())
+    db.close()
+
+
+def bench_login_storm(logins: int = 30, login_clients: int = 30, readers: int = 4):
+    """Login throughput and concurrent GET latency: bcrypt on a bounded pool vs unbounded."""
+    import httpx
+    import auth
+    import main
+
+    reset_db()
+    seed(50)
+    Session = sessionmaker(bind=database.engine)
+    with Session() as db:
+        db.add(models.User(username="bench", password_hash=auth.hash_password("pw"), role="engineer"))
+        db.commit()
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            done = asyncio.Event()
+            counts = {"ok": 0, "rejected": 0}
+            latencies = []
+
+            async def login_client():
+                while counts["ok"] < logins:
+                    res = await client.post("/api/auth/login", json={"username": "bench", "password": "pw"})
+                    if res.status_code == 429:
+                        counts["rejected"] += 1
+                        await asyncio.sleep(float(res.headers["retry-after"]) / 10)
+                    else:
+                        assert res.status_code == 200, res.text
+                        counts["ok"] += 1
+                done.set()
+
+            async def reader():
+                while not done.is_set():
+                    start = time.perf_counter()
+                    assert (await client.get("/api/engineers")).status_code == 200
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(login_client() for _ in range(login_clients)), *(reader() for _ in range(readers)))
+            return counts, time.perf_counter() - start, latencies
+
+    print(f"\n[login-storm] {logins} logins from {login_clients} clients (bcrypt rounds={auth.BCRYPT_ROUNDS}) "
+          f"+ {readers} clients polling GET /api/engineers")
+    print(f"{'hash pool':<14} {'logins/s':>9} {'429s':>6} {'GETs':>6} {'GET p50':>8} {'GET p99':>8}")
+    for label, workers, queue in (("unbounded", login_clients, login_clients), ("2 + queue 4", 2, 4)):
+        auth.password_pool = auth.PasswordHasherPool(workers, queue)
+        counts, elapsed, latencies = asyncio.run(run())
+        print(f"{label:<14} {counts['ok'] / elapsed:>9.1f} {counts['rejected']:>6} {len(latencies):>6} "
+              f"{statistics.median(latencies):>8.1f} {percentile(latencies, 99):>8.1f}")
+
+
+def bench_audit_writer(requests_total: int = 500):
+    """Audited PUT /api/engineers: commit per audit event vs batched audit writer."""
+    from fastapi.testclient import TestClient
+    from audit_writer import audit_writer
+    import main
+
+    print(f"\n[audit] {requests_total} audited PUT /api/engineers/{{id}}")
+    print(f"{'audit':<8} {'commits':>8} {'ms/req':>8} {'rows':>6}")
+    commits = [0]
+
+    def on_commit(conn):
+        commits[0] += 1
+
+    event.listen(database.engine, "commit", on_commit)
+    for label, batched in (("sync", False), ("batched", True)):
+        reset_db()
+        client = TestClient(main.app)
+        engineer = client.post("/api/engineers", json={"name": "A", "role": "Architect"}).json()
+        if batched:
+            audit_writer.start()
+        commits[0] = 0
+        start = time.perf_counter()
+        for i in range(requests_total):
+            client.put(f"/api/engineers/{engineer['id']}", json={"name": f"A{i}", "role": "Architect"})
+        elapsed = time.perf_counter() - start
+        audit_writer.stop()
+        with database.engine.connect() as conn:
+            rows = conn.execute(func.count(models.AuditLog.id).select()).scalar()
+        print(f"{label:<8} {commits[0]:>8} {elapsed * 1000 / requests_total:>8.2f} {rows:>6}")
+    event.remove(database.engine, "commit", on_commit)
+
+
+def bench_audit_archive(rows: int = 200_000, days: int = 365):
+    """Audit archival: hot DB size and audit page latency before/after archiving."""
+    from datetime import datetime, timedelta
+    from fastapi.testclient import TestClient
+    from audit_writer import insert_audit_rows
+    from auth import create_access_token
+    import audit_archive
+    import main
+
+    reset_db()
+    now = datetime.utcnow()
+    with database.engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": "bench", "username": "bench", "password_hash": "x", "role": "admin"}])
+        for offset in range(0, rows, 10_000):
+            insert_audit_rows(conn, [
+                {"id": str(uuid.uuid4()), "timestamp": now - timedelta(seconds=(offset + i) * days * 86400 // rows),
+                 "username": f"user{i % 20}", "action": "UPDATE", "resource_type": "project",
+                 "resource_id": str(i % 500), "details": "{}", "ip_address": None}
+                for i in range(10_000)
+            ])
+    client = TestClient(main.app)
+    headers = {"Authorization": f"Bearer {create_access_token('bench', 'bench', 'admin')}"}
+    db_path = os.path.join(database.DATA_DIR, "resource_manager.db")
+
+    def report(label):
+        with database.engine.begin() as conn:
+            conn.exec_driver_sql("VACUUM")
+            live = conn.execute(func.count(models.AuditLog.id).select()).scalar()
+        timings = []
+        for params in ({"limit": 100}, {"limit": 100, "username": "user7"}, {"limit": 100, "until": (now - timedelta(days=300)).isoformat()}):
+            start = time.perf_counter()
+            assert client.get("/api/audit/logs", params=params, headers=headers).status_code == 200
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<10} {live:>8} {os.path.getsize(db_path) / 1e6:>8.1f} " + " ".join(f"{t:>9.1f}" for t in timings))
+
+    print(f"\n[audit-archive] {rows} audit events over {days} days, archive after {audit_archive.AUDIT_RETENTION_DAYS}")
+    print(f"{'':<10} {'live':>8} {'db MB':>8} {'newest ms':>9} {'user ms':>9} {'old ms':>9}")
+    report("before")
+    start = time.perf_counter()
+    audit_archive.archive_audit_logs()
+    elapsed = time.perf_counter() - start
+    report("after")
+    archive_mb = sum(os.path.getsize(audit_archive.archive_path(m)) for m in audit_archive.archived_months()) / 1e6
+    print(f"archived in {elapsed:.1f}s into {len(audit_archive.archived_months())} files, {archive_mb:.1f} MB")
+
+
+def bench_engineer_load(engineers: int = 2000, allocations: int = 200_000, repeats: int = 20):
+    """Capacity/burnout reads: engineer_load summary vs scanning allocations."""
+    import analytics
+    from add_engineer_load_migration import LOAD_QUERY, check
+
+    reset_db()
+    seed(allocations // 10, engineers=engineers, allocs_per_project=10)
+    db = database.SessionLocal()
+    print(f"\n[engineer-load] {engineers} engineers, {allocations} allocations, ms per call")
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        return (time.perf_counter() - start) * 1000 / repeats
+
+    print(f"{'full allocation scan (rebuild query)':<40} {timed(lambda: db.connection().exec_driver_sql(LOAD_QUERY).all()):>8.1f}")
+    print(f"{'team_summary':<40} {timed(lambda: analytics.team_summary(db)):>8.1f}")
+    print(f"{'engineer_capacity':<40} {timed(lambda: analytics.engineer_capacity(db)):>8.1f}")
+    print(f"{'deep_work_report':<40} {timed(lambda: analytics.deep_work_report(db)):>8.1f}")
+    print(f"drift after seeding: {check()} row(s)")
+    db.close()
+
+
+def bench_sync(num_projects: int = 2000, changes: int = 50):
+    """Refresh after a few edits: reloading every collection vs /api/sync."""
+    from fastapi.testclient import TestClient
+    import main
+
+    reset_db()
+    seed(num_projects)
+    client = TestClient(main.app)
+    version = client.get("/api/sync").json()["version"]
+    with database.engine.begin() as conn:
+        conn.exec_driver_sql(f"UPDATE allocations SET hours = hours + 1 WHERE rowid IN (SELECT rowid FROM allocations LIMIT {changes})")
+    print(f"\n[sync] {num_projects} projects, refresh after {changes} allocation edits")
+
+    def get_all(path):
+        size, cursor = 0, None
+        while True:
+            res = client.get(path, params={"cursor": cursor} if cursor else {})
+            size += len(res.content)
+            if not (cursor := res.headers.get("X-Next-Cursor")):
+                return size
+
+    start = time.perf_counter()
+    size = sum(get_all(path) for path in ("/api/engineers", "/api/projects", "/api/allocations", "/api/requirements", "/api/devices"))
+    print(f"{'full reload':<12} {(time.perf_counter() - start) * 1000:>8.1f} ms {size / 1e3:>10.1f} KB")
+    start = time.perf_counter()
+    size = len(client.get("/api/sync", params={"since": version}).content)
+    print(f"{'sync delta':<12} {(time.perf_counter() - start) * 1000:>8.1f} ms {size / 1e3:>10.1f} KB")
+
+
+def bench_events(subscribers: int = 500, updates: int = 50):
+    """SSE fan-out: time from sending an allocation PATCH to every subscriber holding its event."""
+    import httpx
+    import uvicorn
+    import main
+    from events import broker
+
+    reset_db()
+    seed(10)
+    db = database.SessionLocal()
+    allocation_id = db.query(models.Allocation.id).first()[0]
+    db.close()
+
+    port = 8765
+    server = uvicorn.Server(uvicorn.Config(main.app, port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    base = f"http://127.0.0.1:{port}"
+
+    async def run():
+        received = [[] for _ in range(subscribers)]
+        limits = httpx.Limits(max_connections=subscribers + 10)
+        async with httpx.AsyncClient(base_url=base, timeout=None, limits=limits) as client:
+            async def subscriber(i):
+                async with client.stream("GET", "/api/events") as res:
+                    async for line in res.aiter_lines():
+                        if line.startswith("data:"):
+                            received[i].append(time.perf_counter())
+                            if len(received[i]) == updates:
+                                return
+
+            tasks = [asyncio.create_task(subscriber(i)) for i in range(subscribers)]
+            while broker.subscriber_count < subscribers:
+                await asyncio.sleep(0.05)
+            sent = []
+            for n in range(updates):
+                sent.append(time.perf_counter())
+                res = await client.patch(f"/api/allocations/{allocation_id}", json={"hours_per_week": n % 8 + 2})
+                assert res.status_code == 200, res.text
+                await asyncio.sleep(0.02)
+            await asyncio.wait_for(asyncio.gather(*tasks), 60)
+        lags = [(times[n] - sent[n]) * 1000 for times in received for n in range(updates)]
+        return statistics.median(lags), percentile(lags, 99), max(lags)
+
+    print(f"\n[events] {subscribers} SSE subscribers, {updates} allocation updates")
+    p50, p99, worst = asyncio.run(run())
+    print(f"PATCH sent -> event received: p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {worst:.1f} ms; evicted {broker.evicted}")
+    server.should_exit = True
+
+
+def bench_allocation_batch(moves: int = 200):
+    """A board re-plan: `moves` separate PATCH calls vs one /api/allocations/batch."""
+    from fastapi.testclient import TestClient
+    import main
+
+    reset_db()
+    seed(moves, engineers=moves)
+    client = TestClient(main.app)
+    db = database.SessionLocal()
+    allocation_ids = [a for (a,) in db.query(models.Allocation.id).limit(moves)]
+    db.close()
+    print(f"\n[allocation-batch] re-plan of {moves} allocations")
+
+    start = time.perf_counter()
+    for allocation_id in allocation_ids:
+        assert client.patch(f"/api/allocations/{allocation_id}", json={"hours_per_week": 3}).status_code == 200
+    print(f"{'separate PATCH calls':<22} {(time.perf_counter() - start) * 1000:>8.1f} ms")
+
+    start = time.perf_counter()
+    operations = [{"op": "update", "id": allocation_id, "hours_per_week": 2} for allocation_id in allocation_ids]
+    assert client.post("/api/allocations/batch", json={"operations": operations}).status_code == 200
+    print(f"{'one batch':<22} {(time.perf_counter() - start) * 1000:>8.1f} ms")
+
+
+def bench_load_index(engineers: int = 2000, allocations: int = 200_000, checks: int = 2000):
+    """Per-write capacity check: in-memory load index vs summing the engineer's allocations."""
+    from analytics import active_project
+    from load_index import load_index
+
+    reset_db()
+    seed(allocations // 10, engineers=engineers, allocs_per_project=10)
+    db = database.SessionLocal()
+    engineer_ids = [e for (e,) in db.query(models.Engineer.id)]
+    print(f"\n[load-index] {engineers} engineers, {allocations} allocations, us per check")
+
+    def timed(fn):
+        start = time.perf_counter()
+        for i in range(checks):
+            fn(engineer_ids[i % len(engineer_ids)])
+        return (time.perf_counter() - start) * 1e6 / checks
+
+    scan = lambda engineer_id: db.query(func.sum(models.Allocation.hours))\
+        .join(models.Project, models.Project.id == models.Allocation.project_id)\
+        .filter(models.Allocation.engineer_id == engineer_id, active_project).scalar()
+    load_index.lookup(db, engineer_ids[0])
+    print(f"{'sum of allocations':<22} {timed(scan):>8.1f}")
+    print(f"{'load index':<22} {timed(lambda engineer_id: load_index.lookup(db, engineer_id)):>8.1f}")
+    db.close()
+
+
+def _load_worker(concurrency: int, requests_total: int):
+    """Child process for bench_db_modes: drive the ASGI app in-process and report JSON."""
+    import httpx
+    import main
+
+    reset_db()
+    seed(200)
+    paths = ["/api/engineers", "/api/projects?limit=100", "/api/allocations?limit=200", "/api/dashboard/summary"]
+
+    async def run():
+        latencies = []
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Warm up: open one pooled connection per client so we measure steady state
+            await asyncio.gather(*(client.get(paths[0]) for _ in range(concurrency)))
+            queue = asyncio.Queue()
+            for i in range(requests_total):
+                queue.put_nowait(paths[i % len(paths)])
+
+            async def user():
+                while not queue.empty():
+                    path = queue.get_nowait()
+                    start = time.perf_counter()
+                    res = await client.get(path)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    assert res.status_code == 200, res.text
+
+            start = time.perf_counter()
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+            return latencies, time.perf_counter() - start
+
+    latencies, elapsed = asyncio.run(run())
+    print(json.dumps({
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+    }))
+
+
+def bench_db_modes(concurrency: int = 64, requests_total: int = 2000):
+    """Read endpoints under burst load: DB_MODE=sync (threadpool) vs DB_MODE=async (aiosqlite)."""
+    print(f"\n[db-modes] {requests_total} GETs, {concurrency} concurrent clients")
+    print(f"{'mode':<8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ("sync", "async"):
+        env = {**os.environ, "DB_MODE": mode, "DATA_DIR": tempfile.mkdtemp(prefix=f"rm_bench_{mode}_"),
+               "RM_BENCH_LOAD_WORKER": f"{concurrency},{requests_total}"}
+        out = subprocess.run([sys.executable, os.path.abspath(__file__)], env=env, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:<8} {result['rps']:>8.0f} {result['p50']:>8.1f} {result['p99']:>8.1f}")
+
+
+BENCHMARKS = {
+    "projects": bench_projects,
+    "sqlite": bench_sqlite_concurrency,
+    "db-modes": bench_db_modes,
+    "export": bench_export,
+    "import": bench_import,
+    "auth-cache": bench_auth_cache,
+    "login-storm": bench_login_storm,
+    "audit": bench_audit_writer,
+    "audit-archive": bench_audit_archive,
+    "engineer-load": bench_engineer_load,
+    "sync": bench_sync,
+    "events": bench_events,
+    "allocation-batch": bench_allocation_batch,
+    "load-index": bench_load_index,
+}
+
+
+if __name__ == "__main__":
+    if os.environ.get("RM_BENCH_LOAD_WORKER"):
+        _load_worker(*map(int, os.environ["RM_BENCH_LOAD_WORKER"].split(",")))
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", choices=[[]] + list(BENCHMARKS), help="benchmarks to run (default: all)")
+    args = parser.parse_args()
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -0,0 +1,112 @@
+"""
+Query plan tests: the hot per-project / per-engineer / audit queries must be
+served by the secondary indexes declared in models.py, not by full table scans.
+
+Runs against a throwaway SQLite database (never resource_manager.db):
+    python run_query_plan_tests.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+# Always a fresh, existing temp dir: setUpClass drops every table, so an
+# inherited DATA_DIR (e.g. /app/data in the container) must never be used
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="rm_plan_")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import tuple_
+
+import models
+from database import engine, SessionLocal
+
+
+class TestQueryPlans(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        models.Base.metadata.drop_all(bind=engine)
+        models.Base.metadata.create_all(bind=engine)
+        cls.db = SessionLocal()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+
+    def plan(self, query) -> list:
+        sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+        rows = self.db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        return [row[-1] for row in rows]
+
+    def assertUsesIndex(self, query, index_name, sorted_by_index=False):
+        plan = self.plan(query)
+        table = query.column_descriptions[0]["entity"].__tablename__
+        self.assertTrue(any(index_name in step for step in plan), f"{index_name} not used: {plan}")
+        self.assertNotIn(f"SCAN {table}", plan, f"Full table scan: {plan}")
+        if sorted_by_index:
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_impact_log_by_project(self):
+        q = self.db.query(models.ImpactLog)\
+            .filter(models.ImpactLog.project_id == "p1")\
+            .order_by(models.ImpactLog.date.desc())
+        self.assertUsesIndex(q, "ix_impact_logs_project_date", sorted_by_index=True)
+
+    def test_rid_log_by_project(self):
+        q = self.db.query(models.ProjectRidLog)\
+            .filter(models.ProjectRidLog.project_id == "p1")\
+            .order_by(models.ProjectRidLog.created_at.desc())
+        self.assertUsesIndex(q, "ix_project_rid_logs_project_created", sorted_by_index=True)
+
+    def test_allocations_by_project(self):
+        q = self.db.query(models.Allocation).filter(models.Allocation.project_id == "p1")
+        self.assertUsesIndex(q, "ix_allocations_project_category")
+
+    def test_allocations_by_engineer(self):
+        q = self.db.query(models.Allocation).filter(models.Allocation.engineer_id == "e1")
+        self.assertUsesIndex(q, "ix_allocations_engineer_day_category")
+
+    def test_allocations_by_engineer_day_category(self):
+        q = self.db.query(models.Allocation)\
+            .filter(models.Allocation.engineer_id == "e1")\
+            .filter(models.Allocation.day == models.DayEnum.TUE)\
+            .filter(models.Allocation.category == models.CategoryEnum.MEETINGS)
+        self.assertUsesIndex(q, "ix_allocations_engineer_day_category")
+
+    def test_requirements_by_project(self):
+        q = self.db.query(models.ResourcingRequirement).filter(models.ResourcingRequirement.project_id == "p1")
+        self.assertUsesIndex(q, "ix_resourcing_requirements_project_id")
+
+    def test_devices_by_project(self):
+        q = self.db.query(models.ProjectDevice).filter(models.ProjectDevice.project_id == "p1")
+        self.assertUsesIndex(q, "ix_project_devices_project_id")
+
+    def test_audit_log_recent(self):
+        q = self.db.query(models.AuditLog).order_by(models.AuditLog.timestamp.desc()).limit(100)
+        self.assertUsesIndex(q, "ix_audit_logs_timestamp", sorted_by_index=True)
+
+    def test_audit_log_by_resource_type(self):
+        q = self.db.query(models.AuditLog)\
+            .filter(models.AuditLog.resource_type == "Project")\
+            .order_by(models.AuditLog.timestamp.desc()).limit(100)
+        self.assertUsesIndex(q, "ix_audit_logs_resource_type_timestamp", sorted_by_index=True)
+
+    def test_audit_log_keyset_page_by_filter(self):
+        for column, index_name in (
+            (models.AuditLog.username, "ix_audit_logs_username_timestamp"),
+            (models.AuditLog.action, "ix_audit_logs_action_timestamp"),
+            (models.AuditLog.resource_id, "ix_audit_logs_resource_id_timestamp"),
+        ):
+            q = self.db.query(models.AuditLog)\
+                .filter(column == "x")\
+                .filter(tuple_(models.AuditLog.timestamp, models.AuditLog.id) < (datetime(2026, 1, 1), "id"))\
+                .order_by(models.AuditLog.timestamp.desc(), models.AuditLog.id.desc()).limit(100)
+            self.assertUsesIndex(q, index_name)
+
+    def test_engineer_by_name(self):
+        q = self.db.query(models.Engineer).filter(models.Engineer.name == "Jane")
+        self.assertUsesIndex(q, "ix_engineers_name")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Rollup trigger tests: after every kind of write the API (or a direct SQL delete) can make,
+the trigger-maintained engineer_load and project_staffing tables must match a full recompute.
+
+Runs the app in-process against a throwaway SQLite database (never resource_manager.db):
+    python run_rollup_tests.py
+
+Requires httpx (used by FastAPI's TestClient).
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# Always a fresh temp dir: the tests delete projects behind the API's back
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="rm_rollup_")
+os.environ["AUDIT_ARCHIVE_INTERVAL_HOURS"] = "0"
+os.environ["SYNC_COMPACT_INTERVAL_HOURS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import add_engineer_load_migration
+import add_project_staffing_migration
+import models
+from database import SessionLocal
+from main import app
+
+
+class TestRollups(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+        cls.client.__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+
+    def assertConsistent(self, step: str):
+        self.assertEqual(add_engineer_load_migration.check(), 0, f"engineer_load drifted after {step}")
+        self.assertEqual(add_project_staffing_migration.check(), [], f"project_staffing drifted after {step}")
+
+    # -- writes ---------------------------------------------------------------
+
+    def create_engineer(self, name="Rollup Eng", role="Network Engineer") -> str:
+        res = self.client.post("/api/engineers", json={"name": name, "role": role, "total_capacity": 40})
+        self.assertEqual(res.status_code, 200, res.text)
+        return res.json()["id"]
+
+    def create_project(self, name="Rollup Proj") -> str:
+        res = self.client.post("/api/projects", json={"name": name, "priority": "P3-Standard", "status": "Healthy",
+                                                      "workflow_status": "Active"})
+        self.assertEqual(res.status_code, 200, res.text)
+        return res.json()["id"]
+
+    def create_allocation(self, project_id: str, engineer_id: str, hours: int = 10) -> str:
+        res = self.client.post(f"/api/projects/{project_id}/allocations", json={"engineer_id": engineer_id, "hours_per_week": hours})
+        self.assertEqual(res.status_code, 200, res.text)
+        return res.json()["id"]
+
+    def patch(self, path: str, **body):
+        res = self.client.patch(path, json=body)
+        self.assertEqual(res.status_code, 200, res.text)
+
+    # -- tests ----------------------------------------------------------------
+
+    def test_engineer_load(self):
+        alice, bob = self.create_engineer("Load Alice"), self.create_engineer("Load Bob")
+        first, second = self.create_project("Load Proj A"), self.create_project("Load Proj B")
+
+        alloc_id = self.create_allocation(first, alice, 10)
+        other_id = self.create_allocation(first, bob, 6)
+        self.create_allocation(second, alice, 4)
+        self.assertConsistent("allocation create")
+
+        self.patch(f"/api/allocations/{alloc_id}", hours_per_week=16)
+        self.assertConsistent("allocation patch")
+
+        res = self.client.post("/api/allocations/batch", json={"operations": [
+            {"op": "update", "id": alloc_id, "project_id": second},
+            {"op": "update", "id": other_id, "project_id": second, "engineer_id": alice, "hours_per_week": 8},
+        ]})
+        self.assertEqual(res.status_code, 200, res.text)
+        self.assertConsistent("batch move")
+
+        # Complete takes the project's hours out of active_hours, reopening puts them back
+        self.patch(f"/api/projects/{second}", workflow_status="Complete")
+        self.assertConsistent("project completed")
+        self.patch(f"/api/projects/{second}", workflow_status="On Hold")
+        self.assertConsistent("project reopened")
+
+        res = self.client.put(f"/api/engineers/{alice}", json={"name": "Load Alice", "role": "Network Engineer",
+                                                               "total_capacity": 32, "ktlo_tax": 4})
+        self.assertEqual(res.status_code, 200, res.text)
+        self.assertConsistent("engineer capacity edit")
+
+        self.assertEqual(self.client.delete(f"/api/allocations/{alloc_id}").status_code, 200)
+        self.assertConsistent("allocation delete")
+
+        # No project delete endpoint: remove the row directly, leaving its allocations orphaned
+        db = SessionLocal()
+        try:
+            db.query(models.Project).filter(models.Project.id == second).delete()
+            db.commit()
+        finally:
+            db.close()
+        self.assertConsistent("project delete")
+
+        self.assertEqual(self.client.delete(f"/api/engineers/{alice}").status_code, 200)
+        self.assertConsistent("engineer delete")
+
+    def test_project_staffing(self):
+        alice, bob = self.create_engineer("Staff Alice"), self.create_engineer("Staff Bob", "Wireless Engineer")
+        project = self.create_project("Staff Proj")
+
+        res = self.client.post(f"/api/projects/{project}/requirements", json={"role": "Network Engineer", "hours_per_week": 20})
+        self.assertEqual(res.status_code, 200, res.text)
+        req_id = res.json()["id"]
+        self.client.post(f"/api/projects/{project}/requirements", json={"role": "Wireless Engineer", "hours_per_week": 10})
+        self.create_allocation(project, alice, 12)
+        self.create_allocation(project, bob, 8)
+        self.assertConsistent("requirement and allocation create")
+
+        self.patch(f"/api/requirements/{req_id}", role="Architect", hours_per_week=30)
+        self.assertConsistent("requirement role/hours update")
+
+        # Alice's hours move from the Network Engineer row to the Architect row
+        res = self.client.put(f"/api/engineers/{alice}", json={"name": "Staff Alice", "role": "Architect",
+                                                               "total_capacity": 40, "ktlo_tax": 0})
+        self.assertEqual(res.status_code, 200, res.text)
+        self.assertConsistent("engineer role change")
+
+        self.assertEqual(self.client.delete(f"/api/engineers/{bob}").status_code, 200)
+        self.assertConsistent("engineer delete")
+
+        # Allocations that arrive before their engineer (e.g. a partial restore) count under no role
+        # until the engineer row is inserted
+        db = SessionLocal()
+        try:
+            ghost = models.Engineer(name="Staff Ghost", role=models.RoleEnum.WIRELESS_ENGINEER)
+            ghost.id = "00000000-0000-4000-8000-000000000001"
+            db.add(models.Allocation(engineer_id=ghost.id, project_id=project, hours=6,
+                                     category=models.CategoryEnum.PROJECT_WORK, day=models.DayEnum.TUE))
+            db.commit()
+            self.assertConsistent("allocation for a missing engineer")
+            db.add(ghost)
+            db.commit()
+        finally:
+            db.close()
+        self.assertConsistent("engineer insert")
+
+        self.assertEqual(self.client.delete(f"/api/requirements/{req_id}").status_code, 200)
+        self.assertConsistent("requirement delete")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+"""
+Delta sync tests: a client that loads the collections once and then follows
+/api/sync must end up with exactly what a full reload returns.
+
+Runs the app in-process against a throwaway SQLite database (never resource_manager.db):
+    python run_sync_tests.py
+
+Requires httpx (used by FastAPI's TestClient).
+"""
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+# Always a fresh temp dir: the tests compact the journal and bump the epoch
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="rm_sync_")
+os.environ["AUDIT_ARCHIVE_INTERVAL_HOURS"] = "0"
+os.environ["SYNC_COMPACT_INTERVAL_HOURS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import add_table_versions_migration
+from main import app
+from sync import compact_journal
+
+# /api/sync collection name -> list endpoint
+COLLECTIONS = {
+    "engineers": "/api/engineers",
+    "projects": "/api/projects",
+    "allocations": "/api/allocations",
+    "requirements": "/api/requirements",
+}
+ROLES = ["Network Engineer", "Wireless Engineer", "Architect"]
+
+
+class TestSync(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+        cls.client.__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+
+    # -- client side ----------------------------------------------------------
+
+    def version(self) -> str:
+        res = self.client.get("/api/sync")
+        self.assertEqual(res.status_code, 200, res.text)
+        return res.json()["version"]
+
+    def full_load(self) -> dict:
+        state = {}
+        for name, path in COLLECTIONS.items():
+            res = self.client.get(path, params={"limit": 5000})
+            self.assertEqual(res.status_code, 200, res.text)
+            state[name] = {row["id"]: row for row in res.json()}
+        return state
+
+    def pull(self, state: dict, since: str, limit: int = 5000) -> str:
+        """Apply every change after `since` to `state`, following has_more; returns the new version."""
+        while True:
+            res = self.client.get("/api/sync", params={"since": since, "limit": limit})
+            self.assertEqual(res.status_code, 200, res.text)
+            body = res.json()
+            for name, rows in body["upserts"].items():
+                if name in state:
+                    state[name].update({row["id"]: row for row in rows})
+            for name, ids in body["deletes"].items():
+                for row_id in ids:
+                    state.get(name, {}).pop(row_id, None)
+            since = body["version"]
+            if not body["has_more"]:
+                return since
+
+    # -- writes ---------------------------------------------------------------
+
+    def create_engineer(self, name="Sync Eng") -> str:
+        res = self.client.post("/api/engineers", json={"name": name, "role": random.choice(ROLES), "total_capacity": 40})
+        self.assertEqual(res.status_code, 200, res.text)
+        return res.json()["id"]
+
+    def create_project(self, name="Sync Proj") -> str:
+        res = self.client.post("/api/projects", json={"name": name, "priority": "P3-Standard", "status": "Healthy"})
+        self.assertEqual(res.status_code, 200, res.text)
+        return res.json()["id"]
+
+    def create_allocation(self, project_id: str, engineer_id: str, hours: int = 10) -> str:
+        res = self.client.post(f"/api/projects/{project_id}/allocations", json={"engineer_id": engineer_id, "hours_per_week": hours})
+        self.assertEqual(res.status_code, 200, res.text)
+        return res.json()["id"]
+
+    # -- tests ----------------------------------------------------------------
+
+    def test_upserts_and_tombstones(self):
+        since = self.version()
+        eng_id = self.create_engineer()
+        proj_id = self.create_project()
+        alloc_id = self.create_allocation(proj_id, eng_id)
+
+        res = self.client.get("/api/sync", params={"since": since})
+        body = res.json()
+        self.assertEqual([e["id"] for e in body["upserts"]["engineers"]], [eng_id])
+        self.assertEqual([a["id"] for a in body["upserts"]["allocations"]], [alloc_id])
+        # The allocation changed the project's staffing, so the project comes along
+        self.assertEqual(body["upserts"]["projects"][0]["total_hours_allocated"], 10)
+        self.assertFalse(body["has_more"])
+
+        since = body["version"]
+        self.assertEqual(self.client.delete(f"/api/allocations/{alloc_id}").status_code, 200)
+        body = self.client.get("/api/sync", params={"since": since}).json()
+        self.assertEqual(body["deletes"]["allocations"], [alloc_id])
+        self.assertEqual(body["upserts"]["allocations"], [])
+        self.assertEqual(body["upserts"]["projects"][0]["total_hours_allocated"], 0)
+
+        # Nothing new: same version back, no changes
+        again = self.client.get("/api/sync", params={"since": body["version"]}).json()
+        self.assertEqual((again["version"], again["upserts"], again["deletes"]), (body["version"], {}, {}))
+
+    def test_randomized_changes_match_full_reload(self):
+        rng = random.Random(2024)
+        since = self.version()
+        state = self.full_load()
+        engineers = [self.create_engineer(f"Sync Eng {i}") for i in range(4)]
+        projects = [self.create_project(f"Sync Proj {i}") for i in range(4)]
+        allocations, requirements = [], []
+
+        for round_ in range(8):
+            for _ in range(25):
+                action = rng.random()
+                if action < 0.3 or not allocations:
+                    allocations.append(self.create_allocation(rng.choice(projects), rng.choice(engineers), rng.randint(2, 20)))
+                elif action < 0.45:
+                    res = self.client.patch(f"/api/allocations/{rng.choice(allocations)}", json={"hours_per_week": rng.randint(2, 20)})
+                    self.assertEqual(res.status_code, 200, res.text)
+                elif action < 0.55:
+                    alloc_id = allocations.pop(rng.randrange(len(allocations)))
+                    self.assertEqual(self.client.delete(f"/api/allocations/{alloc_id}").status_code, 200)
+                elif action < 0.7:
+                    res = self.client.post(f"/api/projects/{rng.choice(projects)}/requirements",
+                                           json={"role": rng.choice(ROLES), "hours_per_week": rng.randint(1, 40)})
+                    self.assertEqual(res.status_code, 200, res.text)
+                    requirements.append(res.json()["id"])
+                elif action < 0.8 and requirements:
+                    req_id = requirements.pop(rng.randrange(len(requirements)))
+                    self.assertEqual(self.client.delete(f"/api/requirements/{req_id}").status_code, 200)
+                elif action < 0.9:
+                    res = self.client.patch(f"/api/projects/{rng.choice(projects)}", json={"percent_complete": rng.randint(0, 100)})
+                    self.assertEqual(res.status_code, 200, res.text)
+                elif len(engineers) > 2:
+                    # Deleting an engineer also deletes their allocations
+                    eng_id = engineers.pop(rng.randrange(len(engineers)))
+                    self.assertEqual(self.client.delete(f"/api/engineers/{eng_id}").status_code, 200)
+                    allocations = [a for a in allocations if a in {row["id"] for row in self.client.get(
+                        "/api/allocations", params={"limit": 5000}).json()}]
+                else:
+                    engineers.append(self.create_engineer(f"Sync Eng {round_}"))
+
+            if round_ % 3 == 2:
+                # Dropping superseded entries must not change what clients see
+                compact_journal(retention_days=365)
+            since = self.pull(state, since, limit=rng.choice([1, 7, 5000]))
+            self.assertEqual(state, self.full_load(), f"round {round_}")
+
+    def test_compaction(self):
+        proj_id = self.create_project()
+        since = self.version()
+        for percent in range(5):
+            self.client.patch(f"/api/projects/{proj_id}", json={"percent_complete": percent})
+
+        result = compact_journal(retention_days=365)
+        self.assertGreaterEqual(result.superseded, 4)
+        self.assertEqual(result.expired, 0)
+        body = self.client.get("/api/sync", params={"since": since}).json()
+        self.assertEqual([p["percent_complete"] for p in body["upserts"]["projects"]], [4])
+
+        # Dropping entries by age moves the horizon past every version handed out so far
+        result = compact_journal(retention_days=-1)
+        self.assertEqual(result.remaining, 0)
+        self.assertEqual(self.client.get("/api/sync", params={"since": since}).status_code, 410)
+        current = self.version()
+        self.assertEqual(self.client.get("/api/sync", params={"since": current}).status_code, 200)
+
+    def test_expired_and_invalid_versions(self):
+        epoch, seq = self.version().split(".")
+        self.assertEqual(self.client.get("/api/sync", params={"since": f"{epoch}.{int(seq) + 1}"}).status_code, 410)
+        self.assertEqual(self.client.get("/api/sync", params={"since": "not-a-version"}).status_code, 400)
+
+        # A snapshot restore starts a new epoch: versions from before it are void
+        before = self.version()
+        add_table_versions_migration.new_epoch()
+        self.assertEqual(self.client.get("/api/sync", params={"since": before}).status_code, 410)
+        self.assertEqual(self.client.get("/api/sync", params={"since": self.version()}).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+In-process periodic maintenance tasks for goodenough.to | Planning
+
+Each PeriodicTask runs its function on a daemon thread: once when started,
+then every `interval_hours`. Tasks are started and stopped with the app (see
+main.py). An interval of 0 disables the task, e.g. for tests and benchmarks.
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval_hours: float, fn: Callable[[], Any]):
+        self.name = name
+        self.interval = interval_hours * 3600
+        self.fn = fn
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[datetime] = None
+        self.last_result: Any = None
+
+    def start(self):
+        if self.interval > 0 and not (self._thread and self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.last_result = self.fn()
+                self.last_run = datetime.utcnow()
+            except Exception as e:
+                print(f"{self.name.upper()} FAILED: {e}")
+            self._stop.wait(self.interval)
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, ConfigDict, computed_field, Field
 from uuid import UUID
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Optional, List, Literal, Union, Annotated
 from models import (
     RoleEnum, PriorityEnum, ProjectStatusEnum, CategoryEnum, DayEnum, 
     FeedbackStatusEnum, RagStatusEnum, WorkflowStatusEnum, RidTypeEnum, 
@@ -125,6 +125,30 @@ class ProjectAllocationUpdate(BaseModel):
     """Schema for updating allocation hours (US-11.10)"""
     hours_per_week: Optional[int] = Field(None, ge=2, le=40)
 
+# Allocation Batch Schemas (board re-plans)
+class AllocationBatchCreate(ProjectAllocationCreate):
+    op: Literal["create"]
+    project_id: UUID
+
+class AllocationBatchUpdate(ProjectAllocationUpdate):
+    """Change hours and/or move the allocation to another engineer or project"""
+    op: Literal["update"]
+    id: UUID
+    engineer_id: Optional[UUID] = None
+    project_id: Optional[UUID] = None
+
+class AllocationBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: UUID
+
+AllocationBatchOperation = Annotated[
+    Union[AllocationBatchCreate, AllocationBatchUpdate, AllocationBatchDelete],
+    Field(discriminator="op")
+]
+
+class AllocationBatch(BaseModel):
+    operations: List[AllocationBatchOperation] = Field(..., min_length=1, max_length=500)
+
 # Response Schemas
 class Engineer(EngineerBase):
     model_config = ConfigDict(from_attributes=True)
@@ -184,6 +208,20 @@ class Allocation(AllocationBase):
     model_config = ConfigDict(from_attributes=True)
     id: UUID
 
+class CapacityWarning(BaseModel):
+    engineer_id: UUID
+    name: str
+    effective_capacity: int
+    allocated_hours: int
+    remaining_capacity: int
+
+class AllocationBatchResult(BaseModel):
+    created: List[Allocation]
+    updated: List[Allocation]
+    deleted: List[UUID]
+    # Engineers the batch put over capacity (warn policy only)
+    warnings: List[CapacityWarning] = []
+
 class ImpactLog(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: UUID
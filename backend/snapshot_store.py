@@ -0,0 +1,199 @@
+"""
+Content-addressed snapshot store for goodenough.to | Planning
+
+A snapshot is stored as a manifest (JSON) listing the chunks of the database
+file in order. Each chunk is SNAPSHOT_CHUNK_PAGES database pages, named by the
+SHA-256 of its contents and compressed with zlib, so pages that did not change
+between snapshots are stored once. Retention decides which manifests to keep;
+chunks no manifest references any more are garbage-collected.
+
+Layout under the store root:
+    manifests/<name>.json
+    chunks/<hash[:2]>/<hash>
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set
+
+# Pages per chunk: smaller chunks deduplicate better but mean more files
+SNAPSHOT_CHUNK_PAGES = int(os.environ.get("SNAPSHOT_CHUNK_PAGES", "16"))
+SNAPSHOT_COMPRESSION_LEVEL = int(os.environ.get("SNAPSHOT_COMPRESSION_LEVEL", "6"))
+
+# Retention: the newest N snapshots, plus the newest snapshot of each of the last D days.
+# Pre-restore safety copies are retained separately.
+SNAPSHOT_KEEP_LAST = int(os.environ.get("SNAPSHOT_KEEP_LAST", "24"))
+SNAPSHOT_KEEP_DAILY = int(os.environ.get("SNAPSHOT_KEEP_DAILY", "7"))
+SNAPSHOT_KEEP_SAFETY = int(os.environ.get("SNAPSHOT_KEEP_SAFETY", "3"))
+
+SAFETY_PREFIX = "pre_restore_safety_"
+
+
+class SnapshotStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest_dir = os.path.join(root, "manifests")
+        self.chunk_dir = os.path.join(root, "chunks")
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        # Serialises writers against garbage collection
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Chunks
+    # -------------------------------------------------------------------------
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _put_chunk(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data, SNAPSHOT_COMPRESSION_LEVEL))
+            os.replace(tmp_path, path)
+        return digest
+
+    def _get_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def _chunk_size(self, digest: str) -> int:
+        return os.path.getsize(self._chunk_path(digest))
+
+    # -------------------------------------------------------------------------
+    # Manifests
+    # -------------------------------------------------------------------------
+
+    def _manifest_path(self, name: str) -> str:
+        return os.path.join(self.manifest_dir, f"{name}.json")
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self._manifest_path(name))
+
+    def manifests(self) -> List[dict]:
+        """All manifests, newest first."""
+        result = []
+        for f in os.listdir(self.manifest_dir):
+            if f.endswith(".json"):
+                with open(os.path.join(self.manifest_dir, f)) as fh:
+                    result.append(json.load(fh))
+        return sorted(result, key=lambda m: m["created_at"], reverse=True)
+
+    def put(self, name: str, db_path: str) -> dict:
+        """Chunk a (quiescent) SQLite file into the store under `name`."""
+        with sqlite3.connect(db_path) as conn:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        chunk_bytes = page_size * SNAPSHOT_CHUNK_PAGES
+
+        with self._lock:
+            chunks = []
+            size = 0
+            with open(db_path, "rb") as f:
+                for data in iter(lambda: f.read(chunk_bytes), b""):
+                    chunks.append(self._put_chunk(data))
+                    size += len(data)
+
+            manifest = {
+                "name": name,
+                "created_at": datetime.now().isoformat(),
+                "page_size": page_size,
+                "chunk_pages": SNAPSHOT_CHUNK_PAGES,
+                "size": size,
+                "chunks": chunks,
+            }
+            tmp_path = self._manifest_path(name) + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self._manifest_path(name))
+        return manifest
+
+    def materialize(self, name: str, dest_path: str):
+        """Reassemble snapshot `name` into a plain SQLite file at dest_path."""
+        with self._lock:
+            with open(self._manifest_path(name)) as f:
+                manifest = json.load(f)
+            with open(dest_path, "wb") as out:
+                for digest in manifest["chunks"]:
+                    out.write(self._get_chunk(digest))
+
+    # -------------------------------------------------------------------------
+    # Sizes, retention and garbage collection
+    # -------------------------------------------------------------------------
+
+    def usage(self, manifests: Optional[List[dict]] = None) -> Dict[str, dict]:
+        """
+        Per snapshot: logical bytes, physical (compressed) bytes it references, and
+        unique bytes that deleting it would free.
+        """
+        manifests = self.manifests() if manifests is None else manifests
+        refcount: Dict[str, int] = {}
+        for m in manifests:
+            for digest in set(m["chunks"]):
+                refcount[digest] = refcount.get(digest, 0) + 1
+
+        sizes = {digest: self._chunk_size(digest) for digest in refcount}
+        report = {}
+        for m in manifests:
+            digests = set(m["chunks"])
+            report[m["name"]] = {
+                "logical": m["size"],
+                "physical": sum(sizes[d] for d in digests),
+                "unique": sum(sizes[d] for d in digests if refcount[d] == 1),
+            }
+        return report
+
+    def physical_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._chunk_files())
+
+    def _chunk_files(self) -> Iterator[os.DirEntry]:
+        for bucket in os.scandir(self.chunk_dir):
+            if bucket.is_dir():
+                yield from (entry for entry in os.scandir(bucket.path) if entry.is_file())
+
+    def retained(self, manifests: List[dict]) -> Set[str]:
+        """Names kept by the retention policy (manifests newest first)."""
+        regular = [m for m in manifests if not m["name"].startswith(SAFETY_PREFIX)]
+        safety = [m for m in manifests if m["name"].startswith(SAFETY_PREFIX)]
+
+        keep = {m["name"] for m in regular[:SNAPSHOT_KEEP_LAST]}
+        keep |= {m["name"] for m in safety[:SNAPSHOT_KEEP_SAFETY]}
+        days = []
+        for m in regular:
+            day = m["created_at"][:10]
+            if day not in days:
+                if len(days) == SNAPSHOT_KEEP_DAILY:
+                    break
+                days.append(day)
+                keep.add(m["name"])
+        return keep
+
+    def apply_retention(self) -> List[str]:
+        """Delete manifests outside the retention policy, then unreferenced chunks."""
+        with self._lock:
+            manifests = self.manifests()
+            keep = self.retained(manifests)
+            evicted = [m["name"] for m in manifests if m["name"] not in keep]
+            for name in evicted:
+                os.remove(self._manifest_path(name))
+            self._collect_garbage([m for m in manifests if m["name"] in keep])
+        return evicted
+
+    def delete(self, name: str):
+        with self._lock:
+            os.remove(self._manifest_path(name))
+            self._collect_garbage(self.manifests())
+
+    def _collect_garbage(self, live_manifests: List[dict]):
+        live = {digest for m in live_manifests for digest in m["chunks"]}
+        for entry in self._chunk_files():
+            if entry.name not in live and not entry.name.endswith(".tmp"):
+                os.remove(entry.path)
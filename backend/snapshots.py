@@ -3,20 +3,38 @@ Snapshots module for goodenough.to | Planning
 US-0.3: Snapshot Restore
 
 This module provides functionality to Create, List, and Restore database snapshots.
-Uses SQLite's full database file copy for safety.
+Snapshots are taken with SQLite's online backup API, a few pages per step, in a
+background task; poll /api/snapshots/status/{job_id} for progress.
+Restores are applied to the live database without a server restart.
+
+Snapshots are kept in a deduplicated, compressed chunk store (snapshot_store.py)
+with a retention policy; plain .db files left by older versions are still listed
+and restorable.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 import os
-import shutil
+import sqlite3
+import threading
+import uuid
 from datetime import datetime
-from typing import List
+from typing import Callable, Dict, List, Optional
 from pydantic import BaseModel
 
 import models
-from database import get_db
-from auth import get_current_user, require_role
+import add_indexes_migration
+import add_audit_summary_migration
+import add_engineer_load_migration
+import add_project_staffing_migration
+import add_table_versions_migration
+import add_change_journal_migration
+from database import get_db, engine, SQLITE_PRAGMAS
+from auth import get_current_user, require_role, token_cache
+from maintenance import gate, DrainTimeout, MAINTENANCE_RETRY_AFTER
+from snapshot_store import SnapshotStore, SAFETY_PREFIX
+from audit_writer import audit_writer
+from events import broker
 
 # =============================================================================
 # Schemas
@@ -25,7 +43,26 @@ from auth import get_current_user, require_role
 class SnapshotInfo(BaseModel):
     filename: str
     created_at: datetime
-    size_kb: float
+    size_kb: float       # Logical size (the database file it restores)
+    physical_kb: float   # Compressed chunks it references (shared chunks counted in full)
+    unique_kb: float     # Disk space freed if this snapshot were evicted
+
+class SnapshotUsage(BaseModel):
+    snapshots: int
+    logical_kb: float
+    physical_kb: float
+    dedup_ratio: float
+
+class SnapshotJob(BaseModel):
+    job_id: str
+    filename: str
+    status: str  # running, complete, failed
+    pages_total: int = 0
+    pages_done: int = 0
+    percent: float = 0
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
 
 # =============================================================================
 # Configuration
@@ -41,72 +78,269 @@ DB_PATH = os.path.join(DATA_DIR, "resource_manager.db")
 if not os.path.exists(SNAPSHOT_DIR):
     os.makedirs(SNAPSHOT_DIR)
 
+store = SnapshotStore(os.path.join(SNAPSHOT_DIR, "store"))
+
+# Pages copied per backup step, and pause between steps so writers can get in
+SNAPSHOT_STEP_PAGES = int(os.environ.get("SNAPSHOT_STEP_PAGES", "1024"))
+SNAPSHOT_STEP_SLEEP = float(os.environ.get("SNAPSHOT_STEP_SLEEP", "0.005"))
+SNAPSHOT_MAX_RESTARTS = int(os.environ.get("SNAPSHOT_MAX_RESTARTS", "3"))
+MAX_TRACKED_JOBS = 20
+
+# =============================================================================
+# Online Backup
+# =============================================================================
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def backup_database(dest_path: str, pages: int = -1, progress: Optional[Callable[[int, int], None]] = None):
+    """
+    Copy the live database to dest_path with the SQLite online backup API.
+    The copy is written to a .part file and renamed into place once complete, so a
+    half-written snapshot is never listed.
+
+    `pages` > 0 copies in steps, releasing the source lock in between. A write from
+    another connection makes SQLite restart a stepped copy; after
+    SNAPSHOT_MAX_RESTARTS the rest is copied in a single step instead, which in WAL
+    mode only holds a read snapshot, so a busy writer cannot starve the backup.
+    """
+    part_path = dest_path + ".part"
+    source = sqlite3.connect(DB_PATH, timeout=SQLITE_PRAGMAS["busy_timeout"] / 1000)
+    target = sqlite3.connect(part_path)
+    restarts = 0
+    last_remaining = None
+
+    def on_step(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > SNAPSHOT_MAX_RESTARTS:
+                raise _BackupRestarted()
+        last_remaining = remaining
+        if progress:
+            progress(total - remaining, total)
+
+    try:
+        try:
+            source.backup(target, pages=pages, progress=on_step, sleep=SNAPSHOT_STEP_SLEEP)
+        except _BackupRestarted:
+            source.backup(target)
+            if progress:
+                total = source.execute("PRAGMA page_count").fetchone()[0]
+                progress(total, total)
+    except Exception:
+        target.close()
+        os.remove(part_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    os.replace(part_path, dest_path)
+
+
+def restore_database(snapshot_path: str):
+    """
+    Copy a snapshot into the live database through the backup API.
+    Callers must hold the maintenance gate (no requests in flight). The pool is
+    disposed first so no pooled connection holds a lock or a stale read snapshot;
+    the engine reconnects lazily on the next request. Any open connection that
+    survives (e.g. the async engine's) stays valid: SQLite sees the restore as an
+    ordinary committed write to the same file.
+    """
+    engine.dispose()
+    source = sqlite3.connect(snapshot_path)
+    target = sqlite3.connect(DB_PATH, timeout=SQLITE_PRAGMAS["busy_timeout"] / 1000)
+    try:
+        source.backup(target)
+        target.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        target.close()
+        source.close()
+
+    # Snapshots taken by older versions may predate newer tables and indexes
+    models.Base.metadata.create_all(bind=engine)
+    add_indexes_migration.migrate(engine)
+    add_audit_summary_migration.migrate(engine)
+    add_engineer_load_migration.migrate(engine)
+    add_project_staffing_migration.migrate(engine)
+    add_table_versions_migration.migrate(engine)
+    add_change_journal_migration.migrate(engine)
+    # Versions in the restored file may repeat ones clients already cached
+    add_table_versions_migration.new_epoch(engine)
+    # Users and roles may differ in the restored database
+    token_cache.clear()
+
+
+def store_snapshot(name: str, pages: int = -1, progress: Optional[Callable[[int, int], None]] = None):
+    """Back up the live database into a staging file, then chunk it into the store."""
+    staging_path = os.path.join(SNAPSHOT_DIR, f"{name}.staging")
+    backup_database(staging_path, pages, progress)
+    try:
+        store.put(name, staging_path)
+    finally:
+        os.remove(staging_path)
+
+
+def snapshot_exists(name: str) -> bool:
+    return store.exists(name) or os.path.exists(os.path.join(SNAPSHOT_DIR, name))
+
+
+_jobs: Dict[str, SnapshotJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def _start_job(filename: str) -> SnapshotJob:
+    with _jobs_lock:
+        if any(job.status == "running" for job in _jobs.values()):
+            raise HTTPException(status_code=409, detail="A snapshot is already in progress")
+        if snapshot_exists(filename):
+            raise HTTPException(status_code=409, detail=f"Snapshot {filename} already exists")
+        job = SnapshotJob(job_id=str(uuid.uuid4()), filename=filename, status="running", started_at=datetime.now())
+        _jobs[job.job_id] = job
+        # Forget the oldest finished jobs
+        for old_id in [j.job_id for j in _jobs.values() if j.status != "running"][:-MAX_TRACKED_JOBS]:
+            del _jobs[old_id]
+    return job
+
+
+def _run_snapshot(job: SnapshotJob):
+    def on_progress(done: int, total: int):
+        job.pages_done = done
+        job.pages_total = total
+        job.percent = round(done * 100 / total, 1) if total else 0
+
+    try:
+        store_snapshot(job.filename, SNAPSHOT_STEP_PAGES, on_progress)
+        job.percent = 100
+        job.status = "complete"
+        store.apply_retention()
+    except Exception as e:
+        job.error = str(e)
+        job.status = "failed"
+    job.finished_at = datetime.now()
+
 # =============================================================================
 # Router
 # =============================================================================
 
 snapshot_router = APIRouter(prefix="/api/snapshots", tags=["Snapshots"])
 
-@snapshot_router.post("/create", response_model=SnapshotInfo)
-def create_snapshot(current_user: models.User = Depends(require_role("admin"))):
-    """ Create a full backup of the current database """
+@snapshot_router.post("/create", response_model=SnapshotJob, status_code=202)
+def create_snapshot(background_tasks: BackgroundTasks, current_user: models.User = Depends(require_role("admin"))):
+    """
+    Start a full backup of the current database in the background.
+    Returns the job; poll /status/{job_id} until it is complete or failed.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"snapshot_{timestamp}.db"
-    dest_path = os.path.join(SNAPSHOT_DIR, filename)
-    
-    try:
-        # For SQLite, a simple file copy is a valid snapshot if not in mid-transaction
-        # In a real high-traffic app, we'd use VACUUM INTO or online backup
-        shutil.copy2(DB_PATH, dest_path)
-        
-        size = os.path.getsize(dest_path) / 1024
-        
-        return SnapshotInfo(
-            filename=filename,
-            created_at=datetime.now(),
-            size_kb=round(size, 2)
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create snapshot: {str(e)}")
+    job = _start_job(f"snapshot_{timestamp}.db")
+    background_tasks.add_task(_run_snapshot, job)
+    return job
+
+@snapshot_router.get("/status/{job_id}", response_model=SnapshotJob)
+def get_snapshot_status(job_id: str, current_user: models.User = Depends(require_role("admin"))):
+    """ Progress of a snapshot job started with /create """
+    job = _jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Snapshot job not found")
+    return job
 
 @snapshot_router.get("/", response_model=List[SnapshotInfo])
 def list_snapshots(current_user: models.User = Depends(require_role("admin"))):
-    """ List all available snapshots """
+    """ List all available snapshots with logical and physical (on-disk) size """
     snapshots = []
-    
+
+    manifests = store.manifests()
+    usage = store.usage(manifests)
+    for manifest in manifests:
+        sizes = usage[manifest["name"]]
+        snapshots.append(SnapshotInfo(
+            filename=manifest["name"],
+            created_at=datetime.fromisoformat(manifest["created_at"]),
+            size_kb=round(sizes["logical"] / 1024, 2),
+            physical_kb=round(sizes["physical"] / 1024, 2),
+            unique_kb=round(sizes["unique"] / 1024, 2)
+        ))
+
+    # Full-copy snapshots from before the chunk store
     for f in os.listdir(SNAPSHOT_DIR):
         if f.endswith(".db"):
             path = os.path.join(SNAPSHOT_DIR, f)
             stats = os.stat(path)
+            size_kb = round(stats.st_size / 1024, 2)
             snapshots.append(SnapshotInfo(
                 filename=f,
                 created_at=datetime.fromtimestamp(stats.st_ctime),
-                size_kb=round(stats.st_size / 1024, 2)
+                size_kb=size_kb,
+                physical_kb=size_kb,
+                unique_kb=size_kb
             ))
             
     return sorted(snapshots, key=lambda x: x.created_at, reverse=True)
 
+@snapshot_router.get("/usage", response_model=SnapshotUsage)
+def get_snapshot_usage(current_user: models.User = Depends(require_role("admin"))):
+    """ Total logical size of all stored snapshots versus disk actually used """
+    manifests = store.manifests()
+    logical = sum(m["size"] for m in manifests)
+    physical = store.physical_size()
+    return SnapshotUsage(
+        snapshots=len(manifests),
+        logical_kb=round(logical / 1024, 2),
+        physical_kb=round(physical / 1024, 2),
+        dedup_ratio=round(logical / physical, 2) if physical else 0
+    )
+
 @snapshot_router.post("/restore/{filename}")
-def restore_snapshot(filename: str, current_user: models.User = Depends(require_role("admin"))):
+def restore_snapshot(
+    filename: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role("admin"))
+):
     """ 
-    Restore the database to a previous state.
+    Restore the database to a previous state, without a server restart.
+    New API requests get 503 + Retry-After while the restore runs.
     CAUTION: This will overwrite current data.
     """
-    snapshot_path = os.path.join(SNAPSHOT_DIR, filename)
-    
-    if not os.path.exists(snapshot_path):
+    if not snapshot_exists(filename):
         raise HTTPException(status_code=404, detail="Snapshot not found")
-        
+
+    # This is the session the auth dependency used; give its connection back before draining
+    db.close()
+
     try:
-        # 1. Create a "Pre-Restore" safety backup
-        safety_name = f"pre_restore_safety_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        shutil.copy2(DB_PATH, os.path.join(SNAPSHOT_DIR, safety_name))
-        
-        # 2. Overwrite the main DB
-        # Note: In production uvicorn/fastapi, the DB file might be locked. 
-        # The user will need to restart the container for the best result.
-        shutil.copy2(snapshot_path, DB_PATH)
+        # 1. Create a "Pre-Restore" safety backup, including audit events still queued
+        audit_writer.flush()
+        safety_name = f"{SAFETY_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        if not snapshot_exists(safety_name):
+            store_snapshot(safety_name)
+
+        # 2. Reassemble stored snapshots before taking the gate, to keep the outage short
+        snapshot_path = os.path.join(SNAPSHOT_DIR, filename)
+        staging_path = None
+        if store.exists(filename):
+            staging_path = os.path.join(SNAPSHOT_DIR, f"{filename}.restore")
+            store.materialize(filename, staging_path)
+            snapshot_path = staging_path
+
+        # 3. End live event streams: their clients reconnect and reload the restored data
+        broker.close("reconnect")
+
+        # 4. Hold new requests, wait for in-flight ones, then overwrite the live DB
+        try:
+            with gate.drained():
+                restore_database(snapshot_path)
+        finally:
+            if staging_path:
+                os.remove(staging_path)
+        store.apply_retention()
         
-        return {"message": "Database restored successfully. Please RESTART the server to ensure all connections are refreshed."}
+        return {"message": "Database restored successfully."}
+    except DrainTimeout as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Restore postponed, server busy: {str(e)}",
+            headers={"Retry-After": str(MAINTENANCE_RETRY_AFTER)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Restore failed: {str(e)}")
@@ -0,0 +1,135 @@
+"""
+Staffing module for goodenough.to | Planning
+EPIC-002: Smart Backlog staffing metrics
+
+Computes total_hours_required, total_hours_allocated, role_staffing and
+is_fully_staffed for a set of projects. compute_staffing() aggregates
+requirements and allocations from scratch; stored_staffing() reads the same
+numbers from the trigger-maintained project_staffing rollup
+(add_project_staffing_migration.py), which is what the list endpoints use.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models, schemas
+
+
+def compute_staffing(db: Session, project_ids: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    """
+    Aggregate requirements and PROJECT_WORK allocations per (project, role).
+    Returns {project_id: {"required": {role: hours}, "requirement_count": n,
+                          "allocated": {role: hours}, "allocation_count": n}}
+    """
+    ids = list(project_ids) if project_ids is not None else None
+    stats = defaultdict(lambda: {"required": {}, "requirement_count": 0, "allocated": {}, "allocation_count": 0})
+    if ids is not None and not ids:
+        return stats
+
+    # 1. Requirements grouped by project and role
+    req_query = db.query(
+        models.ResourcingRequirement.project_id,
+        models.ResourcingRequirement.role,
+        func.sum(models.ResourcingRequirement.hours_per_week),
+        func.count(models.ResourcingRequirement.id)
+    ).group_by(models.ResourcingRequirement.project_id, models.ResourcingRequirement.role)
+    if ids is not None:
+        req_query = req_query.filter(models.ResourcingRequirement.project_id.in_(ids))
+
+    for project_id, role, hours, count in req_query:
+        entry = stats[project_id]
+        entry["required"][role] = int(hours or 0)
+        entry["requirement_count"] += count
+
+    # 2. PROJECT_WORK allocations grouped by project and engineer role
+    alloc_query = db.query(
+        models.Allocation.project_id,
+        models.Engineer.role,
+        func.sum(models.Allocation.hours),
+        func.count(models.Allocation.id)
+    ).outerjoin(models.Engineer, models.Allocation.engineer_id == models.Engineer.id)\
+     .filter(models.Allocation.category == models.CategoryEnum.PROJECT_WORK)\
+     .group_by(models.Allocation.project_id, models.Engineer.role)
+    if ids is not None:
+        alloc_query = alloc_query.filter(models.Allocation.project_id.in_(ids))
+
+    for project_id, role, hours, count in alloc_query:
+        entry = stats[project_id]
+        role_name = role.value if role is not None else None
+        entry["allocated"][role_name] = entry["allocated"].get(role_name, 0) + int(hours or 0)
+        entry["allocation_count"] += count
+
+    return stats
+
+
+def stored_staffing(db: Session, project_ids: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    """Same result as compute_staffing(), read from the project_staffing rollup."""
+    ids = list(project_ids) if project_ids is not None else None
+    stats = defaultdict(lambda: {"required": {}, "requirement_count": 0, "allocated": {}, "allocation_count": 0})
+    if ids is not None and not ids:
+        return stats
+
+    rollup = models.ProjectStaffing
+    query = db.query(
+        rollup.project_id, rollup.role,
+        rollup.required_hours, rollup.requirement_count,
+        rollup.allocated_hours, rollup.allocation_count
+    )
+    if ids is not None:
+        query = query.filter(rollup.project_id.in_(ids))
+
+    for project_id, role, required, requirement_count, allocated, allocation_count in query:
+        entry = stats[project_id]
+        if requirement_count:
+            entry["required"][role] = required
+            entry["requirement_count"] += requirement_count
+        if allocation_count:
+            entry["allocated"][role or None] = allocated
+            entry["allocation_count"] += allocation_count
+    return stats
+
+
+def staffing_metrics(entry: dict) -> dict:
+    """Turn one compute_staffing() entry into the Project response fields."""
+    required = entry["required"]
+    allocated = entry["allocated"]
+    total_required = sum(required.values())
+    total_allocated = sum(allocated.values())
+
+    role_stats = []
+    for role, role_required in required.items():
+        role_allocated = allocated.get(role, 0)
+        role_stats.append(schemas.RoleStaffingStatus(
+            role=role,
+            required=role_required,
+            allocated=role_allocated,
+            is_complete=role_allocated >= role_required
+        ))
+
+    if total_required > 0:
+        # If it has reqs, it must meet them all.
+        is_fully_staffed = all(s.is_complete for s in role_stats)
+    else:
+        # 0 reqs and 0 allocs is a draft/placeholder, not "unstaffed" in a bad way.
+        is_fully_staffed = entry["requirement_count"] == 0 and entry["allocation_count"] > 0
+
+    return {
+        "total_hours_required": total_required,
+        "total_hours_allocated": total_allocated,
+        "is_fully_staffed": is_fully_staffed,
+        "role_staffing": role_stats,
+    }
+
+
+def attach_staffing(db: Session, projects: list, scoped: bool = True) -> list:
+    """
+    Enrich Project ORM objects in place with staffing metrics (EPIC-002).
+    Pass scoped=False when `projects` is the whole table to skip the IN (...) filter.
+    """
+    stats = stored_staffing(db, [p.id for p in projects] if scoped else None)
+    for p in projects:
+        for field, value in staffing_metrics(stats[p.id]).items():
+            setattr(p, field, value)
+    return projects
@@ -0,0 +1,183 @@
+"""
+Delta sync for goodenough.to | Planning
+
+Clients load the collections once, then ask /api/sync for what changed since
+the version they hold instead of re-downloading everything:
+
+    GET /api/sync                 -> {"version": "<v>", ...}   (take before the full load)
+    GET /api/sync?since=<v>       -> upserts + tombstones after <v>, and the new version
+
+Changes come from change_journal (appended by triggers, see
+add_change_journal_migration.py). Entries after `since` are collapsed per row,
+and each row's current state decides whether it is an upsert or a tombstone,
+so replaying a page twice is harmless.
+
+Compaction drops journal entries superseded by a newer entry for the same row
+(always safe), and entries older than SYNC_JOURNAL_RETENTION_DAYS. Clients
+whose version predates the retained journal, or comes from before a snapshot
+restore, get 410 and must reload in full.
+"""
+
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import models, schemas
+from add_change_journal_migration import HORIZON
+from add_table_versions_migration import EPOCH
+from auth import get_current_user
+from database import get_db, engine
+from scheduler import PeriodicTask
+from staffing import attach_staffing
+
+SYNC_MAX_CHANGES = int(os.environ.get("SYNC_MAX_CHANGES", "5000"))
+SYNC_JOURNAL_RETENTION_DAYS = float(os.environ.get("SYNC_JOURNAL_RETENTION_DAYS", "7"))
+SYNC_COMPACT_INTERVAL_HOURS = float(os.environ.get("SYNC_COMPACT_INTERVAL_HOURS", "1"))
+
+# Journaled table -> (collection name in responses, model, response schema)
+COLLECTIONS = {
+    "engineers": ("engineers", models.Engineer, schemas.Engineer),
+    "projects": ("projects", models.Project, schemas.Project),
+    "allocations": ("allocations", models.Allocation, schemas.Allocation),
+    "resourcing_requirements": ("requirements", models.ResourcingRequirement, schemas.ResourcingRequirement),
+    "project_devices": ("devices", models.ProjectDevice, schemas.ProjectDevice),
+}
+
+# =============================================================================
+# Schemas
+# =============================================================================
+
+class SyncChanges(BaseModel):
+    version: str
+    has_more: bool
+    upserts: Dict[str, List[dict]]
+    deletes: Dict[str, List[str]]
+
+class CompactionResult(BaseModel):
+    superseded: int
+    expired: int
+    remaining: int
+
+# =============================================================================
+# Versions
+# =============================================================================
+
+def _state(db: Session) -> Tuple[int, int, int]:
+    """(epoch, horizon, latest seq) in the caller's read transaction."""
+    versions = dict(db.execute(text(
+        "SELECT table_name, version FROM table_versions WHERE table_name IN (:epoch, :horizon)"
+    ), {"epoch": EPOCH, "horizon": HORIZON}).all())
+    horizon = versions.get(HORIZON, 0)
+    latest = db.execute(text("SELECT max(seq) FROM change_journal")).scalar() or 0
+    return versions.get(EPOCH, 0), horizon, max(latest, horizon)
+
+
+def encode_version(epoch: int, seq: int) -> str:
+    return f"{epoch}.{seq}"
+
+
+def decode_version(version: str) -> Tuple[int, int]:
+    try:
+        epoch, seq = version.split(".")
+        return int(epoch), int(seq)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync version")
+
+# =============================================================================
+# Changes
+# =============================================================================
+
+def changes_since(db: Session, since: int, latest: int, limit: int) -> Tuple[int, bool, dict, dict]:
+    """Upserts and tombstones for up to `limit` journal entries after `since`."""
+    entries = db.query(models.ChangeJournal.seq, models.ChangeJournal.table_name, models.ChangeJournal.row_id)\
+        .filter(models.ChangeJournal.seq > since)\
+        .order_by(models.ChangeJournal.seq)\
+        .limit(limit + 1)\
+        .all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    version = entries[-1].seq if has_more else latest
+
+    touched = defaultdict(set)
+    for _, table, row_id in entries:
+        touched[table].add(row_id)
+
+    upserts, deletes = {}, {}
+    for table, ids in touched.items():
+        if table not in COLLECTIONS:
+            continue
+        name, model, schema = COLLECTIONS[table]
+        rows = db.query(model).filter(model.id.in_(ids)).all()
+        if model is models.Project:
+            attach_staffing(db, rows)
+        upserts[name] = [schema.model_validate(row).model_dump(mode="json") for row in rows]
+        deletes[name] = sorted(ids - {row.id for row in rows})
+    return version, has_more, upserts, deletes
+
+
+def compact_journal(retention_days: float = SYNC_JOURNAL_RETENTION_DAYS) -> CompactionResult:
+    """Drop superseded journal entries, then entries older than the retention window."""
+    with engine.begin() as conn:
+        superseded = conn.exec_driver_sql(
+            "DELETE FROM change_journal WHERE seq < ("
+            "SELECT max(j.seq) FROM change_journal j "
+            "WHERE j.table_name = change_journal.table_name AND j.row_id = change_journal.row_id)"
+        ).rowcount
+
+        cutoff = conn.exec_driver_sql(
+            "SELECT max(seq) FROM change_journal WHERE changed_at < datetime('now', ?)",
+            (f"{-retention_days * 86400:+.0f} seconds",)
+        ).scalar()
+        expired = 0
+        if cutoff is not None:
+            expired = conn.exec_driver_sql("DELETE FROM change_journal WHERE seq <= ?", (cutoff,)).rowcount
+            conn.exec_driver_sql(
+                "UPDATE table_versions SET version = max(version, ?) WHERE table_name = ?", (cutoff, HORIZON)
+            )
+        remaining = conn.exec_driver_sql("SELECT count(*) FROM change_journal").scalar()
+    return CompactionResult(superseded=superseded, expired=expired, remaining=remaining)
+
+
+# Runs every SYNC_COMPACT_INTERVAL_HOURS while the app is up (see main.py)
+journal_compactor = PeriodicTask("journal-compactor", SYNC_COMPACT_INTERVAL_HOURS, compact_journal)
+
+# =============================================================================
+# Router
+# =============================================================================
+
+sync_router = APIRouter(prefix="/api/sync", tags=["Sync"])
+
+@sync_router.get("", response_model=SyncChanges)
+def get_changes(
+    since: Optional[str] = Query(None, description="Version from a previous /api/sync response"),
+    limit: int = Query(SYNC_MAX_CHANGES, ge=1, le=SYNC_MAX_CHANGES),
+    db: Session = Depends(get_db)
+):
+    """
+    Changes to engineers, projects, allocations, requirements and devices since
+    `since`, as current rows (upserts) and deleted ids (tombstones) per collection.
+    Without `since`, returns only the current version. Follow `has_more` with the
+    returned version. 410 means the version is too old: reload everything.
+    """
+    epoch, horizon, latest = _state(db)
+    if since is None:
+        return SyncChanges(version=encode_version(epoch, latest), has_more=False, upserts={}, deletes={})
+
+    since_epoch, since_seq = decode_version(since)
+    if since_epoch != epoch or since_seq < horizon or since_seq > latest:
+        raise HTTPException(status_code=410, detail="Sync version expired, reload all collections")
+
+    version, has_more, upserts, deletes = changes_since(db, since_seq, latest, limit)
+    return SyncChanges(version=encode_version(epoch, version), has_more=has_more, upserts=upserts, deletes=deletes)
+
+@sync_router.post("/compact", response_model=CompactionResult)
+def compact(current_user: models.User = Depends(get_current_user)):
+    """Compact the change journal now (Admin only). Also runs every SYNC_COMPACT_INTERVAL_HOURS."""
+    if current_user is None or current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Requires admin")
+    return compact_journal()
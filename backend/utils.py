@@ -2,10 +2,13 @@
 Utility functions for goodenough.to | Planning
 """
 import json
+import uuid
+from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi import Request
 import models
+from audit_writer import audit_writer, insert_audit_rows
 
 def record_audit(
     db: Session,
@@ -16,7 +19,11 @@ def record_audit(
     user: Optional[models.User] = None,
     request: Optional[Request] = None
 ):
-    """ Record a manual action in the audit log """
+    """
+    Record a manual action in the audit log.
+    Queued for the batched audit writer; written (and committed) on `db`
+    directly only when the writer is not running or its queue is full.
+    """
     try:
         details_str = json.dumps(details) if details else None
         
@@ -24,7 +31,9 @@ def record_audit(
         if request:
             ip = request.client.host if request.client else None
             
-        audit = models.AuditLog(
+        row = dict(
+            id=str(uuid.uuid4()),
+            timestamp=datetime.utcnow(),  # Time of the action, not of the batch write
             user_id=user.id if user else "system",
             username=user.username if user else "system",
             action=action,
@@ -33,7 +42,9 @@ def record_audit(
             details=details_str,
             ip_address=ip
         )
-        db.add(audit)
+        if audit_writer.submit(row):
+            return
+        insert_audit_rows(db.connection(), [row])
         db.commit()
     except Exception as e:
         print(f"FAILED TO RECORD AUDIT: {e}")
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 import AddEngineerModal from './components/AddEngineerModal';
 import EditEngineerModal from './components/EditEngineerModal';
@@ -26,6 +26,29 @@ const API_BASE = window.location.hostname === 'localhost'
   ? 'http://localhost:8001'
   : '';
 
+// List endpoints are cursor-paginated: follow X-Next-Cursor until the last page
+const fetchAllPages = async (path) => {
+  const rows = [];
+  let cursor = null;
+  do {
+    const url = `${API_BASE}${path}${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`;
+    const res = await fetch(url);
+    if (!res.ok) throw new Error(`GET ${path} failed: ${res.status}`);
+    rows.push(...await res.json());
+    cursor = res.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return rows;
+};
+
+// Apply /api/sync upserts and tombstones to a loaded collection
+const mergeRows = (rows, upserts = [], deletes = []) => {
+  if (!upserts.length && !deletes.length) return rows;
+  const byId = new Map(rows.map(row => [row.id, row]));
+  upserts.forEach(row => byId.set(row.id, row));
+  deletes.forEach(id => byId.delete(id));
+  return [...byId.values()];
+};
+
 // Utility for priority badges
 const PriorityBadge = ({ priority }) => {
   const p = priority?.toLowerCase() || '';
@@ -112,6 +135,7 @@ function App({ isGuestMode = false }) {
   const [showFullyStaffed, setShowFullyStaffed] = useState(false); // EPIC-002
   const [allRequirements, setAllRequirements] = useState([]); // US-RS.2: For staffing calculations
   const [allDevices, setAllDevices] = useState([]); // US-13.6: For fiscal reporting
+  const [dashboardSummary, setDashboardSummary] = useState(null); // Dashboard KPI cards, from /api/dashboard/summary
   const [profileEngineer, setProfileEngineer] = useState(null); // Engineer Profile Modal
   const [quickAddTarget, setQuickAddTarget] = useState(null); // { engineerId, anchorRect }
   const [hoveredEngineerId, setHoveredEngineerId] = useState(null); // For delete button visibility
@@ -192,28 +216,69 @@ function App({ isGuestMode = false }) {
     fetchData();
   }, []);
 
+  // Version of the collections loaded below, from /api/sync
+  const syncVersion = useRef(null);
+
+  // Apply changes since the last load; false when the server asks for a full reload
+  const applySync = async () => {
+    let version = syncVersion.current;
+    for (;;) {
+      const res = await fetch(`${API_BASE}/api/sync?since=${encodeURIComponent(version)}`);
+      if (!res.ok) return false;
+      const { upserts, deletes, has_more, version: next } = await res.json();
+      setEngineers(prev => mergeRows(prev, upserts.engineers, deletes.engineers));
+      setProjects(prev => mergeRows(prev, upserts.projects, deletes.projects));
+      setAllAllocations(prev => mergeRows(prev, upserts.allocations, deletes.allocations));
+      setAllRequirements(prev => mergeRows(prev, upserts.requirements, deletes.requirements));
+      setAllDevices(prev => mergeRows(prev, upserts.devices, deletes.devices));
+      version = next;
+      syncVersion.current = next;
+      if (!has_more) return true;
+    }
+  };
+
+  // KPI cards are aggregated server-side; only the team filter changes them
+  const fetchDashboardSummary = async (team = dashboardTeamFilter) => {
+    const query = team === 'All Teams' ? '' : `?team=${encodeURIComponent(team)}`;
+    try {
+      const res = await fetch(`${API_BASE}/api/dashboard/summary${query}`);
+      if (res.ok) setDashboardSummary(await res.json());
+    } catch (error) {
+      console.error('Failed to fetch dashboard summary:', error);
+    }
+  };
+
   const fetchData = async () => {
     try {
-      const [engRes, projRes, allocRes, reqRes, devRes] = await Promise.all([
-        fetch(`${API_BASE}/api/engineers`),
-        fetch(`${API_BASE}/api/projects`),
-        fetch(`${API_BASE}/api/allocations`),
-        fetch(`${API_BASE}/api/requirements`),
-        fetch(`${API_BASE}/api/devices`)
-      ]);
-      const engData = await engRes.json();
-      const projData = await projRes.json();
-      const allocData = allocRes.ok ? await allocRes.json() : [];
-      const reqData = reqRes.ok ? await reqRes.json() : [];
-      const devData = devRes.ok ? await devRes.json() : [];
-      setEngineers(engData);
-      setProjects(projData);
-      setAllAllocations(allocData);
-      setAllRequirements(reqData);
-      setAllDevices(devData);
+      // The summary is a few hundred bytes: let the dashboard paint its KPI
+      // cards while the collections below are still loading
+      const summary = fetchDashboardSummary();
+      if (currentPage === 'dashboard') summary.then(() => setLoading(false));
+
+      const synced = syncVersion.current ? await applySync().catch(() => false) : false;
+
+      let projData = null;
+      if (!synced) {
+        // Taken before the full load, so changes made during it are pulled next time
+        const version = await fetch(`${API_BASE}/api/sync`).then(res => res.ok ? res.json() : null).catch(() => null);
+        let engData, allocData, reqData, devData;
+        [engData, projData, allocData, reqData, devData] = await Promise.all([
+          fetchAllPages('/api/engineers'),
+          fetchAllPages('/api/projects'),
+          fetchAllPages('/api/allocations').catch(() => []),
+          fetchAllPages('/api/requirements').catch(() => []),
+          fetchAllPages('/api/devices').catch(() => [])
+        ]);
+        setEngineers(engData);
+        setProjects(projData);
+        setAllAllocations(allocData);
+        setAllRequirements(reqData);
+        setAllDevices(devData);
+        syncVersion.current = version?.version ?? null;
+      }
 
       // Auto-select first project if none selected
-      if (!selectedProjectId && projData.length > 0) {
+      if (!selectedProjectId && projData?.length > 0) {
         setSelectedProjectId(projData[0].id);
       } else if (selectedProjectId) {
         // Refresh details for the currently selected project - pass ID explicitly
@@ -222,6 +287,7 @@ function App({ isGuestMode = false }) {
           fetchAllocations(selectedProjectId)
         ]);
       }
+      await summary;
       setLoading(false);
     } catch (error) {
       console.error('Error fetching data:', error);
@@ -229,6 +295,31 @@ function App({ isGuestMode = false }) {
     }
   };
 
+  // Live updates: other managers' allocation changes arrive over /api/events
+  // and are pulled through /api/sync. A reconnect (e.g. after being evicted
+  // as a slow consumer) may have missed events, so it refreshes too.
+  const fetchDataRef = useRef(fetchData);
+  fetchDataRef.current = fetchData;
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return;
+    const source = new EventSource(`${API_BASE}/api/events`);
+    let timer = null;
+    let opened = false;
+    const refresh = () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => fetchDataRef.current(), 300);
+    };
+    ['allocation.created', 'allocation.updated', 'allocation.deleted', 'allocation.batch'].forEach(type => source.addEventListener(type, refresh));
+    source.onopen = () => {
+      if (opened) refresh();
+      opened = true;
+    };
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
+  }, []);
+
   // Handle global events (for guest mode intake)
   useEffect(() => {
     const handleShowIntake = () => setShowIntakeModal(true);
@@ -559,20 +650,10 @@ function App({ isGuestMode = false }) {
       };
     });
 
-    // Restore removed variables that are still used in JSX
-    const filteredEngineerIds = new Set(filteredEngineers.map(e => e.id));
-    const activeAllocatedHours = allAllocations
-      .filter(a => activeProjectIds.has(a.project_id) && filteredEngineerIds.has(a.engineer_id))
-      .reduce((sum, a) => sum + a.hours, 0);
-
-    const totalTeamCapacity = filteredEngineers.reduce((sum, eng) => sum + ((eng.total_capacity || 40) - (eng.ktlo_tax || 0)), 0);
-
-    // Current allocation percentage (Team Total)
-    const currentAllocationPct = totalTeamCapacity > 0
-      ? Math.round((activeAllocatedHours / totalTeamCapacity) * 100)
-      : 0;
-
-    const burnoutRiskCount = engineerUtilization.filter(e => e.utilizationPct > 100).length;
+    // KPI cards: aggregated server-side by /api/dashboard/summary
+    const totalTeamCapacity = dashboardSummary?.team.effective_capacity ?? 0;
+    const currentAllocationPct = dashboardSummary?.team.utilization_pct ?? 0;
+    const burnoutRiskCount = dashboardSummary?.team.over_capacity_engineers ?? 0;
     const weeklyCapacity = weeks.map((week, i) => {
       const pct = parseInt(teamTotalData[i]) || 0;
       return { demand: pct, capacity: 100 };
@@ -617,26 +698,16 @@ function App({ isGuestMode = false }) {
     };
 
     // KPI: Project Lifecycle Counts (Phase 4)
+    const lifecycle = dashboardSummary?.lifecycle ?? {};
     const projectLifecycleCounts = {
-      Draft: projects.filter(p => (p.workflow_status || 'Draft') === 'Draft').length,
-      Pending: projects.filter(p => p.workflow_status === 'Pending Approval').length,
-      Active: projects.filter(p => p.workflow_status === 'Active').length,
-      Complete: projects.filter(p => p.workflow_status === 'Complete').length,
-      OnHold: projects.filter(p => p.workflow_status === 'On Hold').length
+      Draft: lifecycle['Draft'] ?? 0,
+      Pending: lifecycle['Pending Approval'] ?? 0,
+      Active: lifecycle['Active'] ?? 0,
+      Complete: lifecycle['Complete'] ?? 0,
+      OnHold: lifecycle['On Hold'] ?? 0,
+      Cancelled: lifecycle['Cancelled'] ?? 0
     };
 
-    // KPI: Fiscal Impact (Phase 4)
-    const fiscalImpactCounts = projects
-      .filter(p => p.workflow_status === 'Active' || p.workflow_status === 'Complete')
-      .reduce((acc, p) => {
-        if (!p.fiscal_year) return acc;
-        acc[p.fiscal_year] = (acc[p.fiscal_year] || 0) + (parseInt(p.device_count) || 0);
-        return acc;
-      }, {});
-
-    // Sort fiscal years for display
-    const sortedFyKeys = Object.keys(fiscalImpactCounts).sort();
-
 
     return (
       <div className="dashboard-content">
@@ -655,7 +726,10 @@ function App({ isGuestMode = false }) {
           <div style={{ display: 'flex', gap: '0.75rem', alignItems: 'center' }}>
             <select
               value={dashboardTeamFilter}
-              onChange={(e) => setDashboardTeamFilter(e.target.value)}
+              onChange={(e) => {
+                setDashboardTeamFilter(e.target.value);
+                fetchDashboardSummary(e.target.value);
+              }}
               style={{
                 padding: '0.5rem 2rem 0.5rem 0.75rem',
                 border: dashboardTeamFilter !== 'All Teams' ? '2px solid #3B82F6' : '1px solid #E2E8F0',
@@ -765,19 +839,9 @@ function App({ isGuestMode = false }) {
           <div className="kpi-card" style={{ background: 'white', padding: '1.5rem', borderRadius: '8px', border: '1px solid #E2E8F0' }}>
             <div style={{ fontSize: '0.6875rem', color: '#64748B', marginBottom: '0.5rem', textTransform: 'uppercase', fontWeight: 600 }}>UNASSIGNED DEMAND</div>
             {(() => {
-              // Logic: Sum requirements for Active/Approved projects
-              const activeApprovedIds = new Set(projects.filter(p => p.workflow_status === 'Active' || p.workflow_status === 'Approved').map(p => p.id));
-
-              const totalRequired = allRequirements
-                .filter(r => activeApprovedIds.has(r.project_id))
-                .reduce((sum, r) => sum + r.hours_per_week, 0);
-
-              const totalAllocated = allAllocations
-                .filter(a => activeApprovedIds.has(a.project_id))
-                .reduce((sum, a) => sum + a.hours, 0);
-
-              const voidHours = Math.max(0, totalRequired - totalAllocated);
-              const demandMetPct = totalRequired > 0 ? Math.round((totalAllocated / totalRequired) * 100) : 100;
+              // Requirements vs allocations on Active/Approved projects, computed server-side
+              const voidHours = dashboardSummary?.demand.unassigned_hours ?? 0;
+              const demandMetPct = dashboardSummary?.demand.demand_met_pct ?? 100;
 
               return (
                 <>
@@ -798,23 +862,10 @@ function App({ isGuestMode = false }) {
           <div className="kpi-card" style={{ background: 'white', padding: '1.5rem', borderRadius: '8px', border: '1px solid #E2E8F0' }}>
             <div style={{ fontSize: '0.6875rem', color: '#64748B', marginBottom: '0.5rem', textTransform: 'uppercase', fontWeight: 600 }}>DEEP WORK COMPLIANCE</div>
             {(() => {
-              // Logic: % of network engineers with NO meetings on Tue/Thu
-              // Note: Only checking 'Network Engineer' and 'Wireless Engineer' roles for compliance
-              const engineersToCheck = engineers.filter(e => e.role === 'Network Engineer' || e.role === 'Wireless Engineer');
-
-              const compliantEngineersCount = engineersToCheck.filter(eng => {
-                // Find if engineer has any 'Meetings' (Category) on 'Tue' or 'Thu' (Day)
-                const hasMeetingViolation = allAllocations.some(a =>
-                  a.engineer_id === eng.id &&
-                  a.category === 'Meetings' &&
-                  (a.day === 'Tue' || a.day === 'Thu')
-                );
-                return !hasMeetingViolation;
-              }).length;
-
-              const complianceScore = engineersToCheck.length > 0
-                ? Math.round((compliantEngineersCount / engineersToCheck.length) * 100)
-                : 100;
+              // % of Network/Wireless engineers with NO meetings on Tue/Thu, computed server-side
+              const checkedEngineersCount = dashboardSummary?.deep_work.checked_engineers ?? 0;
+              const compliantEngineersCount = dashboardSummary?.deep_work.compliant_engineers ?? 0;
+              const complianceScore = dashboardSummary?.deep_work.compliance_pct ?? 100;
 
               const getScoreColor = (score) => {
                 if (score >= 90) return '#10B981';
@@ -828,7 +879,7 @@ function App({ isGuestMode = false }) {
                     <div style={{ fontSize: '2.25rem', fontWeight: 700, color: getScoreColor(complianceScore) }}>{complianceScore}%</div>
                     <div style={{ fontSize: '0.875rem', fontWeight: 600, color: getScoreColor(complianceScore) }}>Compliance</div>
                   </div>
-                  <p style={{ fontSize: '0.6875rem', color: '#94A3B8', margin: 0 }}>{compliantEngineersCount}/{engineersToCheck.length} Engineers protected Tue/Thu</p>
+                  <p style={{ fontSize: '0.6875rem', color: '#94A3B8', margin: 0 }}>{compliantEngineersCount}/{checkedEngineersCount} Engineers protected Tue/Thu</p>
                 </>
               );
             })()}
@@ -861,9 +912,9 @@ function App({ isGuestMode = false }) {
               </div>
             </div>
             {/* Show Cancelled as a footnote if any exist */}
-            {projects.filter(p => p.workflow_status === 'Cancelled').length > 0 && (
+            {projectLifecycleCounts.Cancelled > 0 && (
               <div style={{ marginTop: '0.75rem', paddingTop: '0.75rem', borderTop: '1px dashed #E2E8F0', fontSize: '0.6875rem', color: '#94A3B8', textAlign: 'center' }}>
-                And {projects.filter(p => p.workflow_status === 'Cancelled').length} Cancelled projects
+                And {projectLifecycleCounts.Cancelled} Cancelled projects
               </div>
             )}
           </div>
@@ -878,13 +929,10 @@ function App({ isGuestMode = false }) {
               const match = dashboardQuarterFilter.match(/Q\d\s+(\d{4})/);
               const selectedYear = match ? `FY${match[1].slice(2)}` : 'FY26'; // Default if parse fails
 
-              // Filter all devices for projects in this Fiscal Year
-              const fyDevices = allDevices.filter(d => {
-                const project = projects.find(p => p.id === d.project_id);
-                return project && project.fiscal_year === selectedYear;
-              });
+              // Planned / completed refreshes by device type, computed server-side
+              const statsByType = dashboardSummary?.fiscal_refresh[selectedYear] ?? {};
 
-              if (fyDevices.length === 0) {
+              if (Object.keys(statsByType).length === 0) {
                 return (
                   <div style={{ textAlign: 'center', padding: '1rem', color: '#94A3B8', fontStyle: 'italic', fontSize: '0.875rem' }}>
                     No refresh goals defined for {selectedYear}
@@ -892,23 +940,6 @@ function App({ isGuestMode = false }) {
                 );
               }
 
-              // Aggregate counts by device type
-              const statsByType = fyDevices.reduce((acc, dev) => {
-                const type = dev.device_type;
-                if (!acc[type]) acc[type] = { planned: 0, completed: 0 };
-
-                // Add to planned (Goal)
-                acc[type].planned += (dev.proposed_qty || 0);
-
-                // Add to completed if project is Complete
-                const project = projects.find(p => p.id === dev.project_id);
-                if (project && project.workflow_status === 'Complete') {
-                  acc[type].completed += (dev.proposed_qty || 0);
-                }
-
-                return acc;
-              }, {});
-
               // Calculate max value for scaling the bars based on the highest count in any category
               const allValues = Object.values(statsByType).flatMap(s => [s.planned, s.completed]);
               const maxValue = Math.max(...allValues, 1); // Avoid div by zero
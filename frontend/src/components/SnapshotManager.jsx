@@ -36,6 +36,19 @@ const SnapshotManager = ({ API_BASE }) => {
                 headers: { 'Authorization': `Bearer ${token}` }
             });
             if (!response.ok) throw new Error('Failed to create snapshot');
+            let job = await response.json();
+
+            // Snapshot runs in the background; poll until it finishes
+            while (job.status === 'running') {
+                setMessage({ type: 'success', text: `Creating snapshot... ${job.percent}%` });
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const statusResponse = await fetch(`${API_BASE}/api/snapshots/status/${job.job_id}`, {
+                    headers: { 'Authorization': `Bearer ${token}` }
+                });
+                if (!statusResponse.ok) throw new Error('Failed to check snapshot status');
+                job = await statusResponse.json();
+            }
+            if (job.status === 'failed') throw new Error(`Failed to create snapshot: ${job.error}`);
             setMessage({ type: 'success', text: 'Snapshot created successfully.' });
             fetchSnapshots();
         } catch (err) {
@@ -124,7 +137,9 @@ const SnapshotManager = ({ API_BASE }) => {
                             <tr key={s.filename} style={{ borderBottom: '1px solid #F1F5F9' }}>
                                 <td style={{ padding: '1rem', fontWeight: '500', color: '#1E293B' }}>{s.filename}</td>
                                 <td style={{ padding: '1rem', color: '#475569' }}>{new Date(s.created_at).toLocaleString()}</td>
-                                <td style={{ padding: '1rem', color: '#64748B' }}>{s.size_kb} KB</td>
+                                <td style={{ padding: '1rem', color: '#64748B' }} title={`${s.physical_kb} KB on disk, ${s.unique_kb} KB not shared with other snapshots`}>
+                                    {s.size_kb} KB <span style={{ fontSize: '0.75rem', color: '#94A3B8' }}>(+{s.unique_kb} KB stored)</span>
+                                </td>
                                 <td style={{ padding: '1rem', textAlign: 'right' }}>
                                     <button
                                         onClick={() => restoreSnapshot(s.filename)}